@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so profiles cover the whole middleware stack; inert unless PROFILE_* below enable it
+    'app1.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,14 +78,51 @@ WSGI_APPLICATION = 'Project101.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# SQLite production mode: WAL journaling, BEGIN IMMEDIATE transactions and a busy timeout
+# (see app1/sqlite_backend), plus a single-writer gate for attendance across threads and
+# worker processes (app1/db.py).
+# Set LOKNETRA_SQLITE_PRODUCTION=0 to use the stock backend.
+SQLITE_PRODUCTION_MODE = os.environ.get('LOKNETRA_SQLITE_PRODUCTION', '1') == '1'
+SQLITE_BUSY_TIMEOUT = 20  # seconds a writer waits for the lock before "database is locked"
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'app1.sqlite_backend' if SQLITE_PRODUCTION_MODE else 'django.db.backends.sqlite3',
+        # LOKNETRA_DB_PATH points a server at another database file (load tests run against a copy)
+        'NAME': os.environ.get('LOKNETRA_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        },
+        # A file rather than shared memory, so tests can write from many threads through the real locking
+        'TEST': {
+            'NAME': os.path.join(tempfile.gettempdir(), 'loknetra-test.sqlite3'),
+        },
     }
 }
 
 
+# The telemetry cache is file-based so every worker process sees the camera threads' stats.
+# The shared cache holds state all workers must agree on, such as the safety refresh lock. It is
+# file-based by default, which covers one host; LOKNETRA_REDIS_URL moves it to Redis (atomic
+# add, several hosts; needs the redis package).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'telemetry': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'loknetra-telemetry'),
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['LOKNETRA_REDIS_URL'],
+    } if os.environ.get('LOKNETRA_REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'loknetra-shared'),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -128,9 +168,91 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # settings.py
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+MEDIA_ROOT = os.environ.get('LOKNETRA_MEDIA_ROOT', os.path.join(BASE_DIR, 'media/'))
 
 
 
 LOGIN_URL = 'login'  # Example: 'login' if your login URL is '/login/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
\ No newline at end of file
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Face quality gate thresholds for the web kiosk (cameras use their own configuration).
+# Keys: min_detection_prob, min_face_size, max_yaw, min_sharpness
+FACE_QUALITY_THRESHOLDS = {}
+
+# Rows per page on the attendance list (keyset-paginated)
+ATTENDANCE_PAGE_SIZE = 50
+
+# Rows fetched per database round trip when streaming attendance exports
+ATTENDANCE_EXPORT_CHUNK_SIZE = 2000
+
+# Seconds the dashboard's daily summary is cached for
+DASHBOARD_CACHE_TTL = 15
+
+# Safety incidents: absentees are flagged after SAFETY_ABSENT_AFTER (local time), open check-ins
+# after SAFETY_MISSING_CHECKOUT_HOURS; the safety page refreshes the table at most every
+# SAFETY_REFRESH_INTERVAL seconds (or run `manage.py refresh_safety_incidents` from cron)
+SAFETY_ABSENT_AFTER = '10:00'
+SAFETY_MISSING_CHECKOUT_HOURS = 8
+SAFETY_REFRESH_INTERVAL = 60
+SAFETY_INCIDENT_LIMIT = 200
+
+# Check-ins after this local time count as late arrivals in the attendance rollups
+ATTENDANCE_LATE_AFTER = '09:30'
+
+# Attendance older than ATTENDANCE_HOT_DAYS is moved to Parquet files under ATTENDANCE_ARCHIVE_DIR
+# by `manage.py archive_attendance` (run it from cron); lists and exports read both transparently
+ATTENDANCE_HOT_DAYS = 90
+ATTENDANCE_ARCHIVE_DIR = BASE_DIR / 'archive' / 'attendance'
+
+# Employee photo thumbnails: edge length in pixels, and how long browsers may cache them
+# (their file names change with their content; behind nginx, serve media/employees/thumbs/
+# with the same header)
+PHOTO_THUMBNAIL_SIZE = 128
+PHOTO_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# Camera status page: a camera is "stalled" after CAMERA_STALL_SECONDS without a frame and
+# "slow" below CAMERA_MIN_FPS captured; stats disappear CAMERA_TELEMETRY_TTL seconds after
+# the camera thread stops publishing
+CAMERA_STALL_SECONDS = 5
+CAMERA_MIN_FPS = 5
+CAMERA_TELEMETRY_TTL = 60
+
+# Camera connections (app1/cameras.py): after CAMERA_MAX_READ_FAILURES failed reads in a row a
+# camera reconnects, waiting CAMERA_RECONNECT_BACKOFF seconds and doubling up to
+# CAMERA_MAX_BACKOFF between attempts. Stream URLs time out opens and reads after
+# CAMERA_STALL_SECONDS
+CAMERA_MAX_READ_FAILURES = 5
+CAMERA_RECONNECT_BACKOFF = 1.0
+CAMERA_MAX_BACKOFF = 30.0
+
+# Request profiling (app1/profiling.py), off by default: profile a random PROFILE_SAMPLE_RATE
+# fraction of requests plus every request under PROFILE_PATHS, e.g.
+# LOKNETRA_PROFILE_PATHS=/attendance/process/. PROFILE_BACKEND is 'sampling' (cheap, folded
+# stacks) or 'cprofile' (exact, slower). Profiles of requests slower than PROFILE_MIN_SECONDS
+# go to PROFILE_DIR, newest PROFILE_MAX_FILES kept; staff can browse them at /profiles/
+PROFILE_SAMPLE_RATE = float(os.environ.get('LOKNETRA_PROFILE_SAMPLE_RATE', 0))
+PROFILE_PATHS = [path for path in os.environ.get('LOKNETRA_PROFILE_PATHS', '').split(',') if path]
+PROFILE_BACKEND = os.environ.get('LOKNETRA_PROFILE_BACKEND', 'sampling')
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_MIN_SECONDS = float(os.environ.get('LOKNETRA_PROFILE_MIN_SECONDS', 0))
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'loknetra-profiles')
+PROFILE_MAX_FILES = 200
+
+# Recognition events (app1/events.py): at most EVENT_QUEUE_SIZE events wait for the subscribers
+# before new ones are dropped. The dashboard's live feed (/dashboard/events/) holds a worker
+# thread for up to EVENT_STREAM_SECONDS, then the browser reconnects; it sees check-ins logged
+# by other processes within EVENT_STREAM_POLL_INTERVAL seconds. Under gunicorn, give each
+# worker enough GUNICORN_THREADS for the open dashboards
+EVENT_QUEUE_SIZE = 1000
+EVENT_STREAM_SECONDS = 300
+EVENT_STREAM_POLL_INTERVAL = 1.0
+
+# Edge-node mode (app1/edge.py). On the central server, set EDGE_SYNC_TOKEN to accept batches
+# and serve the gallery at /edge/. On an edge node, also set EDGE_CENTRAL_URL (and its own
+# LOKNETRA_DB_PATH and LOKNETRA_MEDIA_ROOT) and run `manage.py edge_sync --loop 60`.
+# EDGE_NODE_ID names the node in the central audit log (default: the host name)
+EDGE_SYNC_TOKEN = os.environ.get('LOKNETRA_EDGE_SYNC_TOKEN', '')
+EDGE_CENTRAL_URL = os.environ.get('LOKNETRA_EDGE_CENTRAL_URL', '')
+EDGE_NODE_ID = os.environ.get('LOKNETRA_EDGE_NODE_ID', '')
+EDGE_SYNC_BATCH_SIZE = 500
+EDGE_MAX_BATCH_BYTES = 16 * 1024 * 1024
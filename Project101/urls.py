@@ -20,9 +20,13 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path,include
 from django.views.generic import TemplateView
+from app1.views import management as app1_management
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('app1.urls')),
     path('about/', TemplateView.as_view(template_name='about.html'), name='about'),
+    path('metrics', app1_management.metrics_view, name='metrics'),
+    # Photo thumbnails are immutable, so they get long-lived cache headers (ahead of the plain media route)
+    path(f"{settings.MEDIA_URL.strip('/')}/employees/thumbs/<path:path>", app1_management.employee_thumbnail, name='employee_thumbnail'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
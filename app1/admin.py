@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Employee, Attendance, CameraConfiguration
+from .models import Employee, Attendance, AttendanceEvent, CameraConfiguration
+from .search import matching_employee_ids
 
 
 @admin.register(Employee)
@@ -11,12 +12,19 @@ class EmployeeAdmin(admin.ModelAdmin):
         'phone_number', 
         'designation', 
         'department', 
+        'site',
         'is_active'
     ]
-    list_filter = ['department', 'is_active']
-    search_fields = ['name', 'email', 'employee_id']
+    list_filter = ['department', 'site', 'is_active']
+    search_fields = ['name', 'email', 'employee_id', 'department']
     ordering = ['employee_id']  # Orders by employee ID
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE '%term%' scans over search_fields
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=matching_employee_ids(search_term)), False
+
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
@@ -24,6 +32,12 @@ class AttendanceAdmin(admin.ModelAdmin):
     list_filter = ['date']
     search_fields = ['employee__name', 'employee__employee_id']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE '%term%' scans over search_fields
+        if not search_term:
+            return queryset, False
+        return queryset.filter(employee_id__in=matching_employee_ids(search_term)), False
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # Editing an existing object
             return ['employee', 'date', 'check_in_time', 'check_out_time']
@@ -40,5 +54,21 @@ class AttendanceAdmin(admin.ModelAdmin):
 
 @admin.register(CameraConfiguration)
 class CameraConfigurationAdmin(admin.ModelAdmin):
-    list_display = ['name', 'camera_source', 'threshold']
+    list_display = ['name', 'camera_source', 'threshold', 'min_detection_prob', 'min_face_size', 'max_yaw', 'min_sharpness']
     search_fields = ['name']
+    filter_horizontal = ['gallery_employees']
+
+
+@admin.register(AttendanceEvent)
+class AttendanceEventAdmin(admin.ModelAdmin):
+    list_display = ['occurred_at', 'name', 'status', 'source', 'distance']
+    list_filter = ['status', 'source']
+    search_fields = ['name']
+    date_hierarchy = 'occurred_at'
+
+    # An audit log: written by the event subscribers only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from .search import ensure_employee_search_index
+    ensure_employee_search_index(using)
 
 
 class App1Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app1'
+
+    def ready(self):
+        from . import signals, subscribers  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,214 @@
+"""Cold storage for historical attendance in month-partitioned Parquet files.
+
+``archive_attendance`` (the management command) moves records older than
+``ATTENDANCE_HOT_DAYS`` out of ``app1_attendance`` into one zstd-compressed
+Parquet file per month under ``ATTENDANCE_ARCHIVE_DIR``, so the live table
+and its indexes only hold recent data. Each file is kept sorted in the
+attendance list order (-date, -check_in_time nulls last, id) and carries the
+employee's name, ID and department as of archiving, so it can be read
+without joining back to ``Employee``.
+
+``_manifest.json`` records the watermark: every record dated before
+``archived_before`` lives in the archive. Readers only query the live table
+from the watermark onwards and read the archive below it, so a run that is
+interrupted between writing the files and deleting the live rows never
+shows a record twice; re-running merges (by id) and finishes the deletes.
+
+pandas is imported by the functions that read or write Parquet, so that
+modules reaching this one only for the watermark stay light.
+"""
+import json
+import os
+from datetime import date as date_cls, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .db import serialized_write
+from .models import Attendance, Employee
+
+COLUMNS = ['id', 'employee_pk', 'employee_name', 'employee_code', 'department', 'date', 'check_in_time', 'check_out_time']
+SORT_ORDER = {'by': ['date', 'check_in_time', 'id'], 'ascending': [False, False, True], 'na_position': 'last'}
+MANIFEST = '_manifest.json'
+
+
+def archive_dir():
+    return Path(getattr(settings, 'ATTENDANCE_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive' / 'attendance'))
+
+
+def archive_horizon(today=None):
+    """Records dated before this day are due for archiving."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=getattr(settings, 'ATTENDANCE_HOT_DAYS', 90))
+
+
+def read_manifest():
+    try:
+        with open(archive_dir() / MANIFEST) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'archived_before': None, 'months': {}}
+
+
+def archived_before():
+    """The watermark: every record dated before it is in the archive (None if nothing is archived)."""
+    watermark = read_manifest()['archived_before']
+    return date_cls.fromisoformat(watermark) if watermark else None
+
+
+def _replace_file(path, write):
+    """Write ``path`` through a temporary file so readers never see a partial file."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    write(tmp_path)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _month_path(month):
+    return archive_dir() / f'{month:%Y-%m}.parquet'
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _live_rows(start, end):
+    """Live records dated in [start, end), as an archive-shaped DataFrame."""
+    import pandas as pd
+
+    rows = Attendance.objects.filter(date__gte=start, date__lt=end).order_by().values_list(
+        'id', 'employee_id', 'employee__name', 'employee__employee_id', 'employee__department',
+        'date', 'check_in_time', 'check_out_time',
+    ).iterator(chunk_size=getattr(settings, 'ATTENDANCE_EXPORT_CHUNK_SIZE', 2000))
+    frame = pd.DataFrame.from_records(list(rows), columns=COLUMNS)
+    for column in ('check_in_time', 'check_out_time'):
+        frame[column] = pd.to_datetime(frame[column], utc=True)
+    return frame
+
+
+def _delete_live_rows(ids, chunk_size):
+    """Delete archived records in short transactions so check-ins are never held up for long.
+
+    Plain SQL deletes skip the Attendance signals on purpose: the daily summaries and rollups
+    keep describing the archived days.
+    """
+    table = connection.ops.quote_name(Attendance._meta.db_table)
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i:i + chunk_size]
+        with serialized_write():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk
+                )
+
+
+def archive_attendance(before=None, chunk_size=500, dry_run=False):
+    """Move records dated before ``before`` into the archive; returns ``{month: rows archived}``."""
+    import pandas as pd
+
+    before = before or archive_horizon()
+    oldest = Attendance.objects.filter(date__lt=before).order_by('date').values_list('date', flat=True).first()
+    if oldest is None:
+        return {}
+
+    archive_dir().mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest()
+    archived = {}
+    month = _month_start(oldest)
+    while month < before:
+        end = min(_next_month(month), before)
+        frame = _live_rows(month, end)
+        key = f'{month:%Y-%m}'
+        if not frame.empty:
+            archived[key] = len(frame)
+            if not dry_run:
+                path = _month_path(month)
+                if path.exists():
+                    frame = pd.concat([pd.read_parquet(path), frame]).drop_duplicates('id', keep='last')
+                frame = frame.sort_values(**SORT_ORDER)
+                _replace_file(path, lambda tmp: frame.to_parquet(tmp, index=False, compression='zstd'))
+                manifest['months'][key] = len(frame)
+        month = _next_month(month)
+
+    if dry_run:
+        return archived
+
+    # Advance the watermark before deleting: from here on readers take these days from the archive
+    watermark = manifest['archived_before']
+    if watermark is None or before.isoformat() > watermark:
+        manifest['archived_before'] = before.isoformat()
+    _replace_file(archive_dir() / MANIFEST, lambda tmp: tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True)))
+
+    ids = list(Attendance.objects.filter(date__lt=before).order_by().values_list('id', flat=True))
+    _delete_live_rows(ids, chunk_size)
+    return archived
+
+
+def _to_datetime(value):
+    import pandas as pd
+
+    return None if pd.isna(value) else value.to_pydatetime()
+
+
+def archived_months():
+    """(first day of month, month end exclusive, Parquet path) for every archived month, oldest first."""
+    for key in sorted(read_manifest()['months']):
+        month = datetime.strptime(key, '%Y-%m').date()
+        yield month, _next_month(month), _month_path(month)
+
+
+def iter_archived(date=None, employee_ids=None, latest=None):
+    """Yield archived records newest first as (id, employee_pk, name, employee_code, department, date, check_in, check_out).
+
+    Only the month files that can match are opened, and the filters are pushed down to the
+    Parquet reader. ``latest`` skips anything dated after it (used to resume from a page cursor).
+    """
+    import pandas as pd
+
+    if employee_ids is not None and not employee_ids:
+        return
+    for month, _, path in reversed(list(archived_months())):
+        if date and _month_start(date) != month:
+            continue
+        if latest and month > latest:
+            continue
+        filters = []
+        if date:
+            filters.append(('date', '==', date))
+        if latest:
+            filters.append(('date', '<=', latest))
+        if employee_ids is not None:
+            filters.append(('employee_pk', 'in', list(employee_ids)))
+        frame = pd.read_parquet(path, filters=filters or None)
+        for row in frame.itertuples(index=False, name=None):
+            pk, employee_pk, name, employee_code, department, day, check_in, check_out = row
+            yield (
+                int(pk), int(employee_pk), name, employee_code, department,
+                day, _to_datetime(check_in), _to_datetime(check_out),
+            )
+
+
+def archived_attendance(date=None, employee_ids=None, after=None):
+    """Archived records as unsaved Attendance instances, newest first, for the attendance list.
+
+    ``after`` is a decoded page cursor (date, check_in_time, id): only records that follow it in
+    the list order are returned.
+    """
+    def sort_key(day, check_in, pk):
+        return (-day.toordinal(), check_in is None, -check_in.timestamp() if check_in else 0, pk)
+
+    cursor_key = sort_key(*after) if after else None
+    for pk, employee_pk, name, employee_code, department, day, check_in, check_out in iter_archived(
+        date=date, employee_ids=employee_ids, latest=after[0] if after else None
+    ):
+        if cursor_key and sort_key(day, check_in, pk) <= cursor_key:
+            continue
+        employee = Employee(pk=employee_pk, name=name, employee_id=employee_code, department=department)
+        yield Attendance(pk=pk, employee=employee, date=day, check_in_time=check_in, check_out_time=check_out)
@@ -0,0 +1,46 @@
+"""Attendance writes from the camera loop and the kiosk.
+
+Each check-in or check-out commits together with its ``AttendanceEvent``
+audit row, inside the caller's ``serialized_write`` block: the audit row
+is also the edge node's sync outbox (see ``app1/edge.py``), so it must
+exist exactly when the attendance change does. Only what can be lost
+without losing attendance (the sound, live dashboards) goes through the
+event bus afterwards.
+"""
+from django.utils import timezone
+
+from . import metrics
+from .db import serialized_write
+from .models import Attendance, AttendanceEvent
+
+RECORDED = ('checked_in', 'checked_out')
+
+
+def log_attendance(employee, status, source, at, distance=None):
+    """Write the audit row for a check-in or check-out; call inside the serialized_write that made it."""
+    return AttendanceEvent.objects.create(
+        employee=employee, name=employee.name, status=status, source=source, distance=distance, occurred_at=at,
+    )
+
+
+def record_camera_attendance(employee, current_time, source, distance=None):
+    """Check a camera-recognized employee in, or out once a minute has passed since check-in.
+
+    The check-in/out is stamped with ``current_time`` and logged with its audit row in the same
+    transaction. Returns 'checked_in', 'checked_out', 'already_checked_in' or 'already_checked_out'.
+    """
+    with metrics.stage('db_write'), serialized_write():
+        attendance, created = Attendance.objects.get_or_create(employee=employee, date=timezone.localdate(current_time))
+        if created or not attendance.check_in_time:
+            attendance.mark_check_in(at=current_time)
+            status = 'checked_in'
+        elif attendance.check_out_time:
+            return 'already_checked_out'
+        # Check out logic: check if 1 minute has passed after check-in
+        elif (current_time - attendance.check_in_time).total_seconds() > 60:
+            attendance.mark_check_out(at=current_time)
+            status = 'checked_out'
+        else:
+            return 'already_checked_in'
+        log_attendance(employee, status, source, current_time, distance)
+    return status
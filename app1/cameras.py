@@ -0,0 +1,163 @@
+"""Camera connections for the recognition loop.
+
+``open_camera`` claims a camera for one loop and opens a single
+``VideoCapture`` for it, kept for as long as the loop runs. The first
+connect tries the capture backends that exist on this platform for a
+device index (DirectShow then Media Foundation on Windows, V4L2 on
+Linux, AVFoundation on macOS, then OpenCV's default) and remembers the
+one that delivered a frame; reconnects reuse it. Network streams get
+open and read timeouts, so a dead stream fails a read instead of
+hanging it.
+
+``CameraConnection.frames()`` yields frames until the loop is stopped.
+Repeated read failures reconnect with exponential backoff instead of
+ending the loop; a video file simply ends. Connection state, the backend
+and reconnects are reported to the camera's ``CameraTelemetry``, whose
+cached snapshots the status and configuration pages read instead of
+probing devices.
+"""
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_claimed = set()
+_claimed_lock = threading.Lock()
+
+
+class CameraBusy(Exception):
+    pass
+
+
+class CameraUnavailable(Exception):
+    pass
+
+
+def backend_candidates(source):
+    """OpenCV capture backends to try for a camera source, most specific first."""
+    import cv2
+
+    if not isinstance(source, int):
+        return [cv2.CAP_ANY]  # Files and stream URLs: let OpenCV pick (FFmpeg, GStreamer)
+    if sys.platform == 'win32':
+        names = ['CAP_DSHOW', 'CAP_MSMF']
+    elif sys.platform == 'darwin':
+        names = ['CAP_AVFOUNDATION']
+    else:
+        names = ['CAP_V4L2']
+    return [getattr(cv2, name) for name in names if hasattr(cv2, name)] + [cv2.CAP_ANY]
+
+
+class CameraConnection:
+    def __init__(self, camera, telemetry, stop_event):
+        self.camera = camera
+        self.telemetry = telemetry
+        self.stop_event = stop_event
+        self.source = int(camera.camera_source) if camera.camera_source.isdigit() else camera.camera_source
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.capture = None
+        self.backend = None
+        self.connects = 0
+        self.read_timeout = getattr(settings, 'CAMERA_STALL_SECONDS', 5)
+        self.max_read_failures = getattr(settings, 'CAMERA_MAX_READ_FAILURES', 5)
+        self.backoff = getattr(settings, 'CAMERA_RECONNECT_BACKOFF', 1.0)
+        self.max_backoff = getattr(settings, 'CAMERA_MAX_BACKOFF', 30.0)
+
+    def _open(self, backend):
+        import cv2
+
+        params = []
+        if isinstance(self.source, str) and '://' in self.source:
+            timeout_ms = int(self.read_timeout * 1000)
+            params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+        capture = cv2.VideoCapture(self.source, backend, params)
+        if capture.isOpened():
+            # Set camera properties for better performance
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            capture.set(cv2.CAP_PROP_FPS, 30)
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size for lower latency
+            if capture.read()[0]:
+                if self.is_file:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Replay from the first frame
+                return capture
+        capture.release()
+        return None
+
+    def connect(self, attempts=None):
+        """Open the camera, backing off exponentially between attempts; returns True once a frame was read.
+
+        Gives up after ``attempts`` failed attempts (None: keep trying until the loop is stopped).
+        """
+        failed = 0
+        while not self.stop_event.is_set():
+            # The first connect of the loop is 'connecting', every later one a reconnect
+            self.telemetry.connecting(self.connects)
+            self.connects += 1
+            for backend in [self.backend] if self.backend is not None else backend_candidates(self.source):
+                try:
+                    capture = self._open(backend)
+                except Exception as e:
+                    print(f"Error opening camera {self.camera.name}: {e}")
+                    capture = None
+                if capture is not None:
+                    self.capture, self.backend = capture, backend
+                    self.telemetry.connected(capture.getBackendName())
+                    print(f"Camera {self.camera.name} connected ({capture.getBackendName()})")
+                    return True
+            failed += 1
+            if attempts is not None and failed >= attempts:
+                return False
+            delay = min(self.backoff * 2 ** (failed - 1), self.max_backoff)
+            print(f"Camera {self.camera.name} not available, retrying in {delay:.0f}s")
+            self.stop_event.wait(delay)
+        return False
+
+    def frames(self):
+        """Yield frames until stopped, reconnecting after ``CAMERA_MAX_READ_FAILURES`` failed reads in a row."""
+        failures = 0
+        while self.capture is not None and not self.stop_event.is_set():
+            ok, frame = self.capture.read()
+            if ok:
+                failures = 0
+                yield frame
+                continue
+            self.telemetry.read_failed()
+            if self.is_file:
+                return  # End of the clip
+            failures += 1
+            if failures < self.max_read_failures:
+                continue
+            print(f"Camera {self.camera.name} stopped delivering frames, reconnecting")
+            self.release()
+            failures = 0
+            self.connect()
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+@contextmanager
+def open_camera(camera, telemetry, stop_event, attempts=3):
+    """Claim ``camera`` for this loop and connect to it (see CameraConnection.connect for ``attempts``).
+
+    Raises CameraBusy if another loop in this process has the camera, CameraUnavailable if it cannot
+    be opened.
+    """
+    with _claimed_lock:
+        if camera.pk in _claimed:
+            raise CameraBusy(f"Camera {camera.name} is already running")
+        _claimed.add(camera.pk)
+    connection = CameraConnection(camera, telemetry, stop_event)
+    try:
+        if not connection.connect(attempts) and not stop_event.is_set():
+            raise CameraUnavailable(f"Failed to initialize camera {camera.name} after {attempts} attempts")
+        yield connection
+    finally:
+        connection.release()
+        with _claimed_lock:
+            _claimed.discard(camera.pk)
@@ -0,0 +1,147 @@
+"""Columnar (Parquet / Arrow IPC) exports of attendance and employee data for analytics.
+
+Rows are read with ``values_list`` in chunks and transposed straight into
+Arrow record batches, so no model instances are created and times stay
+typed timestamps instead of formatted strings. Attendance older than the
+archive watermark is read from the archive's Parquet files with the date
+range pushed down to the reader.
+"""
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from django.conf import settings
+
+from .archive import archived_before, archived_months
+from .models import Attendance, Employee
+
+FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+ATTENDANCE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('employee_pk', pa.int64()),
+    ('employee_code', pa.string()),
+    ('employee_name', pa.string()),
+    ('department', pa.string()),
+    ('date', pa.date32()),
+    ('check_in_time', TIMESTAMP),
+    ('check_out_time', TIMESTAMP),
+    ('duration_seconds', pa.int64()),
+])
+
+EMPLOYEE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('employee_id', pa.string()),
+    ('name', pa.string()),
+    ('email', pa.string()),
+    ('phone_number', pa.string()),
+    ('designation', pa.string()),
+    ('department', pa.string()),
+    ('is_active', pa.bool_()),
+])
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _with_duration(columns):
+    """Append duration_seconds (check-out minus check-in, null if either is missing) to attendance columns."""
+    check_in, check_out = columns[-2], columns[-1]
+    duration = pc.cast(pc.subtract(check_out, check_in), pa.duration('s'), safe=False)
+    return columns + [pc.cast(duration, pa.int64())]
+
+
+def _batch(chunk, schema):
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)],
+        schema=schema,
+    )
+
+
+def _archived_attendance(start, end):
+    """Record batches of archived attendance dated in [start, end] (either bound may be None)."""
+    filters = [('date', '>=', start)] if start else []
+    if end:
+        filters.append(('date', '<=', end))
+    for month, next_month, path in archived_months():
+        if (end and month > end) or (start and next_month <= start):
+            continue
+        table = pq.read_table(path, filters=filters or None)
+        table = table.select([
+            'id', 'employee_pk', 'employee_code', 'employee_name', 'department',
+            'date', 'check_in_time', 'check_out_time',
+        ])
+        columns = [column.cast(field.type) for column, field in zip(table.columns, ATTENDANCE_SCHEMA)]
+        table = pa.Table.from_arrays(_with_duration(columns), schema=ATTENDANCE_SCHEMA)
+        yield from table.to_batches()
+
+
+def attendance_batches(start=None, end=None, chunk_size=None):
+    """Yield attendance for dates in [start, end] (either may be None) as Arrow record batches.
+
+    Archived months come first, then the live table in (date, id) order.
+    """
+    chunk_size = chunk_size or getattr(settings, 'ATTENDANCE_EXPORT_CHUNK_SIZE', 2000)
+    watermark = archived_before()
+    if watermark and (start is None or start < watermark):
+        last_archived = watermark - timedelta(days=1)
+        yield from _archived_attendance(start, min(end, last_archived) if end else last_archived)
+
+    records = Attendance.objects.order_by('date', 'id')
+    if start:
+        records = records.filter(date__gte=start)
+    if end:
+        records = records.filter(date__lte=end)
+    if watermark:
+        records = records.filter(date__gte=watermark)
+    rows = records.values_list(
+        'id', 'employee_id', 'employee__employee_id', 'employee__name', 'employee__department',
+        'date', 'check_in_time', 'check_out_time',
+    ).iterator(chunk_size=chunk_size)
+    fields = list(ATTENDANCE_SCHEMA)[:-1]
+    for chunk in _chunks(rows, chunk_size):
+        columns = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), fields)]
+        yield pa.RecordBatch.from_arrays(_with_duration(columns), schema=ATTENDANCE_SCHEMA)
+
+
+def employee_batches(chunk_size=None):
+    """Yield every employee as Arrow record batches."""
+    chunk_size = chunk_size or getattr(settings, 'ATTENDANCE_EXPORT_CHUNK_SIZE', 2000)
+    rows = Employee.objects.order_by('id').values_list(*EMPLOYEE_SCHEMA.names).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(rows, chunk_size):
+        yield _batch(chunk, EMPLOYEE_SCHEMA)
+
+
+def write_batches(batches, schema, sink, file_format='parquet'):
+    """Write record batches to ``sink`` (a path or binary file object); returns the number of rows."""
+    rows = 0
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+    with writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def export_dataset(dataset, sink, file_format='parquet', start=None, end=None):
+    """Export 'attendance' (optionally for a date range) or 'employees'; returns the number of rows."""
+    if dataset == 'employees':
+        return write_batches(employee_batches(), EMPLOYEE_SCHEMA, sink, file_format)
+    return write_batches(attendance_batches(start, end), ATTENDANCE_SCHEMA, sink, file_format)
@@ -0,0 +1,98 @@
+"""Single-writer gate for attendance writes.
+
+Camera threads and request threads queue on the gate before opening a
+write transaction, instead of all polling SQLite's busy handler at once
+(which lets unlucky writers starve past the busy timeout under load).
+The gate is an in-process lock plus, on POSIX, an ``flock`` on a file
+next to the database so that several worker processes queue as well
+(in-memory and URI-named databases, such as the test database, get the
+in-process lock only).
+Readers never take the gate. With ``SQLITE_PRODUCTION_MODE`` off, or on
+other backends, ``serialized_write`` is a plain ``transaction.atomic``.
+
+``use_database_copy`` points this process at a scratch copy of the
+database, for load tests and replays that must not touch real records.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .metrics import DB_WRITE_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock is the only gate
+    fcntl = None
+
+_write_lock = threading.RLock()
+_gate_depth = threading.local()
+_lock_files = {}
+
+
+def _lock_file(connection):
+    """The open file to flock for this connection's database, or None if it has no file to lock beside."""
+    name = str(connection.settings_dict['NAME'])
+    # In-memory databases are private to the process; URI names are not paths
+    if connection.is_in_memory_db() or name.startswith('file:'):
+        return None
+    # flock belongs to the open file, so forked workers must not reuse their parent's handle
+    key = (os.getpid(), f"{name}.writelock")
+    if key not in _lock_files:
+        _lock_files[key] = open(key[1], 'a')
+    return _lock_files[key]
+
+
+@contextmanager
+def serialized_write(using=DEFAULT_DB_ALIAS):
+    """Run the block as one transaction, holding the writer gate on SQLite."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_PRODUCTION_MODE', False):
+        with DB_WRITE_SECONDS.labels('transaction').time(), transaction.atomic(using=using):
+            yield
+        return
+    waiting = time.perf_counter()
+    with _write_lock:
+        depth = getattr(_gate_depth, 'value', 0)
+        lock_file = _lock_file(connection) if fcntl and depth == 0 else None
+        if lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _gate_depth.value = depth + 1
+        started = time.perf_counter()
+        DB_WRITE_SECONDS.labels('wait').observe(started - waiting)
+        # The transaction takes the write lock as it begins (see app1/sqlite_backend)
+        begin_immediate, connection.begin_immediate = getattr(connection, 'begin_immediate', False), True
+        try:
+            with transaction.atomic(using=using):
+                yield
+            DB_WRITE_SECONDS.labels('transaction').observe(time.perf_counter() - started)
+        finally:
+            connection.begin_immediate = begin_immediate
+            _gate_depth.value = depth
+            if lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def use_database_copy(directory, using=DEFAULT_DB_ALIAS):
+    """Copy the SQLite database into ``directory`` and switch this process's connections to the copy.
+
+    Uses SQLite's backup API, so the copy is consistent even while other processes write.
+    Returns the path of the copy.
+    """
+    connection = connections[using]
+    path = os.path.join(directory, os.path.basename(str(connection.settings_dict['NAME'])))
+    connection.close()
+    source = sqlite3.connect(str(connection.settings_dict['NAME']))
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    # settings_dict is shared with connections opened later by other threads
+    connection.settings_dict['NAME'] = path
+    return path
@@ -0,0 +1,319 @@
+"""Edge-node mode: record attendance locally, sync it to the central server in batches.
+
+An edge node is this project run at a site with a poor uplink, with its
+own database and media directory and ``EDGE_CENTRAL_URL`` pointing at
+the central server. Its cameras and kiosk record attendance and the
+``AttendanceEvent`` audit log locally, exactly as on the central server,
+each check-in or check-out committed together with its audit row, so the
+audit rows not yet synced are a complete outbox. ``manage.py edge_sync``
+then
+
+* pulls the employee gallery (details and profile pictures, downloading
+  only pictures it does not have) from ``/edge/gallery/``, and
+* pushes the audit rows not yet synced, oldest first, as gzip-compressed
+  JSON batches to ``/edge/ingest/``, marking them synced once the central
+  server has stored them. A failed push is retried from the same rows.
+
+Each event carries its ``event_id``, which the central server keeps
+unique: a batch that is retried after a lost response, or overlaps an
+earlier one, is stored once. The central server merges a batch into
+``Attendance`` with set-based reads and bulk writes (earliest check-in,
+latest check-out per employee and day), then refreshes the summaries
+and rollups the bulk writes bypassed. Both endpoints require the shared
+``EDGE_SYNC_TOKEN``.
+"""
+import gzip
+import json
+import math
+import os
+import re
+import socket
+import uuid
+import zlib
+from datetime import date as date_type
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .db import serialized_write
+from .events import notify_streams
+from .models import Attendance, AttendanceEvent, Employee
+from .photos import generate_derivatives
+from .rollups import update_rollups
+from .storage import content_hash
+from .summaries import refresh_daily_summaries
+
+GALLERY_FIELDS = ('employee_id', 'name', 'email', 'phone_number', 'designation', 'department', 'site', 'is_active')
+STATUSES = {status for status, _ in AttendanceEvent.STATUS_CHOICES}
+HASHED_NAME = re.compile(r'[0-9a-f]{64}')
+
+
+class EdgeSyncError(Exception):
+    pass
+
+
+def node_id():
+    return getattr(settings, 'EDGE_NODE_ID', '') or socket.gethostname()
+
+
+def decompress_batch(body, encoding, max_bytes):
+    """The JSON payload of an ingest request, gunzipped if needed, refusing more than ``max_bytes``."""
+    if encoding == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = decompressor.decompress(body, max_bytes + 1)
+        if len(body) > max_bytes or decompressor.unconsumed_tail:
+            raise ValueError(f"Batch is larger than {max_bytes} bytes uncompressed.")
+    elif encoding not in ('', 'identity'):
+        raise ValueError(f"Unsupported Content-Encoding {encoding!r}.")
+    return json.loads(body)
+
+
+def parse_events(payload):
+    """Validate an ingest payload; returns (node, events) with times and dates parsed."""
+    node = str(payload.get('node') or '')[:100]
+    if not node:
+        raise ValueError("The batch has no node.")
+    events = []
+    for event in payload.get('events', []):
+        occurred_at = parse_datetime(event.get('occurred_at') or '')
+        if occurred_at is None or timezone.is_naive(occurred_at):
+            raise ValueError(f"Event {event.get('event_id')} has no valid occurred_at.")
+        if event.get('status') not in STATUSES:
+            raise ValueError(f"Event {event.get('event_id')} has an invalid status.")
+        distance = event.get('distance')
+        if distance is not None:
+            try:
+                distance = float(distance)
+            except (TypeError, ValueError):
+                distance = math.nan
+            if not math.isfinite(distance):
+                raise ValueError(f"Event {event.get('event_id')} has an invalid distance.")
+        events.append({
+            'event_id': uuid.UUID(str(event['event_id'])),
+            'employee_id': event.get('employee_id'),
+            'name': str(event.get('name', ''))[:100],
+            'status': event['status'],
+            'source': str(event.get('source', ''))[:100],
+            'distance': distance,
+            'occurred_at': occurred_at,
+            'date': date_type.fromisoformat(event['date']) if event.get('date') else timezone.localdate(occurred_at),
+        })
+    return node, events
+
+
+def merge_events(node, events):
+    """Store a batch of edge events and merge them into Attendance; returns counts for the response.
+
+    Events already stored (by ``event_id``) are skipped. Events for employees unknown here are kept
+    in the audit log without an employee and not merged.
+    """
+    with serialized_write():
+        with transaction.atomic():
+            keys = {event['event_id'] for event in events}
+            stored = set(AttendanceEvent.objects.filter(event_id__in=keys).values_list('event_id', flat=True))
+            new_events = []
+            for event in events:
+                if event['event_id'] not in stored:
+                    stored.add(event['event_id'])  # Also skips repeats within the batch
+                    new_events.append(event)
+            employees = {
+                employee_id: (pk, department)
+                for employee_id, pk, department in Employee.objects.filter(
+                    employee_id__in={event['employee_id'] for event in new_events}
+                ).values_list('employee_id', 'pk', 'department')
+            }
+            AttendanceEvent.objects.bulk_create([
+                AttendanceEvent(
+                    event_id=event['event_id'],
+                    employee_id=employees.get(event['employee_id'], (None,))[0],
+                    name=event['name'],
+                    status=event['status'],
+                    source=event['source'],
+                    node=node,
+                    distance=event['distance'],
+                    occurred_at=event['occurred_at'],
+                )
+                for event in new_events
+            ])
+
+            # Earliest check-in and latest check-out per employee and day
+            incoming = {}
+            for event in new_events:
+                if event['employee_id'] not in employees:
+                    continue
+                times = incoming.setdefault((employees[event['employee_id']][0], event['date']), [None, None])
+                if event['status'] == 'checked_in':
+                    times[0] = min(filter(None, (times[0], event['occurred_at'])))
+                else:
+                    times[1] = max(filter(None, (times[1], event['occurred_at'])))
+
+            existing = {
+                (attendance.employee_id, attendance.date): attendance
+                for attendance in Attendance.objects.filter(
+                    employee_id__in={pk for pk, _ in incoming}, date__in={day for _, day in incoming}
+                )
+            }
+            created, updated = [], []
+            for (pk, day), (check_in_time, check_out_time) in incoming.items():
+                attendance = existing.get((pk, day))
+                if attendance is None:
+                    created.append(Attendance(employee_id=pk, date=day, check_in_time=check_in_time, check_out_time=check_out_time))
+                    continue
+                merged_in = min(filter(None, (attendance.check_in_time, check_in_time)), default=None)
+                merged_out = max(filter(None, (attendance.check_out_time, check_out_time)), default=None)
+                if (merged_in, merged_out) != (attendance.check_in_time, attendance.check_out_time):
+                    attendance.check_in_time, attendance.check_out_time = merged_in, merged_out
+                    updated.append(attendance)
+            # Bulk writes skip Attendance.save(), which would stamp today's date, and the signals
+            Attendance.objects.bulk_create(created)
+            Attendance.objects.bulk_update(updated, ['check_in_time', 'check_out_time'])
+
+        departments = {pk: department for pk, department in employees.values()}
+        changed = [(attendance.employee_id, attendance.date) for attendance in created + updated]
+        for day in {day for _, day in changed}:
+            refresh_daily_summaries(day)
+        for pk, day in changed:
+            update_rollups(pk, departments[pk], day)
+    if new_events:
+        notify_streams()
+    return {
+        'received': len(events),
+        'stored': len(new_events),
+        'duplicates': len(events) - len(new_events),
+        'unknown_employees': sorted({str(event['employee_id']) for event in new_events if event['employee_id'] not in employees}),
+        'attendance_created': len(created),
+        'attendance_updated': len(updated),
+    }
+
+
+def picture_hash(picture):
+    """SHA-256 of a profile picture: its file name, unless it was stored before names were content hashes."""
+    stem = os.path.splitext(os.path.basename(picture.name))[0]
+    if HASHED_NAME.fullmatch(stem):
+        return stem
+    picture.open('rb')
+    try:
+        return content_hash(picture)
+    finally:
+        picture.close()
+
+
+def gallery_manifest():
+    """Every employee's gallery fields and profile picture (file name and content hash), for edge nodes."""
+    manifest = []
+    for employee in Employee.objects.order_by('employee_id'):
+        entry = {field: getattr(employee, field) for field in GALLERY_FIELDS}
+        entry['picture'] = entry['picture_hash'] = None
+        if employee.profile_picture:
+            try:
+                entry['picture_hash'] = picture_hash(employee.profile_picture)
+                entry['picture'] = os.path.basename(employee.profile_picture.name)
+            except FileNotFoundError:
+                pass  # Nothing to send
+        manifest.append(entry)
+    return manifest
+
+
+class CentralClient:
+    """HTTP client for the central server's edge endpoints, as configured by the EDGE_* settings."""
+
+    def __init__(self, url=None, token=None, timeout=30):
+        self.url = url or getattr(settings, 'EDGE_CENTRAL_URL', '')
+        if not self.url:
+            raise EdgeSyncError("EDGE_CENTRAL_URL is not set; this is not an edge node.")
+        import requests  # Only edge nodes make requests; keep it out of the central server's startup
+
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f"Bearer {token or getattr(settings, 'EDGE_SYNC_TOKEN', '')}"
+        self.timeout = timeout
+
+    def request(self, method, path, **kwargs):
+        import requests
+
+        try:
+            response = self.session.request(method, urljoin(self.url, path), timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise EdgeSyncError(f"Cannot reach {self.url}: {e}") from e
+        if response.status_code != 200:
+            raise EdgeSyncError(f"{method} {path} failed with HTTP {response.status_code}: {response.text[:200]}")
+        return response
+
+    def push_events(self, batch_size=500):
+        """Push unsynced audit rows in batches until none are left; returns the summed responses."""
+        node = node_id()
+        totals = {'batches': 0, 'received': 0, 'stored': 0, 'duplicates': 0, 'attendance_created': 0, 'attendance_updated': 0}
+        while True:
+            batch = list(
+                AttendanceEvent.objects.filter(node='', synced_at__isnull=True)
+                .select_related('employee').order_by('id')[:batch_size]
+            )
+            if not batch:
+                return totals
+            payload = {
+                'node': node,
+                'events': [
+                    {
+                        'event_id': event.event_id.hex,
+                        'employee_id': event.employee.employee_id if event.employee else None,
+                        'name': event.name,
+                        'status': event.status,
+                        'source': event.source,
+                        'distance': event.distance,
+                        'occurred_at': event.occurred_at.isoformat(),
+                        # The attendance day as this node recorded it
+                        'date': timezone.localdate(event.occurred_at).isoformat(),
+                    }
+                    for event in batch
+                ],
+            }
+            result = self.request(
+                'POST', reverse('edge_ingest'),
+                data=gzip.compress(json.dumps(payload).encode()),
+                headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+            ).json()
+            AttendanceEvent.objects.filter(pk__in=[event.pk for event in batch]).update(synced_at=timezone.now())
+            totals['batches'] += 1
+            for key in totals.keys() - {'batches'}:
+                totals[key] += result.get(key, 0)
+            for employee_id in result.get('unknown_employees', []):
+                print(f"Central server does not know employee {employee_id}; their events were logged but not merged")
+
+    def pull_gallery(self):
+        """Create or update local employees from the central gallery; returns (created, updated, deactivated)."""
+        manifest = self.request('GET', reverse('edge_gallery')).json()['employees']
+        local = {employee.employee_id: employee for employee in Employee.objects.all()}
+        created = updated = 0
+        for entry in manifest:
+            employee = local.pop(entry['employee_id'], None) or Employee(employee_id=entry['employee_id'])
+            # Stored here under its content hash, whatever the central server calls it
+            picture_name = (
+                f"employees/{entry['picture_hash']}{os.path.splitext(entry['picture'])[1].lower()}"
+                if entry['picture'] else None
+            )
+            changed = [field for field in GALLERY_FIELDS if getattr(employee, field) != entry[field]]
+            new_picture = picture_name != (employee.profile_picture.name or None)
+            if not changed and not new_picture:
+                continue
+            for field in changed:
+                setattr(employee, field, entry[field])
+            if new_picture and picture_name:
+                storage = employee.profile_picture.storage
+                if not storage.exists(picture_name):
+                    content = self.request('GET', reverse('edge_gallery_picture', args=[entry['picture']])).content
+                    picture_name = storage.save(picture_name, ContentFile(content))
+                employee.profile_picture.name = picture_name
+            elif new_picture:
+                employee.profile_picture = None
+            created += employee.pk is None
+            updated += employee.pk is not None
+            employee.save()
+            if new_picture and picture_name:
+                generate_derivatives(employee)
+        # Removed centrally: stop recognizing them here, but keep their attendance
+        deactivated = Employee.objects.filter(pk__in=[employee.pk for employee in local.values()], is_active=True).update(is_active=False)
+        return created, updated, deactivated
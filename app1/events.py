@@ -0,0 +1,111 @@
+"""In-process publish/subscribe for recognition events.
+
+The camera loop and the kiosk publish what they saw and recorded and
+move on; subscribers (see ``app1/subscribers.py``) play the recognition
+sound and wake live dashboards. ``publish`` only puts the event on a
+bounded queue, so a slow subscriber never stalls inference: one
+dispatcher thread per process delivers events to the subscribers in
+order, and events that arrive while the queue is full are dropped and
+counted in ``loknetra_events_dropped_total``. Delivery is best effort,
+so nothing that must survive (attendance, its audit row) is written by a
+subscriber.
+
+Events are dicts with a ``type``, a unique ``id`` and the time ``at``,
+plus the fields of that type:
+
+* ``face.recognized`` -- ``source`` (camera name), ``name``,
+  ``employee``, ``distance``; published at most once per cooldown.
+* ``attendance`` -- ``source`` (camera name or 'kiosk'), ``name``,
+  ``employee``, ``status`` ('checked_in', 'checked_out',
+  'already_checked_in' or 'already_checked_out') and, for camera
+  events, ``cause``: the id of the ``face.recognized`` event.
+"""
+import queue
+import threading
+import uuid
+
+from django.conf import settings
+from django.utils.timezone import now
+from prometheus_client import Counter
+
+EVENTS_DROPPED = Counter(
+    'loknetra_events_dropped_total',
+    'Recognition events dropped because the subscriber queue was full.',
+    ['type'],
+)
+
+
+class EventBus:
+    def __init__(self, max_queued=1000):
+        self._subscribers = []
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._dispatcher = None
+
+    def subscribe(self, *types):
+        """Decorator delivering events of ``types`` (all events if none) to the function."""
+        def register(callback):
+            with self._lock:
+                self._subscribers = self._subscribers + [(callback, frozenset(types))]
+            return callback
+        return register
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[0] is not callback]
+
+    def publish(self, type, **fields):
+        """Queue an event for the subscribers and return it; never blocks."""
+        event = {'type': type, 'id': uuid.uuid4().hex, 'at': fields.pop('at', None) or now(), **fields}
+        self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            EVENTS_DROPPED.labels(type).inc()
+        return event
+
+    def flush(self):
+        """Wait until every queued event, and any event its subscribers published, has been delivered."""
+        self._queue.join()
+
+    def _start(self):
+        if self._dispatcher is None:
+            with self._lock:
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._run, name='event-dispatcher', daemon=True)
+                    self._dispatcher.start()
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                for callback, types in self._subscribers:
+                    if types and event['type'] not in types:
+                        continue
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print(f"Error in {callback.__name__} handling {event['type']} event: {e}")
+            finally:
+                self._queue.task_done()
+
+
+bus = EventBus(getattr(settings, 'EVENT_QUEUE_SIZE', 1000))
+publish = bus.publish
+subscribe = bus.subscribe
+unsubscribe = bus.unsubscribe
+flush = bus.flush
+
+_delivered = threading.Condition()
+
+
+def notify_streams():
+    """Wake every event stream in this process waiting in wait_for_events()."""
+    with _delivered:
+        _delivered.notify_all()
+
+
+def wait_for_events(timeout):
+    """Block until notify_streams() is called or ``timeout`` seconds pass."""
+    with _delivered:
+        _delivered.wait(timeout)
@@ -0,0 +1,84 @@
+"""Cheap pre-embedding quality checks for MTCNN face detections.
+
+Each detected box goes through the stages in order of cost: detection
+probability, box size, landmark-based pose and Laplacian-variance
+sharpness. The first failing stage rejects the face before it reaches
+the ResNet, and the rejection is counted per source (camera name or
+``kiosk``) so operators can see why faces are being dropped.
+"""
+import threading
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+
+STAGES = ('probability', 'size', 'pose', 'sharpness')
+
+DEFAULT_THRESHOLDS = {
+    'min_detection_prob': 0.90,  # MTCNN confidence
+    'min_face_size': 60,  # Shorter side of the box in pixels
+    'max_yaw': 0.35,  # Nose offset from the eye midpoint, in eye distances
+    'min_sharpness': 20.0,  # Variance of the Laplacian on a 160x160 grayscale crop
+}
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def default_thresholds():
+    """Thresholds used when no camera configuration applies (e.g. the web kiosk)."""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    thresholds.update(getattr(settings, 'FACE_QUALITY_THRESHOLDS', {}))
+    return thresholds
+
+
+def estimate_yaw(landmarks):
+    """Estimate head yaw from MTCNN's five landmarks (eyes, nose, mouth corners).
+
+    Returns the horizontal offset of the nose from the eye midpoint divided by
+    the eye distance: about 0 for a frontal face, growing towards profile.
+    """
+    left_eye, right_eye, nose = landmarks[0], landmarks[1], landmarks[2]
+    eye_distance = float(np.linalg.norm(right_eye - left_eye))
+    if eye_distance < 1e-6:
+        return float('inf')
+    eye_mid_x = (left_eye[0] + right_eye[0]) / 2.0
+    return abs(float(nose[0] - eye_mid_x)) / eye_distance
+
+
+def laplacian_sharpness(face):
+    """Variance of the Laplacian of an RGB face crop, normalised to 160x160."""
+    import cv2
+
+    gray = cv2.cvtColor(cv2.resize(face, (160, 160)), cv2.COLOR_RGB2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def check_face(face, box, prob, landmarks, thresholds):
+    """Return the name of the first failing stage, or None if the face passes."""
+    if prob is not None and prob < thresholds['min_detection_prob']:
+        return 'probability'
+    x1, y1, x2, y2 = box
+    if min(x2 - x1, y2 - y1) < thresholds['min_face_size']:
+        return 'size'
+    if landmarks is not None and estimate_yaw(landmarks) > thresholds['max_yaw']:
+        return 'pose'
+    if laplacian_sharpness(face) < thresholds['min_sharpness']:
+        return 'sharpness'
+    return None
+
+
+def record(source, outcome):
+    """Count a face outcome ('detected', 'accepted' or a rejecting stage) for a source."""
+    with _counters_lock:
+        _counters[(source, outcome)] += 1
+
+
+def get_counters():
+    """Return ``{source: {outcome: count}}`` for every source seen by this process."""
+    with _counters_lock:
+        items = list(_counters.items())
+    counters = {}
+    for (source, outcome), count in items:
+        counters.setdefault(source, {})[outcome] = count
+    return counters
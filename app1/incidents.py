@@ -0,0 +1,109 @@
+"""Safety incident detection, done in the database.
+
+``refresh_safety_incidents`` reconciles the ``SafetyIncident`` table for a day
+against the attendance data:
+
+* absent -- active employees with no attendance row at all (an anti-join),
+  only flagged once ``SAFETY_ABSENT_AFTER`` has passed;
+* missing check-in -- attendance rows without a check-in time;
+* missing check-out -- check-ins older than ``SAFETY_MISSING_CHECKOUT_HOURS``
+  without a check-out, found with a range filter on the
+  (date, check_in_time) prefix of ``attendance_list_seek_idx``.
+
+Only new incidents are fetched and inserted and resolved ones are deleted,
+so a refresh touches the changes rather than the whole headcount.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .db import serialized_write
+from .models import Attendance, Employee, SafetyIncident
+
+
+def _cache():
+    # Shared by every worker process, so the refresh below happens once per interval, not once per worker
+    return caches['shared' if 'shared' in settings.CACHES else 'default']
+
+
+def _absent_after(date):
+    hour, minute = map(int, getattr(settings, 'SAFETY_ABSENT_AFTER', '10:00').split(':'))
+    return timezone.make_aware(datetime.combine(date, time(hour, minute)))
+
+
+def refresh_safety_incidents(date=None, current_time=None):
+    """Bring the day's SafetyIncident rows in line with attendance; returns (added, resolved)."""
+    current_time = current_time or timezone.now()
+    date = date or timezone.localdate(current_time)
+    checkout_cutoff = current_time - timedelta(hours=getattr(settings, 'SAFETY_MISSING_CHECKOUT_HOURS', 8))
+
+    todays_attendance = Attendance.objects.filter(employee=OuterRef('employee_id'), date=date)
+    incidents = SafetyIncident.objects.filter(date=date)
+
+    def not_recorded(kind):
+        return ~Exists(SafetyIncident.objects.filter(employee=OuterRef('employee_id'), date=date, kind=kind))
+
+    with serialized_write():
+        # Resolve incidents that no longer hold
+        resolved = incidents.filter(kind=SafetyIncident.ABSENT).filter(
+            Exists(todays_attendance) | Exists(Employee.objects.filter(pk=OuterRef('employee_id'), is_active=False))
+        ).delete()[0]
+        resolved += incidents.filter(kind=SafetyIncident.MISSING_CHECK_IN).exclude(
+            Exists(todays_attendance.filter(check_in_time__isnull=True))
+        ).delete()[0]
+        resolved += incidents.filter(kind=SafetyIncident.MISSING_CHECK_OUT).exclude(
+            Exists(todays_attendance.filter(check_in_time__lt=checkout_cutoff, check_out_time__isnull=True))
+        ).delete()[0]
+
+        # Detect new incidents
+        new_incidents = []
+        if current_time >= _absent_after(date):
+            absent_ids = (
+                Employee.objects.filter(is_active=True)
+                .filter(~Exists(Attendance.objects.filter(employee=OuterRef('pk'), date=date)))
+                .filter(~Exists(SafetyIncident.objects.filter(employee=OuterRef('pk'), date=date, kind=SafetyIncident.ABSENT)))
+                .values_list('pk', flat=True)
+            )
+            new_incidents += [
+                SafetyIncident(employee_id=pk, date=date, kind=SafetyIncident.ABSENT) for pk in absent_ids.iterator()
+            ]
+        new_incidents += [
+            SafetyIncident(employee_id=employee_id, date=date, kind=SafetyIncident.MISSING_CHECK_IN)
+            for employee_id in Attendance.objects.filter(date=date, check_in_time__isnull=True)
+            .filter(not_recorded(SafetyIncident.MISSING_CHECK_IN))
+            .values_list('employee_id', flat=True)
+            .iterator()
+        ]
+        new_incidents += [
+            SafetyIncident(employee_id=employee_id, date=date, kind=SafetyIncident.MISSING_CHECK_OUT, since=check_in_time)
+            for employee_id, check_in_time in Attendance.objects.filter(
+                date=date, check_in_time__lt=checkout_cutoff, check_out_time__isnull=True
+            )
+            .filter(not_recorded(SafetyIncident.MISSING_CHECK_OUT))
+            .values_list('employee_id', 'check_in_time')
+            .iterator()
+        ]
+        SafetyIncident.objects.bulk_create(new_incidents, batch_size=1000, ignore_conflicts=True)
+
+    _cache().set(f'safety_incidents_refreshed:{date.isoformat()}', current_time.timestamp(), None)
+    return len(new_incidents), resolved
+
+
+def refresh_if_stale(date):
+    """Refresh the day's incidents if the last refresh is older than SAFETY_REFRESH_INTERVAL."""
+    interval = getattr(settings, 'SAFETY_REFRESH_INTERVAL', 60)
+    shared = _cache()
+    last_refresh = shared.get(f'safety_incidents_refreshed:{date.isoformat()}')
+    if last_refresh is not None and timezone.now().timestamp() - last_refresh < interval:
+        return
+    # Only one request, in any worker, refreshes at a time; the others read the current table.
+    # The file-based cache's add is check-then-write, so two workers racing within milliseconds
+    # can both refresh; a refresh only reconciles, so that costs time, not correctness.
+    if shared.add(f'safety_incidents_refreshing:{date.isoformat()}', True, interval):
+        try:
+            refresh_safety_incidents(date)
+        finally:
+            shared.delete(f'safety_incidents_refreshing:{date.isoformat()}')
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.archive import archive_attendance, archive_dir, archive_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Move attendance records older than ATTENDANCE_HOT_DAYS out of the live table into "
+        "month-partitioned Parquet files; the attendance list and exports keep reading them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Archive records dated before this day (YYYY-MM-DD) instead of the horizon.")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Rows deleted from the live table per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be archived without changing anything.")
+
+    def handle(self, *args, **options):
+        before = archive_horizon()
+        if options['before']:
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--before must be a date in YYYY-MM-DD format.")
+
+        archived = archive_attendance(before, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        if not archived:
+            self.stdout.write(f"No attendance records before {before} to archive.")
+            return
+        for month, rows in sorted(archived.items()):
+            self.stdout.write(f"{month}: {rows} records")
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {sum(archived.values())} records dated before {before} to {archive_dir()}."
+        ))
@@ -0,0 +1,188 @@
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+import psutil
+import torch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+EMBEDDING_SIZE = 512
+
+
+def summarize(latencies, items_per_call=1):
+    """Count, mean/p50/p99 latency in ms and items per second for a list of per-call seconds."""
+    latencies = np.asarray(latencies)
+    total = float(latencies.sum())
+    return {
+        'calls': int(latencies.size),
+        'mean_ms': round(float(latencies.mean()) * 1000, 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'throughput_per_s': round(latencies.size * items_per_call / total, 2) if total else None,
+    }
+
+
+def timed(function, repeat):
+    """Call ``function`` ``repeat`` times; return per-call seconds and the peak Python-heap MB.
+
+    tracemalloc sees numpy buffers but not torch's allocator; the process-wide peak RSS is
+    reported separately in the run metadata.
+    """
+    latencies = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            latencies.append(time.perf_counter() - started)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return latencies, round(peak / 2**20, 1)
+
+
+def synthetic_gallery(size, seed=0, chunk=100_000):
+    """L2-normalised random float32 embeddings, like InceptionResnetV1's output."""
+    rng = np.random.default_rng(seed)
+    gallery = np.empty((size, EMBEDDING_SIZE), dtype=np.float32)
+    for start in range(0, size, chunk):
+        block = rng.standard_normal((min(chunk, size - start), EMBEDDING_SIZE), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        gallery[start:start + len(block)] = block
+    return gallery
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark detect_and_encode, batched embedding and gallery matching (real images from "
+        "media/employees plus synthetic galleries) and print the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', default=os.path.join(settings.MEDIA_ROOT, 'employees'), help="Directory of face images.")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed calls per measurement.")
+        parser.add_argument('--batch-sizes', default='1,4,8,16,32', help="Comma-separated embedding batch sizes.")
+        parser.add_argument('--gallery-sizes', default='1000,10000,100000,1000000', help="Comma-separated synthetic gallery sizes.")
+        parser.add_argument('--probes', default='1,8', help="Comma-separated numbers of faces matched per call.")
+        parser.add_argument(
+            '--memory-fraction', type=float, default=0.6,
+            help="Skip gallery sizes whose estimated matching memory exceeds this fraction of available RAM.",
+        )
+        parser.add_argument('--output', help="Write the JSON here instead of stdout.")
+
+    def handle(self, *args, **options):
+        def int_list(value):
+            try:
+                return [int(item) for item in value.split(',') if item]
+            except ValueError:
+                raise CommandError(f"Expected comma-separated integers, got {value!r}.")
+
+        repeat = max(1, options['repeat'])
+        images = self.load_images(options['images'])
+        if not images:
+            raise CommandError(f"No readable images in {options['images']}.")
+
+        from app1.views.recognition import detect_and_encode, detect_faces, embed_faces, match_encodings, squared_norms
+
+        # Warm up once so model initialisation is not timed
+        detect_and_encode(images[0])
+
+        results = {'meta': self.metadata(len(images), repeat)}
+
+        image_cycle = itertools.cycle(images)
+        latencies, peak_mb = timed(lambda: detect_and_encode(next(image_cycle)), max(repeat, len(images)))
+        results['detect_and_encode'] = dict(summarize(latencies), peak_traced_mb=peak_mb)
+
+        faces = [face for image in images for _, face in detect_faces(image)]
+        if not faces:
+            self.stderr.write("No faces detected in the images; embedding random 160x160 crops instead.")
+            faces = [cv2.resize(image, (160, 160)) for image in images]
+        results['embed'] = []
+        for batch_size in int_list(options['batch_sizes']):
+            batch = [faces[i % len(faces)] for i in range(batch_size)]
+            batch_latencies, peak_mb = timed(lambda: embed_faces(batch), repeat)
+            results['embed'].append(dict(summarize(batch_latencies, batch_size), batch_size=batch_size, peak_traced_mb=peak_mb))
+
+        available = psutil.virtual_memory().available
+        results['match'] = []
+        probe_counts = int_list(options['probes'])
+        for gallery_size in int_list(options['gallery_sizes']):
+            # The gallery, its transposed copy in the matrix product and the (probes x gallery) distances
+            needed = gallery_size * 4 * (2 * EMBEDDING_SIZE + 2 * max(probe_counts))
+            if needed > available * options['memory_fraction']:
+                results['match'].append({
+                    'gallery_size': gallery_size,
+                    'skipped': f"needs about {needed / 2**30:.1f} GiB, {available / 2**30:.1f} GiB available",
+                })
+                continue
+            gallery = synthetic_gallery(gallery_size)
+            # Computed once, as get_cached_face_data does when it builds a gallery
+            norms = squared_norms(gallery)
+            for probes in probe_counts:
+                # Probes close to known faces, so every call does the full argmin-and-threshold work
+                tests = gallery[np.arange(probes) % gallery_size] + 0.01
+                match_latencies, peak_mb = timed(lambda: match_encodings(gallery, tests, 0.6, norms), repeat)
+                results['match'].append(dict(
+                    summarize(match_latencies, probes), gallery_size=gallery_size, probes=probes, peak_traced_mb=peak_mb,
+                ))
+            del gallery, norms
+
+        results['meta']['peak_rss_mb'] = self.peak_rss_mb()
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def load_images(self, directory):
+        images = []
+        if not os.path.isdir(directory):
+            return images
+        for filename in sorted(os.listdir(directory)):
+            image = cv2.imread(os.path.join(directory, filename))
+            if image is not None:
+                images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        return images
+
+    def metadata(self, image_count, repeat):
+        return {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch': torch.__version__,
+            'torch_threads': torch.get_num_threads(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'images': image_count,
+            'repeat': repeat,
+        }
+
+    def peak_rss_mb(self):
+        try:
+            import resource
+        except ImportError:  # Windows
+            return round(psutil.Process().memory_info().peak_wset / 2**20, 1)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
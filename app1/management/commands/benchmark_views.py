@@ -0,0 +1,148 @@
+import json
+import re
+import statistics
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app1.models import Attendance, Employee
+from app1.views.reporting import encode_attendance_cursor
+
+# String and number literals, then IN (...) lists of any length, so repeated queries compare equal
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'\(\?(?:, \?)*\)')
+
+
+def query_shape(sql):
+    return IN_LISTS.sub('(?...)', LITERALS.sub('?', sql))
+
+
+def analyze_queries(queries, repeat_threshold, slow_ms):
+    """Flag query shapes run ``repeat_threshold`` or more times in one request (likely N+1) and slow queries."""
+    shapes = Counter(query_shape(query['sql']) for query in queries)
+    repeated = [
+        {'count': count, 'sql': shape[:300]}
+        for shape, count in shapes.most_common() if count >= repeat_threshold
+    ]
+    slow = [
+        {'ms': round(float(query['time']) * 1000, 1), 'sql': query['sql'][:300]}
+        for query in queries if float(query['time']) * 1000 >= slow_ms
+    ]
+    return repeated, sorted(slow, key=lambda query: -query['ms'])
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the database-heavy views (attendance list, dashboard, safety, employee list, admin) and "
+        "count their queries, flagging repeated query shapes (N+1) and slow queries. Run it after "
+        "generate_scale_fixtures to see how the views behave at realistic sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="Superuser to render the pages as (default: the first one).")
+        parser.add_argument('--repeat', type=int, default=5, help="Requests per view; the first is reported separately as cold.")
+        parser.add_argument('--n-plus-one', type=int, default=10, metavar='N', help="Flag a query shape run N or more times in one request.")
+        parser.add_argument('--slow-ms', type=float, default=100, help="Flag single queries slower than this.")
+        parser.add_argument('--output', help="Also write the results as JSON here.")
+        parser.add_argument('--strict', action='store_true', help="Exit with an error if anything was flagged.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_superuser=True, is_active=True)
+        user = (users.filter(username=options['username']) if options['username'] else users.order_by('pk')).first()
+        if user is None:
+            raise CommandError("No matching superuser; create one with createsuperuser or pass --username.")
+        client = Client()
+        client.force_login(user)
+
+        results = []
+        for name, url in self.pages():
+            results.append(self.measure(client, name, url, max(1, options['repeat']), options['n_plus_one'], options['slow_ms']))
+
+        self.stdout.write(
+            f"{Employee.objects.count()} employees, {Attendance.objects.count()} attendance records\n"
+            f"{'view':<34} {'status':>6} {'queries':>7} {'cold ms':>8} {'median ms':>9}  flags"
+        )
+        flagged = False
+        for result in results:
+            flags = [f"N+1 x{query['count']}" for query in result['repeated_queries']]
+            flags += [f"slow {query['ms']} ms" for query in result['slow_queries']]
+            flagged = flagged or bool(flags) or result['status'] >= 400
+            line = (
+                f"{result['view']:<34} {result['status']:>6} {result['queries']:>7} "
+                f"{result['cold_ms']:>8} {result['median_ms']:>9}  {', '.join(flags)}"
+            )
+            self.stdout.write(self.style.WARNING(line) if flags else line)
+            for query in result['repeated_queries'] + result['slow_queries']:
+                self.stdout.write(f"    {query['sql'][:160]}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if options['strict'] and flagged:
+            raise CommandError("Some views have N+1 patterns, slow queries or errors.")
+
+    def pages(self):
+        """(name, URL) for each page to measure, with real IDs and search terms from the data."""
+        pages = [
+            ('dashboard', reverse('dashboard')),
+            ('safety', reverse('safety')),
+            ('employee_list', reverse('employee_list')),
+            ('emp_attendance_list', reverse('emp_attendance_list')),
+        ]
+        ordered = Attendance.objects.order_by('-date', F('check_in_time').desc(nulls_last=True), 'id')
+        page_end = ordered[49:50].first()
+        if page_end:
+            pages.append(('emp_attendance_list page 2', f"{reverse('emp_attendance_list')}?after={encode_attendance_cursor(page_end)}"))
+            pages.append(('emp_attendance_list by date', f"{reverse('emp_attendance_list')}?attendance_date={page_end.date}"))
+        employee = Employee.objects.order_by('pk').first()
+        if employee:
+            search = employee.name.split()[0]
+            pages += [
+                ('employee_list search', f"{reverse('employee_list')}?search={search}"),
+                ('emp_attendance_list search', f"{reverse('emp_attendance_list')}?search={search}"),
+                ('emp_detail', reverse('emp_detail', args=[employee.pk])),
+                ('admin employee search', f"{reverse('admin:app1_employee_changelist')}?q={search}"),
+                ('admin attendance search', f"{reverse('admin:app1_attendance_changelist')}?q={search}"),
+            ]
+        pages += [
+            ('admin employee list', reverse('admin:app1_employee_changelist')),
+            ('admin attendance list', reverse('admin:app1_attendance_changelist')),
+            ('admin attendance add', reverse('admin:app1_attendance_add')),
+        ]
+        return pages
+
+    def measure(self, client, name, url, repeat, repeat_threshold, slow_ms):
+        # Start cold: the dashboard and safety pages cache their work, and the safety page's
+        # incident refresh is throttled by a marker in the shared cache (see app1/incidents.py)
+        for alias in {'default', 'shared'} & set(settings.CACHES):
+            caches[alias].clear()
+        timings, queries, status = [], [], None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            status = response.status_code
+            if len(captured.captured_queries) > len(queries):
+                queries = captured.captured_queries
+        repeated, slow = analyze_queries(queries, repeat_threshold, slow_ms)
+        return {
+            'view': name,
+            'url': url,
+            'status': status,
+            'queries': len(queries),
+            'cold_ms': round(timings[0], 1),
+            'median_ms': round(statistics.median(timings[1:] or timings), 1),
+            'repeated_queries': repeated,
+            'slow_queries': slow,
+        }
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HEAVY_MODULES = 'torch,facenet_pytorch,cv2,pygame,openpyxl,pyarrow,pandas'
+
+# What a web worker imports to serve the login page or the admin
+STARTUP_SCRIPT = '''
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+'''
+
+
+def parse_importtime(output):
+    """(module, self us, cumulative us, depth) per line of ``python -X importtime`` output, in print order.
+
+    A module is printed after everything it imports, one level deeper than itself.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name[1:]
+        entries.append((name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2))
+    return entries
+
+
+def import_chain(entries, index):
+    """Module names from the top-level import down to ``entries[index]``."""
+    chain = [entries[index][0]]
+    depth = entries[index][3]
+    for name, _, _, entry_depth in entries[index + 1:]:
+        if entry_depth < depth:
+            chain.append(name)
+            depth = entry_depth
+    return list(reversed(chain))
+
+
+class Command(BaseCommand):
+    help = (
+        "Import Django, the URLconf and the admin in a fresh interpreter under `python -X importtime` "
+        "and fail if any heavy module (torch, OpenCV, ...) is imported or the imports take longer than "
+        "the budget. Prints the slowest imports and how each heavy module was reached."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forbid', default=HEAVY_MODULES, help="Comma-separated top-level packages that must not be imported.")
+        parser.add_argument('--modules', default='', help="Comma-separated extra modules to import as well, e.g. app1.views.recognition.")
+        parser.add_argument('--budget-ms', type=float, default=1000, help="Maximum total import time.")
+        parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to list.")
+
+    def handle(self, *args, **options):
+        forbidden = {name for name in options['forbid'].split(',') if name}
+        script = STARTUP_SCRIPT + ''.join(
+            f'import {module}\n' for module in options['modules'].split(',') if module
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing the project failed:\n{result.stderr[-3000:]}")
+
+        entries = parse_importtime(result.stderr)
+        total_ms = sum(self_us for _, self_us, _, _ in entries) / 1000
+        self.stdout.write(f"{len(entries)} modules imported in {total_ms:.0f} ms (budget {options['budget_ms']:.0f} ms)")
+        self.stdout.write(f"{'cumulative ms':>13} {'self ms':>8}  module")
+        for name, self_us, cumulative_us, _ in sorted(entries, key=lambda entry: -entry[2])[:options['top']]:
+            self.stdout.write(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>8.1f}  {name}")
+
+        problems = []
+        for index, (name, _, cumulative_us, _) in enumerate(entries):
+            if name in forbidden:
+                problems.append(f"{name} ({cumulative_us / 1000:.0f} ms) via {' -> '.join(import_chain(entries, index))}")
+        for problem in problems:
+            self.stderr.write(f"Heavy import: {problem}")
+        if total_ms > options['budget_ms']:
+            problems.append(f"imports took {total_ms:.0f} ms")
+        if problems:
+            raise CommandError(f"Import budget exceeded: {'; '.join(problems)}.")
+        self.stdout.write(self.style.SUCCESS("Within the import budget, no heavy modules imported."))
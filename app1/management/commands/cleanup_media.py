@@ -0,0 +1,73 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from app1.models import Employee
+
+IMAGE_FIELDS = ('profile_picture', 'profile_thumbnail', 'profile_thumbnail_webp')
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Find employee media files that no Employee references (e.g. old collision copies such as "
+        "001_HZjFPA4.jpg) and report the space they take; --delete removes them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help="Delete the orphaned files (default: report only).")
+        parser.add_argument(
+            '--rehash', action='store_true',
+            help="First move profile pictures stored under their upload name to content-addressed names, "
+                 "so identical pictures share one file.",
+        )
+
+    def handle(self, *args, **options):
+        storage = Employee._meta.get_field('profile_picture').storage
+        if options['rehash']:
+            self.rehash(storage)
+
+        referenced = set()
+        for names in Employee.objects.values_list(*IMAGE_FIELDS).iterator():
+            referenced.update(name for name in names if name)
+
+        root = storage.path('employees')
+        orphans, reclaimed = [], 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace('\\', '/')
+                if name not in referenced:
+                    orphans.append(path)
+                    reclaimed += os.path.getsize(path)
+
+        for path in orphans:
+            self.stdout.write(f"{'Deleting' if options['delete'] else 'Orphaned'}: {path}")
+            if options['delete']:
+                os.remove(path)
+
+        verb = "Reclaimed" if options['delete'] else "Would reclaim"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(orphans)} orphaned files under {root}. {verb} {format_size(reclaimed)}."
+        ))
+
+    def rehash(self, storage):
+        moved = 0
+        for employee in Employee.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True).iterator():
+            old_name = employee.profile_picture.name
+            if not storage.exists(old_name):
+                continue
+            with storage.open(old_name) as content:
+                new_name = storage.save(old_name, content)
+            if new_name != old_name:
+                # Queryset update: no save signals, the picture itself is unchanged
+                Employee.objects.filter(pk=employee.pk).update(profile_picture=new_name)
+                moved += 1
+        self.stdout.write(f"Moved {moved} profile pictures to content-addressed names.")
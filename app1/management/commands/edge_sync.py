@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.edge import CentralClient, EdgeSyncError, node_id
+
+
+class Command(BaseCommand):
+    help = (
+        "On an edge node: push the attendance events not yet synced to the central server "
+        "(EDGE_CENTRAL_URL) in gzip batches, and pull the employee gallery with --gallery. With "
+        "--loop, keep syncing and back off while the central server is unreachable. Camera "
+        "processes pick up a pulled gallery when their face cache expires."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gallery', action='store_true', help="Also pull employees and profile pictures before pushing.")
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'EDGE_SYNC_BATCH_SIZE', 500), help="Events per batch.")
+        parser.add_argument('--timeout', type=float, default=30, help="Seconds to wait for each request.")
+        parser.add_argument('--loop', type=int, metavar='SECONDS', help="Keep syncing every SECONDS instead of running once.")
+        parser.add_argument('--max-backoff', type=int, default=600, help="Longest wait between attempts while the central server is unreachable.")
+
+    def handle(self, *args, **options):
+        try:
+            client = CentralClient(timeout=options['timeout'])
+        except EdgeSyncError as e:
+            raise CommandError(str(e))
+
+        failures = 0
+        while True:
+            try:
+                if options['gallery']:
+                    created, updated, deactivated = client.pull_gallery()
+                    self.stdout.write(f"Gallery pulled: {created} new, {updated} updated, {deactivated} deactivated.")
+                totals = client.push_events(options['batch_size'])
+                if totals['batches'] or not options['loop']:
+                    self.stdout.write(
+                        f"Node {node_id()}: pushed {totals['received']} events in {totals['batches']} batches "
+                        f"({totals['stored']} new, {totals['duplicates']} already on the central server); "
+                        f"attendance {totals['attendance_created']} created, {totals['attendance_updated']} updated."
+                    )
+                failures = 0
+            except EdgeSyncError as e:
+                if not options['loop']:
+                    raise CommandError(str(e))
+                failures += 1
+                self.stderr.write(f"Sync failed ({failures} in a row), will retry: {e}")
+            if not options['loop']:
+                break
+            # Unsynced events stay in the outbox, so waiting longer only delays them
+            time.sleep(min(options['loop'] * 2 ** failures, max(options['loop'], options['max_backoff'])))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from app1.models import Employee
+from app1.photos import generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate profile photo thumbnails (JPEG and WebP) for employees that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate thumbnails for every employee with a photo.")
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.exclude(Q(profile_picture='') | Q(profile_picture__isnull=True))
+        if not options['force']:
+            employees = employees.filter(Q(profile_thumbnail='') | Q(profile_thumbnail__isnull=True))
+        generated = failed = 0
+        for employee in employees.order_by('pk').iterator():
+            try:
+                generate_derivatives(employee)
+                generated += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{employee.employee_id}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Generated thumbnails for {generated} employees ({failed} failed)."))
@@ -0,0 +1,139 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from app1.incidents import refresh_safety_incidents
+from app1.models import Attendance, Employee
+from app1.rollups import rebuild_rollups
+from app1.summaries import refresh_daily_summaries
+
+PREFIX = 'FX-'
+
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Amit', 'Ananya', 'Arjun', 'Deepa', 'Farhan', 'Gita', 'Harsh', 'Isha', 'Kabir', 'Kavya',
+    'Manoj', 'Meera', 'Naveen', 'Neha', 'Pooja', 'Rahul', 'Ravi', 'Riya', 'Sanjay', 'Shreya', 'Sunil', 'Tanvi',
+    'Varun', 'Vidya', 'Yash', 'Zoya',
+)
+LAST_NAMES = (
+    'Agarwal', 'Bose', 'Chopra', 'Das', 'Desai', 'Gupta', 'Iyer', 'Jain', 'Joshi', 'Kapoor', 'Khan', 'Kumar',
+    'Mehta', 'Menon', 'Nair', 'Patel', 'Rao', 'Reddy', 'Shah', 'Sharma', 'Singh', 'Verma',
+)
+DEPARTMENTS = (
+    'Assembly', 'Dispatch', 'Electrical', 'Finance', 'HR', 'IT', 'Logistics', 'Maintenance', 'Procurement',
+    'Production', 'Quality', 'Safety', 'Security', 'Stores', 'Tooling', 'Welding',
+)
+DESIGNATIONS = ('Operator', 'Technician', 'Supervisor', 'Engineer', 'Manager', 'Executive', 'Helper')
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate N fixture employees (IDs starting with FX-) and M days of weekday attendance with "
+        "bulk_create, then rebuild the summaries, rollups and today's safety incidents. Writes to the "
+        "configured database; point LOKNETRA_DB_PATH at a copy to keep real data out of it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=90, help="Days of history up to and including today.")
+        parser.add_argument('--departments', type=int, default=8, help=f"At most {len(DEPARTMENTS)}.")
+        parser.add_argument('--attendance-rate', type=float, default=0.92, help="Chance an employee comes in on a weekday.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help="Delete previously generated fixture employees first.")
+
+    def handle(self, *args, **options):
+        if not 1 <= options['departments'] <= len(DEPARTMENTS):
+            raise CommandError(f"--departments must be between 1 and {len(DEPARTMENTS)}.")
+        if options['clear']:
+            deleted = Employee.objects.filter(employee_id__startswith=PREFIX).delete()[1]
+            self.stdout.write(f"Deleted {deleted.get('app1.Employee', 0)} fixture employees and their records.")
+        elif Employee.objects.filter(employee_id__startswith=PREFIX).exists():
+            raise CommandError("Fixture employees already exist; pass --clear to replace them.")
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        departments = DEPARTMENTS[:options['departments']]
+        employees = []
+        for i in range(options['employees']):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            employees.append(Employee(
+                employee_id=f'{PREFIX}{i:06d}',
+                name=f'{first} {last}',
+                email=f'{first}.{last}.{i}@example.com'.lower(),
+                phone_number=f'9{rng.randrange(10**9):09d}',
+                designation=rng.choice(DESIGNATIONS),
+                # A few large departments and a long tail, like a real plant
+                department=departments[min(int(rng.expovariate(0.5)), len(departments) - 1)],
+                is_active=rng.random() > 0.03,
+            ))
+        with transaction.atomic():
+            Employee.objects.bulk_create(employees, batch_size=batch_size)
+        employee_pks = list(
+            Employee.objects.filter(employee_id__startswith=PREFIX, is_active=True).values_list('pk', flat=True)
+        )
+        self.stdout.write(f"Created {len(employees)} employees in {time.perf_counter() - started:.1f}s.")
+
+        now = timezone.now()
+        today = timezone.localdate()
+        dates = [
+            today - timedelta(days=offset) for offset in range(options['days'] - 1, -1, -1)
+            if (today - timedelta(days=offset)).weekday() < 5
+        ]
+        created = 0
+        batch = []
+        for date in dates:
+            for pk in employee_pks:
+                if rng.random() > options['attendance_rate']:
+                    continue
+                record = self.attendance(rng, pk, date, now)
+                if record is None:
+                    continue
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    created += self.flush(batch)
+            self.stdout.write(f"\r{date}: {created + len(batch)} attendance records", ending='')
+        created += self.flush(batch)
+        self.stdout.write(f"\rCreated {created} attendance records over {len(dates)} weekdays in {time.perf_counter() - started:.1f}s.")
+
+        # bulk_create skips the signals that maintain these
+        for date in dates:
+            refresh_daily_summaries(date)
+        employee_rows, department_rows = rebuild_rollups(batch_size=batch_size)
+        added, _ = refresh_safety_incidents()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(dates)} days of summaries, {employee_rows + department_rows} rollups and "
+            f"{added} safety incidents. Done in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def attendance(self, rng, employee_pk, date, now):
+        """One day's record: check-in around 9:15, out 8-9.5 hours later, with a few missing times.
+
+        Returns None for someone who has not arrived yet today.
+        """
+        check_in = timezone.make_aware(datetime.combine(date, datetime.min.time())) + timedelta(
+            minutes=rng.gauss(9 * 60 + 15, 20)
+        )
+        check_out = check_in + timedelta(minutes=rng.uniform(8 * 60, 9.5 * 60))
+        roll = rng.random()
+        if roll < 0.01:
+            check_in = check_out = None  # Arrived but the camera never saw a face
+        elif roll < 0.04:
+            check_out = None  # Forgot to check out
+        if check_in and check_in > now:
+            return None
+        if check_out and check_out > now:
+            check_out = None
+        return Attendance(employee_id=employee_pk, date=date, check_in_time=check_in, check_out_time=check_out)
+
+    def flush(self, batch):
+        with transaction.atomic():
+            Attendance.objects.bulk_create(batch)
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,364 @@
+import base64
+import itertools
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.test import Client
+from django.test.testcases import QuietWSGIRequestHandler
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from app1.db import use_database_copy
+from app1.management.commands.benchmark_recognition import git_commit
+
+CONTENT_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png'}
+
+# process_attendance answers 200 either way; this is its catch-all failure message
+PROCESSING_ERROR = 'An error occurred during processing.'
+
+
+def load_frames(directory):
+    """(content type, bytes) for every JPEG/PNG in ``directory``."""
+    frames = []
+    if not os.path.isdir(directory):
+        return frames
+    for filename in sorted(os.listdir(directory)):
+        content_type = CONTENT_TYPES.get(os.path.splitext(filename)[1].lower())
+        if content_type:
+            with open(os.path.join(directory, filename), 'rb') as f:
+                frames.append((content_type, f.read()))
+    return frames
+
+
+def request_bodies(frames, mode, action):
+    """(content type, body, query params) per frame, encoded once so the client stays cheap."""
+    if mode == 'binary':
+        return [(content_type, data, {'action': action}) for content_type, data in frames]
+    return [
+        ('application/json', json.dumps({
+            'image_data': f'data:{content_type};base64,' + base64.b64encode(data).decode(),
+            'action': action,
+        }).encode(), {})
+        for content_type, data in frames
+    ]
+
+
+def run_load(url, cookies, bodies, concurrency, duration, rate=None, timeout=60):
+    """Drive ``concurrency`` clients at ``url`` for ``duration`` seconds; return (results, elapsed).
+
+    Without ``rate`` each client sends its next request as soon as the previous one returns
+    (closed loop). With ``rate`` requests are scheduled at that many per second in total and
+    latency is counted from the scheduled send time, so queueing behind a saturated server
+    shows up in the percentiles instead of silently lowering the request rate.
+    ``results`` holds one (latency seconds, outcome) per request.
+    """
+    results = []
+    lock = threading.Lock()
+    body_cycle = itertools.cycle(bodies)
+    started = time.perf_counter()
+    deadline = started + duration
+    schedule = {'next': started}
+
+    def client():
+        session = requests.Session()
+        session.cookies.update(cookies)
+        while True:
+            with lock:
+                content_type, body, params = next(body_cycle)
+                if rate:
+                    slot = max(schedule['next'], started)
+                    schedule['next'] = slot + 1 / rate
+            now = time.perf_counter()
+            if rate:
+                if slot >= deadline:
+                    break
+                if slot > now:
+                    time.sleep(slot - now)
+                sent = slot
+            else:
+                if now >= deadline:
+                    break
+                sent = now
+            try:
+                response = session.post(
+                    url, data=body, params=params, timeout=timeout,
+                    headers={'Content-Type': content_type, 'X-CSRFToken': cookies[settings.CSRF_COOKIE_NAME]},
+                )
+                if response.status_code != 200:
+                    outcome = f'http_{response.status_code}'
+                else:
+                    payload = response.json()
+                    if payload.get('success'):
+                        outcome = 'recognized'
+                    elif payload.get('message') == PROCESSING_ERROR:
+                        outcome = 'error'
+                    else:
+                        outcome = 'rejected'  # No face, not recognized, already checked in...
+            except (requests.RequestException, ValueError) as e:
+                outcome = type(e).__name__
+            latency = time.perf_counter() - sent
+            with lock:
+                results.append((latency, outcome))
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def summarize_load(results, elapsed):
+    """Request count, error rate, throughput of successful requests and latency percentiles in ms."""
+    outcomes = {}
+    for _, outcome in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    errors = sum(count for outcome, count in outcomes.items() if outcome not in ('recognized', 'rejected'))
+    summary = {
+        'requests': len(results),
+        'errors': errors,
+        'error_rate': round(errors / len(results), 4) if results else None,
+        'throughput_per_s': round((len(results) - errors) / elapsed, 2),
+        'outcomes': outcomes,
+    }
+    if results:
+        latencies = np.array([latency for latency, _ in results]) * 1000
+        for percentile in (50, 90, 99):
+            summary[f'p{percentile}_ms'] = round(float(np.percentile(latencies, percentile)), 1)
+        summary['max_ms'] = round(float(latencies.max()), 1)
+    return summary
+
+
+def saturation(runs):
+    """The run with the highest throughput, and whether a higher concurrency failed to beat it.
+
+    If the top concurrency level is also the fastest, the server was not saturated and the
+    figure is only a lower bound.
+    """
+    best = max(runs, key=lambda run: run['throughput_per_s'])
+    return {
+        'saturation_throughput_per_s': best['throughput_per_s'],
+        'at_concurrency': best['concurrency'],
+        'p99_ms_at_saturation': best.get('p99_ms'),
+        'saturated': best['concurrency'] < max(run['concurrency'] for run in runs),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def in_process_server():
+    """Serve the project from threads in this process (shares the GIL with the load generator)."""
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler, allow_reuse_address=False)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def gunicorn_server(workers, threads, db_path, workdir, ready_timeout):
+    """Start ``gunicorn -c gunicorn.conf.py`` against ``db_path`` and wait for it to answer."""
+    port = free_port()
+    name = f'gunicorn-{workers}x{threads}'
+    metrics_dir = os.path.join(workdir, f'{name}-metrics')
+    env = dict(
+        os.environ,
+        LOKNETRA_DB_PATH=db_path,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        PROMETHEUS_MULTIPROC_DIR=metrics_dir,
+    )
+    log_path = os.path.join(workdir, f'{name}.log')
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'Project101.wsgi', '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + ready_timeout
+        while True:
+            if process.poll() is not None:
+                with open(log_path, errors='replace') as f:
+                    raise CommandError(f"{name} exited with status {process.returncode}:\n{f.read()[-2000:]}")
+            try:
+                requests.get(base_url + reverse('login'), timeout=5)
+                break
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise CommandError(f"{name} did not answer within {ready_timeout}s; see {log_path}.")
+                time.sleep(0.5)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test /attendance/process/ by replaying the images in media/employees as base64 JSON "
+        "and/or binary JPEG bodies at increasing concurrency. Reports latency percentiles, error "
+        "rate and saturation throughput per server configuration as JSON. Runs against a copy of "
+        "the database, so the real attendance records are not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frames', default=os.path.join(settings.MEDIA_ROOT, 'employees'), help="Directory of JPEG/PNG frames to replay.")
+        parser.add_argument('--modes', default='json,binary', help="Comma-separated request encodings: json (base64 data URL) and/or binary.")
+        parser.add_argument('--concurrency', default='1,2,4,8', help="Comma-separated numbers of concurrent clients.")
+        parser.add_argument('--duration', type=float, default=15, help="Seconds per concurrency level.")
+        parser.add_argument('--rate', type=float, default=0, help="Total requests per second to schedule (default: closed loop, as fast as answered).")
+        parser.add_argument('--warmup', type=float, default=10, help="Unrecorded seconds at the highest concurrency before measuring each server.")
+        parser.add_argument(
+            '--configs', default='',
+            help="Comma-separated gunicorn WORKERSxTHREADS configurations to compare, e.g. 1x1,2x1,2x4. "
+                 "Default: a threaded server inside this process.",
+        )
+        parser.add_argument('--action', default='check_in', choices=['check_in', 'check_out'])
+        parser.add_argument('--timeout', type=float, default=60, help="Per-request timeout in seconds.")
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        def int_list(value):
+            try:
+                return [int(item) for item in value.split(',') if item]
+            except ValueError:
+                raise CommandError(f"Expected comma-separated integers, got {value!r}.")
+
+        concurrency_levels = sorted(set(int_list(options['concurrency'])))
+        modes = [mode for mode in options['modes'].split(',') if mode]
+        if not concurrency_levels or min(concurrency_levels) < 1:
+            raise CommandError("--concurrency needs positive integers.")
+        if not modes or set(modes) - {'json', 'binary'}:
+            raise CommandError("--modes takes json and/or binary.")
+        configs = []
+        for config in filter(None, options['configs'].split(',')):
+            try:
+                workers, threads = (int(part) for part in config.lower().split('x'))
+            except ValueError:
+                raise CommandError(f"Expected WORKERSxTHREADS, got {config!r}.")
+            configs.append((workers, threads))
+        if configs:
+            try:
+                import gunicorn  # noqa: F401
+            except ImportError:
+                raise CommandError("--configs needs gunicorn (pip install -r requirements.txt).")
+        if connection.vendor != 'sqlite':
+            raise CommandError("The load test copies the SQLite database; other backends are not supported.")
+
+        frames = load_frames(options['frames'])
+        if not frames:
+            raise CommandError(f"No JPEG/PNG frames in {options['frames']}.")
+
+        workdir = tempfile.mkdtemp(prefix='loadtest-')
+        try:
+            db_path = use_database_copy(workdir)
+            cookies = self.session_cookies()
+            connections.close_all()
+
+            report = {
+                'meta': {
+                    'commit': git_commit(),
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'cpu_count': os.cpu_count(),
+                    'frames': len(frames),
+                    'frame_kb_mean': round(sum(len(data) for _, data in frames) / len(frames) / 1024, 1),
+                    'duration_s': options['duration'],
+                    'rate_per_s': options['rate'] or None,
+                    'action': options['action'],
+                },
+                'runs': [],
+                'summary': [],
+            }
+            servers = [(f'gunicorn {w}x{t}', w, t) for w, t in configs] or [('in-process', None, None)]
+            for name, workers, threads in servers:
+                if workers is None:
+                    server = in_process_server()
+                else:
+                    server = gunicorn_server(workers, threads, db_path, workdir, ready_timeout=max(180, options['timeout']))
+                with server as base_url:
+                    url = base_url + reverse('process_attendance')
+                    self.stderr.write(f"{name}: warming up for {options['warmup']:g}s")
+                    run_load(url, cookies, request_bodies(frames, modes[0], options['action']),
+                             max(concurrency_levels), options['warmup'], timeout=options['timeout'])
+                    for mode in modes:
+                        bodies = request_bodies(frames, mode, options['action'])
+                        runs = []
+                        for concurrency in concurrency_levels:
+                            results, elapsed = run_load(
+                                url, cookies, bodies, concurrency, options['duration'],
+                                rate=options['rate'] or None, timeout=options['timeout'],
+                            )
+                            run = dict(server=name, workers=workers, threads=threads, mode=mode,
+                                       concurrency=concurrency, **summarize_load(results, elapsed))
+                            self.stderr.write(self.format_run(run))
+                            runs.append(run)
+                        report['runs'].extend(runs)
+                        report['summary'].append(dict(server=name, workers=workers, threads=threads, mode=mode, **saturation(runs)))
+        finally:
+            connections.close_all()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.stderr.write("")
+        for row in report['summary']:
+            bound = '' if row['saturated'] else ' (not saturated: try higher --concurrency)'
+            self.stderr.write(
+                f"{row['server']:<16} {row['mode']:<6} saturates at {row['saturation_throughput_per_s']} req/s "
+                f"with {row['at_concurrency']} clients, p99 {row['p99_ms_at_saturation']} ms{bound}"
+            )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def session_cookies(self):
+        """Session and CSRF cookies for a throwaway admin in the scratch database."""
+        user, _ = get_user_model().objects.get_or_create(
+            username='loadtest', defaults={'is_staff': True, 'is_superuser': True},
+        )
+        client = Client()
+        client.force_login(user)
+        return {
+            settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value,
+            settings.CSRF_COOKIE_NAME: get_random_string(32),
+        }
+
+    def format_run(self, run):
+        return (
+            f"{run['server']:<16} {run['mode']:<6} c={run['concurrency']:<3} {run['throughput_per_s']:>7} req/s  "
+            f"p50 {run.get('p50_ms')} ms  p90 {run.get('p90_ms')} ms  p99 {run.get('p99_ms')} ms  "
+            f"errors {run['errors']}/{run['requests']}"
+        )
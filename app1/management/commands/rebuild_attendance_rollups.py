@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app1.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute all daily, weekly and monthly attendance rollups from the attendance records."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        employee_rows, department_rows = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {employee_rows} employee and {department_rows} department rollups "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.search import ensure_employee_search_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the employee full-text search index and resync it with the Employee table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild the index on.")
+
+    def handle(self, *args, **options):
+        if not ensure_employee_search_index(options['database'], rebuild=True):
+            raise CommandError("Full-text search needs SQLite with FTS5; searches fall back to icontains.")
+        self.stdout.write(self.style.SUCCESS("Employee search index rebuilt."))
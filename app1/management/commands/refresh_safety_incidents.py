@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app1.incidents import refresh_safety_incidents
+
+
+class Command(BaseCommand):
+    help = "Recompute today's safety incidents (absentees, missing check-ins and check-outs). Run it from cron or with --loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=int, metavar='SECONDS', help="Keep refreshing every SECONDS instead of running once.")
+
+    def handle(self, *args, **options):
+        while True:
+            added, resolved = refresh_safety_incidents()
+            self.stdout.write(f"Safety incidents refreshed: {added} new, {resolved} resolved.")
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
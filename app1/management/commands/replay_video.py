@@ -0,0 +1,191 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+import cv2
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from app1 import events
+from app1.db import use_database_copy
+from app1.management.commands.benchmark_recognition import git_commit, summarize
+from app1.models import Attendance, AttendanceEvent, CameraConfiguration
+from app1.subscribers import announce_attendance, play_recognition_sound
+from app1.summaries import refresh_daily_summaries
+
+
+def event_key(event):
+    """What a regression check compares: distances and timings may drift, decisions may not."""
+    return event['frame'], event['name'], event['attendance']
+
+
+def clear_attendance_from(day):
+    """Delete attendance and audit rows dated ``day`` or later, so a replay starts with nobody checked in.
+
+    Deleting through the ORM lets the signal handlers take the rows out of the rollups as well.
+    """
+    Attendance.objects.filter(date__gte=day).delete()
+    AttendanceEvent.objects.filter(occurred_at__date__gte=day).delete()
+    refresh_daily_summaries(day)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a recorded clip through the camera pipeline (detect, embed, match, attendance) as fast "
+        "as possible, headless, against a scratch copy of the database with today's attendance cleared. "
+        "Frames are sampled and cooldowns applied on the clip's own clock, so the same clip gives the "
+        "same events. Prints per-stage timings and the recognition event log as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('video', help="Video file to replay.")
+        parser.add_argument('--camera', help="CameraConfiguration whose thresholds and gallery partition to use (default: the model defaults, every employee).")
+        parser.add_argument('--every', type=int, default=5, help="Consider every Nth frame, like the live loop.")
+        parser.add_argument('--detection-interval', type=float, default=0.5, help="Minimum clip seconds between detections.")
+        parser.add_argument('--cooldown', type=float, default=5, help="Clip seconds before the same person is recorded again.")
+        parser.add_argument('--max-frames', type=int, help="Stop after this many frames.")
+        parser.add_argument('--expect', help="Fail if the events differ from this earlier replay's JSON output.")
+        parser.add_argument('--keep-db', action='store_true', help="Keep the scratch database and print its path.")
+        parser.add_argument('--output', help="Write the JSON here instead of stdout.")
+
+    def handle(self, *args, **options):
+        capture = cv2.VideoCapture(options['video'])
+        if not capture.isOpened():
+            raise CommandError(f"Cannot open {options['video']}.")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+        if options['camera']:
+            try:
+                cam_config = CameraConfiguration.objects.get(name=options['camera'])
+            except CameraConfiguration.DoesNotExist:
+                raise CommandError(f"No camera configuration named {options['camera']!r}.")
+        else:
+            cam_config = CameraConfiguration(name='replay', camera_source=options['video'])
+
+        expected = None
+        if options['expect']:
+            with open(options['expect']) as f:
+                expected = [event_key(event) for event in json.load(f)['events']]
+
+        workdir = tempfile.mkdtemp(prefix='replay-')
+        # No sound, and no console lines in the JSON on stdout
+        events.unsubscribe(play_recognition_sound)
+        events.unsubscribe(announce_attendance)
+        try:
+            db_path = use_database_copy(workdir)
+            from app1.views.recognition import get_cached_face_data, recognize_camera_frame
+
+            known_face_encodings, known_face_names, employee_cache = get_cached_face_data(cam_config.gallery_partition())
+            clock_start = timezone.now()
+            # The copy holds today's live attendance: without this, anyone already in would replay as already_checked_in
+            clear_attendance_from(timezone.localdate(clock_start))
+            last_recognition_time = {}
+            last_detection = None
+            recognized = []
+            stages = {'read': [], 'detect': [], 'embed': [], 'recognize': [], 'frame': []}
+            frames = processed = 0
+
+            started = time.perf_counter()
+            while options['max_frames'] is None or frames < options['max_frames']:
+                read_started = time.perf_counter()
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                stages['read'].append(time.perf_counter() - read_started)
+                index, frames = frames, frames + 1
+                clip_seconds = index / fps
+                if index % options['every'] != 0:
+                    continue
+                if last_detection is not None and clip_seconds - last_detection <= options['detection_interval']:
+                    continue
+                last_detection = clip_seconds
+
+                frame_started = time.perf_counter()
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                faces, stage_seconds = recognize_camera_frame(
+                    frame_rgb, cam_config, known_face_encodings, known_face_names, employee_cache,
+                    last_recognition_time, clock_start + timedelta(seconds=clip_seconds), options['cooldown'],
+                )
+                stages['frame'].append(time.perf_counter() - frame_started)
+                for stage, seconds in stage_seconds.items():
+                    stages[stage].append(seconds)
+                processed += 1
+                for face in faces:
+                    recognized.append({
+                        'frame': index,
+                        'clip_seconds': round(clip_seconds, 3),
+                        'box': list(face['box']),
+                        'name': face['name'],
+                        'distance': round(face['distance'], 4) if face['distance'] is not None else None,
+                        'attendance': face['attendance'],
+                    })
+            # Attendance is written in recognize_camera_frame itself, so it is all in the database by now
+            elapsed = time.perf_counter() - started
+
+            attendance = list(
+                Attendance.objects.filter(Q(check_in_time__gte=clock_start) | Q(check_out_time__gte=clock_start))
+                .order_by('check_in_time')
+                .values_list('employee__name', 'check_in_time', 'check_out_time')
+            )
+        finally:
+            capture.release()
+            connections.close_all()
+            if not options['keep_db']:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        clip_length = frames / fps
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'video': os.path.abspath(options['video']),
+                'camera': cam_config.name,
+                'fps': fps,
+                'frames': frames,
+                'frames_processed': processed,
+                'gallery_faces': len(known_face_encodings),
+                'wall_seconds': round(elapsed, 2),
+                'clip_seconds': round(clip_length, 2),
+                'realtime_factor': round(clip_length / elapsed, 2) if elapsed else None,
+            },
+            'stages': {stage: summarize(seconds) for stage, seconds in stages.items() if seconds},
+            'attendance': [
+                {
+                    'name': name,
+                    'check_in': (check_in - clock_start).total_seconds() if check_in else None,
+                    'check_out': (check_out - clock_start).total_seconds() if check_out else None,
+                }
+                for name, check_in, check_out in attendance
+            ],
+            'events': recognized,
+        }
+        if options['keep_db']:
+            report['meta']['database'] = db_path
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        self.stderr.write(
+            f"{frames} frames ({processed} processed) in {elapsed:.1f}s, {report['meta']['realtime_factor']}x real time, "
+            f"{len(recognized)} faces, {sum(1 for event in recognized if event['attendance'])} attendance decisions"
+        )
+        if expected is not None:
+            actual = [event_key(event) for event in recognized]
+            if actual != expected:
+                mismatches = [(a, e) for a, e in zip(actual, expected) if a != e]
+                for a, e in mismatches[:10]:
+                    self.stderr.write(f"  expected {e}, got {a}")
+                raise CommandError(
+                    f"Events differ from {options['expect']}: {len(actual)} vs {len(expected)} events, "
+                    f"{len(mismatches)} mismatched."
+                )
+            self.stderr.write(self.style.SUCCESS(f"Events match {options['expect']}."))
@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from app1.db import serialized_write
+from app1.models import Attendance, Employee
+
+
+def _writer(employee_ids, barrier, errors, use_gate):
+    """Check every employee in and then out, as a camera thread would."""
+    write = serialized_write if use_gate else transaction.atomic
+    try:
+        barrier.wait()
+        for phase in ('check_in', 'check_out'):
+            for employee_id in employee_ids:
+                try:
+                    with write():
+                        attendance, _ = Attendance.objects.get_or_create(
+                            employee_id=employee_id, date=timezone.localdate()
+                        )
+                        if phase == 'check_in':
+                            attendance.mark_check_in()
+                        else:
+                            attendance.mark_check_out()
+                except Exception as e:
+                    errors.append(f"{phase} for employee {employee_id}: {e}")
+    finally:
+        close_old_connections()
+
+
+def _run_threads(employee_ids, writers, use_gate, barrier=None, errors=None):
+    barrier = barrier or threading.Barrier(writers)
+    errors = errors if errors is not None else []
+    threads = [
+        threading.Thread(target=_writer, args=(employee_ids[i::writers], barrier, errors, use_gate))
+        for i in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def _process_main(employee_ids, writers, use_gate, error_queue):
+    connections.close_all()
+    errors = _run_threads(employee_ids, writers, use_gate)
+    error_queue.put(errors)
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency stress test for attendance writes: N parallel writers check employees in and out "
+        "against a throwaway copy of the schema and the command fails if any check-in or check-out is lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=50, help="Parallel writer threads in total (default 50).")
+        parser.add_argument('--processes', type=int, default=1, help="Spread the writers over this many processes, like gunicorn workers.")
+        parser.add_argument('--employees-per-writer', type=int, default=20)
+        parser.add_argument('--no-gate', action='store_true', help="Bypass the single-writer gate (and its BEGIN IMMEDIATE), to compare.")
+
+    def handle(self, *args, **options):
+        writers = options['writers']
+        processes = max(1, options['processes'])
+        use_gate = not options['no_gate']
+
+        # Never touch the real database: point the default connection at a fresh file
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError("This stress test is for the SQLite deployment mode.")
+        workdir = tempfile.mkdtemp(prefix='loknetra-stress-')
+        connection.close()
+        connection.settings_dict['NAME'] = os.path.join(workdir, 'stress.sqlite3')
+        call_command('migrate', verbosity=0, interactive=False)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+
+        total = writers * options['employees_per_writer']
+        Employee.objects.bulk_create(
+            [
+                Employee(employee_id=f'STRESS-{i:06d}', name=f'Stress {i}', email='stress@example.com',
+                         phone_number='0', designation='-', department='Stress', is_active=True)
+                for i in range(total)
+            ],
+            batch_size=1000,
+        )
+        employee_ids = list(Employee.objects.values_list('pk', flat=True))
+        connections.close_all()
+
+        self.stdout.write(
+            f"{writers} writers in {processes} process(es), {total} employees, "
+            f"journal_mode={journal_mode}, gate={'on' if use_gate else 'off'}"
+        )
+        started = time.perf_counter()
+        errors = []
+        if processes == 1:
+            _run_threads(employee_ids, writers, use_gate, errors=errors)
+        else:
+            context = multiprocessing.get_context('fork')
+            error_queue = context.Queue()
+            per_process = max(1, writers // processes)
+            workers = [
+                context.Process(target=_process_main, args=(employee_ids[p::processes], per_process, use_gate, error_queue))
+                for p in range(processes)
+            ]
+            for worker in workers:
+                worker.start()
+            for _ in workers:
+                errors.extend(error_queue.get())
+            for worker in workers:
+                worker.join()
+        elapsed = time.perf_counter() - started
+
+        checked_in = Attendance.objects.filter(check_in_time__isnull=False).count()
+        checked_out = Attendance.objects.filter(check_out_time__isnull=False).count()
+        self.stdout.write(
+            f"{2 * total} writes in {elapsed:.2f}s ({2 * total / elapsed:.0f}/s): "
+            f"{checked_in}/{total} check-ins, {checked_out}/{total} check-outs, {len(errors)} errors"
+        )
+        for error in errors[:10]:
+            self.stderr.write(f"  {error}")
+        connections.close_all()
+
+        if checked_in != total or checked_out != total or errors:
+            raise CommandError(f"Lost {total - checked_in} check-ins and {total - checked_out} check-outs.")
+        self.stdout.write(self.style.SUCCESS("No lost check-ins or check-outs."))
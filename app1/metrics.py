@@ -0,0 +1,78 @@
+"""Prometheus metrics for the recognition path, exposed at ``/metrics``.
+
+Under gunicorn each worker process keeps its own metric values. Set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory before the
+workers start (``gunicorn.conf.py`` does this) and the workers write
+their values there; ``/metrics`` then aggregates every live worker.
+Without it, ``/metrics`` reports the serving process only, which is what
+``runserver`` needs.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+# Stages of one recognition request, in order
+STAGES = ('decode', 'imdecode', 'detect', 'embed', 'match', 'db_write')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_SECONDS = Histogram(
+    'loknetra_recognition_stage_seconds',
+    'Time spent in each stage of face recognition.',
+    ['stage'],
+    buckets=LATENCY_BUCKETS,
+)
+
+OUTCOMES = Counter(
+    'loknetra_recognition_outcomes_total',
+    'Faces and frames by recognition outcome (recognized, unrecognized, no_face).',
+    ['outcome', 'source'],
+)
+
+DB_WRITE_SECONDS = Histogram(
+    'loknetra_attendance_write_seconds',
+    'Attendance write latency: waiting for the writer gate, then the transaction itself.',
+    ['phase'],
+    buckets=LATENCY_BUCKETS,
+)
+
+GALLERY_SIZE = Gauge(
+    'loknetra_gallery_faces',
+    'Known face encodings loaded for matching, per gallery partition.',
+    ['gallery'],
+    multiprocess_mode='livemax',
+)
+
+GALLERY_VERSION = Gauge(
+    'loknetra_gallery_version_timestamp_seconds',
+    'When a face gallery partition was last rebuilt (Unix time).',
+    ['gallery'],
+    multiprocess_mode='livemax',
+)
+
+
+def stage(name):
+    """Context manager timing one recognition stage, e.g. ``with metrics.stage('detect'):``."""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def outcome(name, source, count=1):
+    if count:
+        OUTCOMES.labels(name, source).inc(count)
+
+
+def set_gallery(gallery, size, version):
+    GALLERY_SIZE.labels(gallery).set(size)
+    GALLERY_VERSION.labels(gallery).set(version)
+
+
+def render_latest():
+    """Return (body, content type) for a scrape of all worker processes, or this process alone."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0008_delete_safetyviolation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='max_yaw',
+            field=models.FloatField(default=0.35, help_text='Maximum head turn, as nose offset from the eye midpoint in eye distances'),
+        ),
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='min_detection_prob',
+            field=models.FloatField(default=0.9, help_text='Minimum MTCNN detection probability for a face to be embedded'),
+        ),
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='min_face_size',
+            field=models.PositiveIntegerField(default=60, help_text='Minimum face box size in pixels (shorter side)'),
+        ),
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='min_sharpness',
+            field=models.FloatField(default=20.0, help_text='Minimum Laplacian variance; lower values are blurred or motion-smeared'),
+        ),
+    ]
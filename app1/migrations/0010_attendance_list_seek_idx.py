@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0009_cameraconfiguration_quality_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-date', '-check_in_time', 'id'], name='attendance_list_seek_idx'),
+        ),
+    ]
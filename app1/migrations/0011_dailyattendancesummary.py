@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0010_attendance_list_seek_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(max_length=100)),
+                ('headcount', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('missing_check_in', models.PositiveIntegerField(default=0)),
+                ('missing_check_out', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('date', 'department')},
+            },
+        ),
+    ]
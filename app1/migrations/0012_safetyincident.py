@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0011_dailyattendancesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SafetyIncident',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(choices=[('absent', 'Absent'), ('missing_check_in', 'Missing Check-in'), ('missing_check_out', 'Missing Check-out')], max_length=20)),
+                ('since', models.DateTimeField(blank=True, help_text='Check-in time for missing check-outs', null=True)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='safety_incidents', to='app1.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'kind'], name='safety_incident_day_idx')],
+                'unique_together': {('employee', 'date', 'kind')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0012_safetyincident'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('employees_present', models.PositiveIntegerField(default=0)),
+                ('days_present', models.PositiveIntegerField(default=0)),
+                ('days_completed', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.BigIntegerField(default=0)),
+                ('late_arrivals', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('department', 'period', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('days_present', models.PositiveIntegerField(default=0)),
+                ('days_completed', models.PositiveIntegerField(default=0, help_text='Days with both check-in and check-out')),
+                ('total_seconds', models.BigIntegerField(default=0)),
+                ('late_arrivals', models.PositiveIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='app1.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start'], name='employee_rollup_period_idx')],
+                'unique_together': {('employee', 'period', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0013_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='profile_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='employees/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='profile_thumbnail_webp',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='employees/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.14 on 2026-10-19 04:57
+
+import app1.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0014_employee_photo_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=app1.storage.ContentAddressedStorage(), upload_to='employees/'),
+        ),
+    ]
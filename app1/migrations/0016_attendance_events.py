@@ -0,0 +1,26 @@
+# Generated by Django 4.2.14 on 2026-10-19 05:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0015_content_addressed_profile_pictures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Employee name at the time of the event', max_length=100)),
+                ('status', models.CharField(choices=[('checked_in', 'Checked in'), ('checked_out', 'Checked out')], max_length=20)),
+                ('source', models.CharField(help_text="Camera name, or 'kiosk'", max_length=100)),
+                ('distance', models.FloatField(blank=True, help_text='Face match distance, for camera events', null=True)),
+                ('occurred_at', models.DateTimeField(db_index=True)),
+                ('employee', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_events', to='app1.employee')),
+            ],
+        ),
+    ]
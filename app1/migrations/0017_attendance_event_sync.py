@@ -0,0 +1,47 @@
+# Generated by Django 4.2.14 on 2026-10-19 05:40
+
+import uuid
+
+from django.db import migrations, models
+
+
+def assign_event_ids(apps, schema_editor):
+    AttendanceEvent = apps.get_model('app1', 'AttendanceEvent')
+    for event in AttendanceEvent.objects.filter(event_id__isnull=True).only('id'):
+        AttendanceEvent.objects.filter(pk=event.pk).update(event_id=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0016_attendance_events'),
+    ]
+
+    operations = [
+        # Nullable first: existing rows each need their own key before the column can be unique
+        migrations.AddField(
+            model_name='attendanceevent',
+            name='event_id',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(assign_event_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='attendanceevent',
+            name='event_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, help_text='Idempotency key for edge sync', unique=True),
+        ),
+        migrations.AddField(
+            model_name='attendanceevent',
+            name='node',
+            field=models.CharField(blank=True, help_text='Edge node that recorded the event; empty for this server', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='attendanceevent',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, help_text='When an edge node pushed the event to the central server', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=models.Index(fields=['node', 'synced_at'], name='attendance_event_outbox_idx'),
+        ),
+    ]
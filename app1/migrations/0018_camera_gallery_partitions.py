@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-19 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0017_attendance_event_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='gallery_departments',
+            field=models.CharField(blank=True, help_text='Comma-separated departments this camera recognizes', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='gallery_employees',
+            field=models.ManyToManyField(blank=True, help_text='Further employees this camera recognizes', related_name='camera_galleries', to='app1.employee'),
+        ),
+        migrations.AddField(
+            model_name='cameraconfiguration',
+            name='gallery_site',
+            field=models.CharField(blank=True, help_text='Site whose employees this camera recognizes', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='site',
+            field=models.CharField(blank=True, help_text='Site or building the employee works at', max_length=100),
+        ),
+    ]
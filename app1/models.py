@@ -1,6 +1,20 @@
+import uuid
+
 from django.db import models
 from django.utils import timezone
 
+from .storage import ContentAddressedStorage
+
+def format_duration(check_in_time, check_out_time):
+    """Format the time between check-in and check-out as e.g. '8h 5m 12s'."""
+    if check_in_time and check_out_time:
+        duration = check_out_time - check_in_time
+        hours, remainder = divmod(duration.total_seconds(), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
+    return "Not yet calculated"
+
+
 class Employee(models.Model):
     employee_id = models.CharField(
         max_length=50, unique=True, help_text="Unique ID assigned to the employee"
@@ -10,7 +24,12 @@ class Employee(models.Model):
     phone_number = models.CharField(max_length=15)
     designation = models.CharField(max_length=100)
     department = models.CharField(max_length=100)
-    profile_picture = models.ImageField(upload_to="employees/", blank=True, null=True)
+    site = models.CharField(max_length=100, blank=True, help_text="Site or building the employee works at")
+    # Stored under a hash of its content, so repeated uploads of the same snapshot share one file
+    profile_picture = models.ImageField(upload_to="employees/", storage=ContentAddressedStorage(), blank=True, null=True)
+    # Square thumbnails of profile_picture for pages (see app1/photos.py)
+    profile_thumbnail = models.ImageField(upload_to="employees/thumbs/", blank=True, null=True, editable=False)
+    profile_thumbnail_webp = models.ImageField(upload_to="employees/thumbs/", blank=True, null=True, editable=False)
     is_active = models.BooleanField(default=False)
 
     def __str__(self):
@@ -26,48 +45,212 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.employee.name} - {self.date}"
 
-    def mark_check_in(self):
-        """Mark check-in time for the employee."""
+    def mark_check_in(self, at=None):
+        """Mark check-in time for the employee (now, unless ``at`` is given)."""
         if not self.check_in_time:
-            self.check_in_time = timezone.now()
+            self.check_in_time = at or timezone.now()
             self.save()
         else:
             raise ValueError("Check-in time already marked.")
 
-    def mark_check_out(self):
-        """Mark check-out time for the employee."""
+    def mark_check_out(self, at=None):
+        """Mark check-out time for the employee (now, unless ``at`` is given)."""
         if self.check_in_time and not self.check_out_time:
-            self.check_out_time = timezone.now()
+            self.check_out_time = at or timezone.now()
             self.save()
         else:
             raise ValueError("Cannot mark check-out without check-in or if already checked out.")
 
     def calculate_duration(self):
         """Calculate the duration the employee spent at work."""
-        if self.check_in_time and self.check_out_time:
-            duration = self.check_out_time - self.check_in_time
-            hours, remainder = divmod(duration.total_seconds(), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            return f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
-        return "Not yet calculated"
+        return format_duration(self.check_in_time, self.check_out_time)
 
     def save(self, *args, **kwargs):
         if not self.pk:  # Only on creation
-            self.date = timezone.now().date()
+            self.date = timezone.localdate()
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored check-in/out so signal handlers can apply deltas to aggregates
+        instance.saved_times = (instance.__dict__.get('check_in_time'), instance.__dict__.get('check_out_time'))
+        return instance
+
     class Meta:
         unique_together = ('employee', 'date')
+        indexes = [
+            # Matches the attendance list ordering so keyset pagination is an index seek
+            models.Index(fields=['-date', '-check_in_time', 'id'], name='attendance_list_seek_idx'),
+        ]
 
 
 class CameraConfiguration(models.Model):
     name = models.CharField(max_length=100, unique=True, help_text="Give a name to this camera configuration")
     camera_source = models.CharField(max_length=255, help_text="Camera index (0 for default webcam or RTSP/HTTP URL for IP camera)")
     threshold = models.FloatField(default=0.6, help_text="Face recognition confidence threshold")
+    min_detection_prob = models.FloatField(default=0.90, help_text="Minimum MTCNN detection probability for a face to be embedded")
+    min_face_size = models.PositiveIntegerField(default=60, help_text="Minimum face box size in pixels (shorter side)")
+    max_yaw = models.FloatField(default=0.35, help_text="Maximum head turn, as nose offset from the eye midpoint in eye distances")
+    min_sharpness = models.FloatField(default=20.0, help_text="Minimum Laplacian variance; lower values are blurred or motion-smeared")
+    # Gallery partition: with none of these set the camera matches every active employee
+    gallery_departments = models.CharField(max_length=255, blank=True, help_text="Comma-separated departments this camera recognizes")
+    gallery_site = models.CharField(max_length=100, blank=True, help_text="Site whose employees this camera recognizes")
+    gallery_employees = models.ManyToManyField(
+        Employee, blank=True, related_name='camera_galleries', help_text="Further employees this camera recognizes"
+    )
 
     def __str__(self):
         return self.name
 
+    def department_list(self):
+        return sorted({department.strip() for department in self.gallery_departments.split(',') if department.strip()})
+
+    def gallery_partition(self):
+        """The active employees this camera matches against, as a hashable key for the gallery cache.
+
+        None for all of them; otherwise (departments, site, employee pks), and an employee belongs to
+        the partition if any of them matches.
+        """
+        employee_pks = tuple(sorted(self.gallery_employees.values_list('pk', flat=True))) if self.pk else ()
+        if not (self.department_list() or self.gallery_site or employee_pks):
+            return None
+        return tuple(self.department_list()), self.gallery_site, employee_pks
+
+    def quality_thresholds(self):
+        """Face quality gate thresholds for this camera."""
+        return {
+            'min_detection_prob': self.min_detection_prob,
+            'min_face_size': self.min_face_size,
+            'max_yaw': self.max_yaw,
+            'min_sharpness': self.min_sharpness,
+        }
+
+
+class DailyAttendanceSummary(models.Model):
+    """Per-department attendance counts for one day, kept current as attendance changes."""
+    date = models.DateField()
+    department = models.CharField(max_length=100)
+    headcount = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    missing_check_in = models.PositiveIntegerField(default=0)
+    missing_check_out = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.department} - {self.date}"
+
+    class Meta:
+        unique_together = ('date', 'department')
+
+
+
+class SafetyIncident(models.Model):
+    """An attendance anomaly detected for an employee on a given day."""
+    ABSENT = 'absent'
+    MISSING_CHECK_IN = 'missing_check_in'
+    MISSING_CHECK_OUT = 'missing_check_out'
+    KIND_CHOICES = [
+        (ABSENT, 'Absent'),
+        (MISSING_CHECK_IN, 'Missing Check-in'),
+        (MISSING_CHECK_OUT, 'Missing Check-out'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='safety_incidents')
+    date = models.DateField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    since = models.DateTimeField(null=True, blank=True, help_text="Check-in time for missing check-outs")
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.get_kind_display()} ({self.date})"
+
+    class Meta:
+        unique_together = ('employee', 'date', 'kind')
+        indexes = [models.Index(fields=['date', 'kind'], name='safety_incident_day_idx')]
+
+
+ROLLUP_PERIOD_CHOICES = [('day', 'Day'), ('week', 'Week'), ('month', 'Month')]
+
+
+class EmployeeAttendanceRollup(models.Model):
+    """Pre-aggregated attendance for one employee over a day, week or month."""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendance_rollups')
+    period = models.CharField(max_length=5, choices=ROLLUP_PERIOD_CHOICES)
+    period_start = models.DateField()
+    days_present = models.PositiveIntegerField(default=0)
+    days_completed = models.PositiveIntegerField(default=0, help_text="Days with both check-in and check-out")
+    total_seconds = models.BigIntegerField(default=0)
+    late_arrivals = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.period} of {self.period_start}"
+
+    @property
+    def total_hours(self):
+        return self.total_seconds / 3600
+
+    @property
+    def average_hours(self):
+        return self.total_hours / self.days_completed if self.days_completed else 0
+
+    class Meta:
+        unique_together = ('employee', 'period', 'period_start')
+        indexes = [models.Index(fields=['period', 'period_start'], name='employee_rollup_period_idx')]
+
+
+class DepartmentAttendanceRollup(models.Model):
+    """Pre-aggregated attendance for one department over a day, week or month."""
+    department = models.CharField(max_length=100)
+    period = models.CharField(max_length=5, choices=ROLLUP_PERIOD_CHOICES)
+    period_start = models.DateField()
+    employees_present = models.PositiveIntegerField(default=0)
+    days_present = models.PositiveIntegerField(default=0)
+    days_completed = models.PositiveIntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+    late_arrivals = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.department} - {self.period} of {self.period_start}"
+
+    @property
+    def total_hours(self):
+        return self.total_seconds / 3600
+
+    @property
+    def average_hours(self):
+        return self.total_hours / self.days_completed if self.days_completed else 0
+
+    class Meta:
+        unique_together = ('department', 'period', 'period_start')
+
+
+class AttendanceEvent(models.Model):
+    """Audit log of check-ins and check-outs as they were recorded, by camera or kiosk.
+
+    On an edge node the rows not yet pushed to the central server (``synced_at`` empty) are the
+    sync outbox; on the central server, rows received from an edge node carry its ``node`` name.
+    """
+    STATUS_CHOICES = [
+        ('checked_in', 'Checked in'),
+        ('checked_out', 'Checked out'),
+    ]
+
+    event_id = models.UUIDField(unique=True, default=uuid.uuid4, editable=False, help_text="Idempotency key for edge sync")
+    employee = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, related_name='attendance_events')
+    name = models.CharField(max_length=100, help_text="Employee name at the time of the event")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    source = models.CharField(max_length=100, help_text="Camera name, or 'kiosk'")
+    node = models.CharField(max_length=100, blank=True, help_text="Edge node that recorded the event; empty for this server")
+    distance = models.FloatField(null=True, blank=True, help_text="Face match distance, for camera events")
+    occurred_at = models.DateTimeField(db_index=True)
+    synced_at = models.DateTimeField(null=True, blank=True, help_text="When an edge node pushed the event to the central server")
+
+    def __str__(self):
+        return f"{self.name} - {self.get_status_display()} ({self.source}, {self.occurred_at})"
+
+    class Meta:
+        indexes = [models.Index(fields=['node', 'synced_at'], name='attendance_event_outbox_idx')]
 
 # attendance = Attendance.objects.filter(employee=employee, date=timezone.now().date()).first()
 # if not attendance:
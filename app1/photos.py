@@ -0,0 +1,78 @@
+"""Small derivatives of employee profile pictures for list and detail pages.
+
+The registration snapshot is kept at full size for face encoding; pages
+show a square thumbnail instead, as JPEG and WebP. Derivative file names
+carry a hash of their content, so they never change once written and are
+served with a year-long immutable ``Cache-Control`` header.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+DEFAULT_PHOTO = '/static/default_profile.png'
+
+FORMATS = {
+    'profile_thumbnail': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'profile_thumbnail_webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+}
+
+
+def thumbnail_size():
+    return getattr(settings, 'PHOTO_THUMBNAIL_SIZE', 128)
+
+
+def render_derivatives(image_file):
+    """Return ``{field name: ContentFile}`` for a square thumbnail of an image file, in each format."""
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        size = thumbnail_size()
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+    derivatives = {}
+    for field, (image_format, extension, options) in FORMATS.items():
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, image_format, **options)
+        content = buffer.getvalue()
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        derivatives[field] = ContentFile(content, name=f'{digest}.{extension}')
+    return derivatives
+
+
+def generate_derivatives(employee):
+    """Create (or replace) an employee's thumbnails from their profile picture; returns True if written.
+
+    Fields are updated with a queryset update so the Employee save signals do not fire again.
+    """
+    if not employee.profile_picture:
+        return False
+    employee.profile_picture.open('rb')
+    try:
+        derivatives = render_derivatives(employee.profile_picture)
+    finally:
+        employee.profile_picture.close()
+
+    updates = {}
+    for field, content in derivatives.items():
+        file_field = getattr(employee, field)
+        old_name = file_field.name
+        name = file_field.field.generate_filename(employee, f'{employee.employee_id}-{content.name}')
+        if file_field.storage.exists(name):
+            file_field.name = name  # Same content hash: the file is already there
+        else:
+            file_field.save(name.rsplit('/', 1)[-1], content, save=False)
+        updates[field] = file_field.name
+        if old_name and old_name != file_field.name:
+            file_field.storage.delete(old_name)
+    type(employee).objects.filter(pk=employee.pk).update(**updates)
+    return True
+
+
+def photo_urls(employee):
+    """(thumbnail JPEG URL, thumbnail WebP URL or None) for templates, with the default photo as fallback."""
+    if not employee.profile_thumbnail:
+        return DEFAULT_PHOTO, None
+    webp = employee.profile_thumbnail_webp.url if employee.profile_thumbnail_webp else None
+    return employee.profile_thumbnail.url, webp
@@ -0,0 +1,241 @@
+"""Opt-in request profiling for production.
+
+``RequestProfilingMiddleware`` profiles a random ``PROFILE_SAMPLE_RATE``
+fraction of requests, plus every request whose path starts with one of
+``PROFILE_PATHS`` (e.g. ``/attendance/process/``). Two backends:
+
+* ``sampling`` (default) -- a background thread records the request
+  thread's Python stack every ``PROFILE_SAMPLE_INTERVAL`` seconds and
+  writes the counts as folded stacks (one ``a;b;c count`` line per stack,
+  the input format of flamegraph.pl and speedscope). The request itself
+  runs at full speed, so it is safe to leave on for a small fraction.
+* ``cprofile`` -- exact call counts and times in a ``.prof`` file for
+  ``pstats`` or snakeviz, at a noticeable cost to the profiled request.
+
+Each profile is saved to ``PROFILE_DIR`` next to a JSON file with the
+request's metadata and hot spots; only the newest ``PROFILE_MAX_FILES``
+are kept. Requests faster than ``PROFILE_MIN_SECONDS`` are not saved.
+Staff can list and download profiles at ``/profiles/``. With neither a
+sample rate nor paths configured the middleware removes itself.
+"""
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+
+BACKENDS = ('sampling', 'cprofile')
+
+_sequence = itertools.count()
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'loknetra-profiles')))
+
+
+def _frame_label(function, filename, line):
+    # Parent directory plus file name: enough to tell app1/views/recognition.py from django/views/...
+    filename = '/'.join(filename.replace('\\', '/').split('/')[-2:])
+    return f'{function} ({filename}:{line})'
+
+
+class StackSampler:
+    """Counts one thread's Python stacks, sampled from a background thread."""
+    extension = 'txt'
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code.co_name, frame.f_code.co_filename, frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def hotspots(self, limit=5):
+        """Functions the thread was most often found executing, as a share of all samples."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [{'frame': frame, 'percent': round(100 * count / total, 1)} for frame, count in leaves.most_common(limit)]
+
+
+class CProfileRecorder:
+    """cProfile for the current thread."""
+    extension = 'prof'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    @property
+    def samples(self):
+        return None
+
+    def write(self, path):
+        self.profiler.dump_stats(path)
+
+    def hotspots(self, limit=5):
+        """Functions with the most time spent in their own code, as a share of the total."""
+        stats = pstats.Stats(self.profiler).stats
+        total = sum(own_time for _, _, own_time, _, _ in stats.values()) or 1
+        top = sorted(stats.items(), key=lambda item: -item[1][2])[:limit]
+        return [
+            {'frame': _frame_label(function, filename, line), 'percent': round(100 * own_time / total, 1)}
+            for (filename, line, function), (_, _, own_time, _, _) in top
+        ]
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'PROFILE_SAMPLE_RATE', 0))
+        self.paths = tuple(getattr(settings, 'PROFILE_PATHS', ()))
+        if not self.sample_rate and not self.paths:
+            raise MiddlewareNotUsed
+        self.backend = getattr(settings, 'PROFILE_BACKEND', 'sampling')
+        if self.backend not in BACKENDS:
+            raise ImproperlyConfigured(f"PROFILE_BACKEND must be one of {', '.join(BACKENDS)}, not {self.backend!r}.")
+        self.interval = float(getattr(settings, 'PROFILE_SAMPLE_INTERVAL', 0.005))
+        self.min_seconds = float(getattr(settings, 'PROFILE_MIN_SECONDS', 0))
+        self.max_files = int(getattr(settings, 'PROFILE_MAX_FILES', 200))
+        self.directory = profile_dir()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def should_profile(self, request):
+        return request.path.startswith(self.paths) or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        if self.backend == 'sampling':
+            recorder = StackSampler(threading.get_ident(), self.interval)
+        else:
+            recorder = CProfileRecorder()
+        try:
+            recorder.start()
+        except ValueError:
+            # cProfile is already running (e.g. under a profiler); serve the request unprofiled
+            return self.get_response(request)
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            recorder.stop()
+        duration = time.perf_counter() - started
+
+        if duration >= self.min_seconds:
+            try:
+                self.save(request, response, recorder, started_at, duration)
+            except Exception as e:
+                print(f"Error saving request profile: {e}")
+        return response
+
+    def save(self, request, response, recorder, started_at, duration):
+        profile_id = f"{datetime.fromtimestamp(started_at).strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}"
+        profile_name = f'{profile_id}.{recorder.extension}'
+        recorder.write(os.path.join(self.directory, profile_name))
+        user = getattr(request, 'user', None)
+        metadata = {
+            'id': profile_id,
+            'profile': profile_name,
+            'backend': self.backend,
+            'method': request.method,
+            'path': request.path,
+            'query_string': request.META.get('QUERY_STRING', ''),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'started_at': datetime.fromtimestamp(started_at).isoformat(timespec='seconds'),
+            'user': user.get_username() if user is not None and user.is_authenticated else None,
+            'pid': os.getpid(),
+            'samples': recorder.samples,
+            'hotspots': recorder.hotspots(),
+        }
+        # Metadata last: a profile is listed only once both files are complete
+        metadata_path = os.path.join(self.directory, f'{profile_id}.json')
+        with open(metadata_path + '.tmp', 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(metadata_path + '.tmp', metadata_path)
+        self.rotate()
+
+    def rotate(self):
+        """Delete the oldest profiles beyond PROFILE_MAX_FILES."""
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[:max(0, len(profiles) - self.max_files)]:
+            profile_id = entry.name[:-len('.json')]
+            for extension in ('json', 'txt', 'prof'):
+                try:
+                    os.remove(os.path.join(self.directory, f'{profile_id}.{extension}'))
+                except FileNotFoundError:
+                    pass
+
+
+def list_profiles():
+    """Metadata of every saved profile, newest first."""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Rotated away or half-written
+    return sorted(profiles, key=lambda profile: profile['started_at'], reverse=True)
+
+
+def profile_file(name):
+    """Path of a saved profile or metadata file, or None; ``name`` must be a bare file name in PROFILE_DIR."""
+    directory = profile_dir()
+    if os.path.basename(name) != name or not name.endswith(('.json', '.txt', '.prof')):
+        return None
+    path = os.path.join(directory, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,186 @@
+"""Daily, weekly and monthly attendance rollups per employee and per department.
+
+Reports read ``EmployeeAttendanceRollup`` and ``DepartmentAttendanceRollup``
+instead of recomputing durations from raw attendance. ``update_rollups`` is
+called whenever an attendance record changes and only touches the rows
+covering that record's day, week and month: it recomputes the employee's
+rows from at most a month of their attendance and applies the difference
+to the department rows.
+``rebuild_rollups`` recomputes everything in one streaming pass over the
+live table and the attendance archive (see the ``rebuild_attendance_rollups``
+management command).
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .archive import iter_archived
+from .db import serialized_write
+from .models import Attendance, DepartmentAttendanceRollup, EmployeeAttendanceRollup
+
+PERIODS = ('day', 'week', 'month')
+
+COUNTERS = ('days_present', 'days_completed', 'total_seconds', 'late_arrivals')
+
+
+def period_bounds(period, date):
+    """Return the first and last date of the day, week (Monday-based) or month containing ``date``."""
+    if period == 'day':
+        return date, date
+    if period == 'week':
+        start = date - timedelta(days=date.weekday())
+        return start, start + timedelta(days=6)
+    start = date.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def is_late(check_in_time):
+    """Whether a check-in is after ATTENDANCE_LATE_AFTER, in local time."""
+    late_after = datetime.strptime(getattr(settings, 'ATTENDANCE_LATE_AFTER', '09:30'), '%H:%M').time()
+    return timezone.localtime(check_in_time).time() > late_after
+
+
+def add_attendance(counters, check_in_time, check_out_time):
+    """Add one attendance record to a dict of rollup counters."""
+    if not check_in_time:
+        return
+    counters['days_present'] += 1
+    if is_late(check_in_time):
+        counters['late_arrivals'] += 1
+    if check_out_time:
+        counters['days_completed'] += 1
+        counters['total_seconds'] += int((check_out_time - check_in_time).total_seconds())
+
+
+def update_rollups(employee_id, department, date):
+    """Recompute the employee's rollups for the periods containing ``date`` and apply the change to the department's.
+
+    Employee rows are recomputed from at most a month of that employee's attendance; department rows
+    only receive the difference as F() increments, so an event costs the same in any size of department.
+    """
+    bounds = {period: period_bounds(period, date) for period in PERIODS}
+    with serialized_write():
+        # One read covers the day, week and month (a week can straddle two months)
+        rows = list(
+            Attendance.objects.filter(
+                employee_id=employee_id,
+                date__range=(min(start for start, _ in bounds.values()), max(end for _, end in bounds.values())),
+            ).values_list('date', 'check_in_time', 'check_out_time')
+        )
+        for period in PERIODS:
+            start, end = bounds[period]
+            counters = dict.fromkeys(COUNTERS, 0)
+            for row_date, check_in_time, check_out_time in rows:
+                if start <= row_date <= end:
+                    add_attendance(counters, check_in_time, check_out_time)
+
+            rollup = EmployeeAttendanceRollup.objects.filter(
+                employee_id=employee_id, period=period, period_start=start
+            ).first()
+            if rollup is None:
+                previous = dict.fromkeys(COUNTERS, 0)
+                EmployeeAttendanceRollup.objects.create(
+                    employee_id=employee_id, period=period, period_start=start, **counters
+                )
+            else:
+                previous = {counter: getattr(rollup, counter) for counter in COUNTERS}
+                if previous == counters:
+                    continue
+                EmployeeAttendanceRollup.objects.filter(pk=rollup.pk).update(**counters)
+
+            delta = {counter: counters[counter] - previous[counter] for counter in COUNTERS}
+            delta['employees_present'] = int(counters['days_present'] > 0) - int(previous['days_present'] > 0)
+            delta = {field: change for field, change in delta.items() if change}
+            if not delta:
+                continue
+            updated = DepartmentAttendanceRollup.objects.filter(
+                department=department, period=period, period_start=start
+            ).update(**{field: F(field) + change for field, change in delta.items()})
+            if not updated:
+                totals = EmployeeAttendanceRollup.objects.filter(
+                    employee__department=department, period=period, period_start=start
+                ).aggregate(
+                    employees_present=Count('id', filter=Q(days_present__gt=0)),
+                    **{counter: Sum(counter) for counter in COUNTERS},
+                )
+                DepartmentAttendanceRollup.objects.create(
+                    department=department,
+                    period=period,
+                    period_start=start,
+                    **{key: value or 0 for key, value in totals.items()},
+                )
+
+
+def remove_employee_rollups(employee_id, department):
+    """Subtract an employee's rollups from their department's, before the employee and their rollups are deleted."""
+    with serialized_write():
+        for rollup in EmployeeAttendanceRollup.objects.filter(employee_id=employee_id):
+            delta = {counter: -getattr(rollup, counter) for counter in COUNTERS if getattr(rollup, counter)}
+            if rollup.days_present > 0:
+                delta['employees_present'] = -1
+            if delta:
+                DepartmentAttendanceRollup.objects.filter(
+                    department=department, period=rollup.period, period_start=rollup.period_start
+                ).update(**{field: F(field) + change for field, change in delta.items()})
+
+
+def accumulate(rows):
+    """Fold (employee_id, department, date, check_in, check_out) rows into rollup counter dicts."""
+    employee_rollups = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    department_rollups = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    department_members = defaultdict(set)
+    for employee_id, department, date, check_in_time, check_out_time in rows:
+        if not check_in_time:
+            continue
+        for period in PERIODS:
+            start = period_bounds(period, date)[0]
+            add_attendance(employee_rollups[(employee_id, period, start)], check_in_time, check_out_time)
+            add_attendance(department_rollups[(department, period, start)], check_in_time, check_out_time)
+            department_members[(department, period, start)].add(employee_id)
+    return employee_rollups, department_rollups, department_members
+
+
+def rebuild_rollups(rows=None, batch_size=1000):
+    """Recompute every rollup from attendance in one streaming pass; returns (employee, department) row counts."""
+    if rows is None:
+        rows = chain(
+            Attendance.objects.order_by().values_list(
+                'employee_id', 'employee__department', 'date', 'check_in_time', 'check_out_time'
+            ).iterator(chunk_size=getattr(settings, 'ATTENDANCE_EXPORT_CHUNK_SIZE', 2000)),
+            # Archived days keep the department the employee was in when they were archived
+            (
+                (employee_pk, department, date, check_in_time, check_out_time)
+                for _, employee_pk, _, _, department, date, check_in_time, check_out_time in iter_archived()
+            ),
+        )
+    employee_rollups, department_rollups, department_members = accumulate(rows)
+
+    with serialized_write():
+        EmployeeAttendanceRollup.objects.all().delete()
+        DepartmentAttendanceRollup.objects.all().delete()
+        EmployeeAttendanceRollup.objects.bulk_create(
+            (
+                EmployeeAttendanceRollup(employee_id=employee_id, period=period, period_start=start, **counters)
+                for (employee_id, period, start), counters in employee_rollups.items()
+            ),
+            batch_size=batch_size,
+        )
+        DepartmentAttendanceRollup.objects.bulk_create(
+            (
+                DepartmentAttendanceRollup(
+                    department=department,
+                    period=period,
+                    period_start=start,
+                    employees_present=len(department_members[(department, period, start)]),
+                    **counters,
+                )
+                for (department, period, start), counters in department_rollups.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(employee_rollups), len(department_rollups)
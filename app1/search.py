@@ -0,0 +1,97 @@
+"""Employee full-text search backed by an SQLite FTS5 index.
+
+``app1_employee_fts`` is an external-content FTS5 table over the employee
+name, ID, email and department, kept in sync with ``app1_employee`` by
+triggers. SQLite drops a table's triggers whenever Django remakes it during
+a migration, so the index is (re)created idempotently after every
+``migrate`` rather than once in a migration file. On other database
+backends, or if SQLite was built without FTS5, searches fall back to
+``icontains`` lookups.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'app1_employee_fts'
+FTS_COLUMNS = ('name', 'employee_id', 'email', 'department')
+
+_fts_ready = {}
+
+
+def _statements():
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='app1_employee', content_rowid='id', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON app1_employee BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON app1_employee BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON app1_employee BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def ensure_employee_search_index(using=DEFAULT_DB_ALIAS, rebuild=False):
+    """Create the FTS table and sync triggers if missing, rebuilding the index when needed.
+
+    Returns True if the FTS index is usable on this connection.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{FTS_TABLE}_a_'],
+        )
+        triggers_missing = cursor.fetchone()[0] < 3
+        try:
+            for statement in _statements():
+                cursor.execute(statement)
+            if rebuild or triggers_missing:
+                # Rows written while the triggers were missing are only picked up by a rebuild
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        except OperationalError as e:
+            print(f"Employee search index unavailable, falling back to icontains: {e}")
+            _fts_ready[using] = False
+            return False
+    _fts_ready[using] = True
+    return True
+
+
+def fts_available(using=DEFAULT_DB_ALIAS):
+    """Whether the FTS index exists on this connection (checked once per process)."""
+    if using not in _fts_ready:
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            _fts_ready[using] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+                _fts_ready[using] = cursor.fetchone() is not None
+    return _fts_ready[using]
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query where every word is a prefix term, e.g. 'jo sm' -> '"jo"* "sm"*'."""
+    return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', text.lower()))
+
+
+def matching_employee_ids(text):
+    """Subquery of Employee primary keys matching ``text``, usable with ``__in`` lookups."""
+    match_query = build_match_query(text)
+    if match_query and fts_available():
+        return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match_query])
+
+    from .models import Employee
+
+    condition = Q()
+    for column in FTS_COLUMNS:
+        condition |= Q(**{f'{column}__icontains': text})
+    return Employee.objects.filter(condition).values('pk')
@@ -0,0 +1,70 @@
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Attendance, Employee
+from .rollups import remove_employee_rollups, update_rollups
+from .summaries import apply_attendance_change, attendance_state, refresh_daily_summaries, refresh_daily_summary
+
+
+# Employees whose deletion this thread is cascading to their attendance and rollups
+_deleting = threading.local()
+
+
+def _deleting_employees():
+    if not hasattr(_deleting, 'pks'):
+        _deleting.pks = set()
+    return _deleting.pks
+
+
+def _department(attendance):
+    if Attendance.employee.is_cached(attendance):
+        return attendance.employee.department
+    return Employee.objects.filter(pk=attendance.employee_id).values_list('department', flat=True).first()
+
+
+@receiver(post_save, sender=Attendance)
+def update_aggregates_on_save(sender, instance, created, **kwargs):
+    """Keep the day's summary and the day/week/month rollups in step with each check-in/out."""
+    department = _department(instance)
+    if department is None:
+        return
+    new_times = (instance.check_in_time, instance.check_out_time)
+    if created:
+        apply_attendance_change(instance.date, department, {}, attendance_state(*new_times))
+    elif hasattr(instance, 'saved_times'):
+        apply_attendance_change(instance.date, department, attendance_state(*instance.saved_times), attendance_state(*new_times))
+    else:
+        # Saved without being loaded from the database: the previous state is unknown
+        refresh_daily_summary(instance.date, department)
+    if instance.check_in_time or getattr(instance, 'saved_times', (None, None))[0]:
+        update_rollups(instance.employee_id, department, instance.date)
+    instance.saved_times = new_times
+
+
+@receiver(post_delete, sender=Attendance)
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    department = _department(instance)
+    if department is None:
+        return
+    apply_attendance_change(instance.date, department, attendance_state(instance.check_in_time, instance.check_out_time), {})
+    # An employee being deleted has already left the department rollups, and their own go with them
+    if instance.check_in_time and instance.employee_id not in _deleting_employees():
+        update_rollups(instance.employee_id, department, instance.date)
+
+
+@receiver(pre_delete, sender=Employee)
+def remove_rollups_on_employee_delete(sender, instance, **kwargs):
+    # Runs before the cascade deletes the employee's rollups (without signals) and their attendance
+    remove_employee_rollups(instance.pk, instance.department)
+    _deleting_employees().add(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def update_summary_for_employee(sender, instance, **kwargs):
+    """Headcounts (and departments, if one changed) affect every summary row for today."""
+    _deleting_employees().discard(instance.pk)
+    refresh_daily_summaries(timezone.localdate())
@@ -0,0 +1,33 @@
+"""SQLite backend tuned for concurrent camera threads and web workers.
+
+Used as the database ENGINE when ``SQLITE_PRODUCTION_MODE`` is on:
+
+* WAL journaling, so readers never block behind a writer and vice versa;
+* ``synchronous=NORMAL``, which is durable across application crashes in
+  WAL mode and avoids an fsync per commit;
+* write transactions opened by ``app1.db.serialized_write`` start with
+  ``BEGIN IMMEDIATE``, so a writer takes the write lock up front and waits
+  out the busy timeout (``OPTIONS['timeout']``) instead of failing with
+  "database is locked" when upgrading a read transaction that another
+  process has since written past. Every other ``atomic()`` block starts
+  with a plain ``BEGIN`` and takes no lock until it writes, so read-only
+  transactions never queue behind writers. A block that reads and then
+  writes outside the gate can still hit that error if another process
+  commits in between, so the application's write paths all use
+  ``serialized_write``; Django's own (admin edits) are rare enough not to.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Set by serialized_write while it opens its transaction
+    begin_immediate = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE' if self.begin_immediate else 'BEGIN')
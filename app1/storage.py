@@ -0,0 +1,39 @@
+"""Content-addressed file storage for enrollment images.
+
+Files are named after the SHA-256 of their content, so registering the
+same snapshot twice stores it once instead of piling up Django's
+``001_HZjFPA4.jpg``-style collision copies, and identical images share
+one cached face encoding. Unreferenced files are removed by
+``manage.py cleanup_media``.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content):
+        """``<upload dir>/<sha256 of content><original extension>``."""
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, content_hash(content) + extension).replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Same name means same bytes: keep the stored copy
+            return name
+        return super().save(name, content, max_length=max_length)
@@ -0,0 +1,47 @@
+"""The default subscribers to the recognition events in ``app1/events.py``.
+
+Imported by ``App1Config.ready()``, like the signal receivers. They all
+run on the event dispatcher thread, in the order they are defined here.
+Attendance and its audit row are written before the event is published
+(see ``app1/attendance.py``), so these are the side effects that may be
+dropped under load: the console line, the sound and the live streams.
+"""
+import os
+
+from .attendance import RECORDED
+from .events import notify_streams, subscribe
+
+SOUND_PATH = os.path.join(os.path.dirname(__file__), 'suc.wav')
+
+_sound = None
+
+
+@subscribe('attendance')
+def announce_attendance(event):
+    if event['status'] in RECORDED:
+        print(f"Attendance marked: {event['name']} {event['status'].replace('_', ' ')} ({event['source']})")
+
+
+@subscribe('attendance')
+def play_recognition_sound(event):
+    """Play the success sound for camera check-ins and check-outs; kiosk users are at a browser elsewhere."""
+    global _sound
+    if event['source'] == 'kiosk' or event['status'] not in RECORDED or _sound is False:
+        return
+    if _sound is None:
+        try:
+            import pygame
+
+            pygame.mixer.init()
+            _sound = pygame.mixer.Sound(SOUND_PATH)
+        except Exception as e:
+            print(f"Recognition sound disabled: {e}")
+            _sound = False
+            return
+    _sound.play()
+
+
+@subscribe('attendance')
+def wake_event_streams(event):
+    if event['status'] in RECORDED:
+        notify_streams()
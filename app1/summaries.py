@@ -0,0 +1,68 @@
+"""Daily per-department attendance summaries.
+
+The dashboard reads ``DailyAttendanceSummary`` rows instead of counting raw
+attendance. Each attendance change is applied to the row for its own day
+and department as an F() increment computed from the record's previous
+and new check-in/out state, so the cost of an event does not depend on
+the department's size. ``refresh_daily_summary`` recomputes a row from
+scratch when the previous state is unknown or the row does not exist yet.
+"""
+from django.db.models import Count, F, Q
+
+from .models import Attendance, DailyAttendanceSummary, Employee
+
+ATTENDANCE_COUNTS = {
+    'present': Count('id', filter=Q(check_in_time__isnull=False)),
+    'missing_check_in': Count('id', filter=Q(check_in_time__isnull=True)),
+    'missing_check_out': Count('id', filter=Q(check_in_time__isnull=False, check_out_time__isnull=True)),
+}
+
+
+def attendance_state(check_in_time, check_out_time):
+    """The contribution of one attendance record to its summary row."""
+    return {
+        'present': int(check_in_time is not None),
+        'missing_check_in': int(check_in_time is None),
+        'missing_check_out': int(check_in_time is not None and check_out_time is None),
+    }
+
+
+def apply_attendance_change(date, department, old_state, new_state):
+    """Apply the difference between two attendance states to the day's summary row."""
+    delta = {field: new_state.get(field, 0) - old_state.get(field, 0) for field in ATTENDANCE_COUNTS}
+    delta = {field: change for field, change in delta.items() if change}
+    if not delta:
+        return
+    updated = DailyAttendanceSummary.objects.filter(date=date, department=department).update(
+        **{field: F(field) + change for field, change in delta.items()}
+    )
+    if not updated:
+        refresh_daily_summary(date, department)
+
+
+def refresh_daily_summary(date, department):
+    """Recompute the summary row for one day and department."""
+    counts = Attendance.objects.filter(date=date, employee__department=department).aggregate(**ATTENDANCE_COUNTS)
+    counts['headcount'] = Employee.objects.filter(department=department).count()
+    DailyAttendanceSummary.objects.update_or_create(date=date, department=department, defaults=counts)
+
+
+def refresh_daily_summaries(date):
+    """Recompute every department's summary row for a day with two grouped queries."""
+    headcounts = dict(
+        Employee.objects.values_list('department').annotate(count=Count('id')).values_list('department', 'count')
+    )
+    counts = {
+        row.pop('employee__department'): row
+        for row in Attendance.objects.filter(date=date)
+        .values('employee__department')
+        .annotate(**ATTENDANCE_COUNTS)
+        .order_by()
+    }
+    empty = {field: 0 for field in ATTENDANCE_COUNTS}
+    for department in set(headcounts) | set(counts):
+        defaults = dict(counts.get(department, empty), headcount=headcounts.get(department, 0))
+        DailyAttendanceSummary.objects.update_or_create(date=date, department=department, defaults=defaults)
+    DailyAttendanceSummary.objects.filter(date=date).exclude(
+        department__in=set(headcounts) | set(counts)
+    ).delete()
@@ -0,0 +1,170 @@
+"""Rolling per-camera pipeline statistics, shared between processes through a cache.
+
+Each camera thread owns a ``CameraTelemetry`` and reports captured and
+processed frames, stage latencies, recognized faces and reconnects to
+it. About once a second it publishes a snapshot to the ``telemetry``
+cache (file-based, so the status page can run in a different worker
+process than the cameras). ``camera_statuses`` reads the snapshots back
+and flags cameras that are offline, stalled or capturing too slowly.
+"""
+import os
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+
+WINDOW = 10  # Seconds of history behind the FPS and latency figures
+FACES_WINDOW = 60
+PUBLISH_INTERVAL = 1.0
+
+# Bootstrap badge class per camera status
+STATUS_BADGES = {
+    'running': 'bg-success', 'connecting': 'bg-info', 'reconnecting': 'bg-warning', 'disconnected': 'bg-danger',
+    'slow': 'bg-warning', 'stalled': 'bg-danger', 'error': 'bg-danger', 'stopped': 'bg-secondary', 'offline': 'bg-secondary',
+}
+
+
+def _cache():
+    return caches['telemetry' if 'telemetry' in settings.CACHES else 'default']
+
+
+def _key(camera_id):
+    return f'camera_telemetry:{camera_id}'
+
+
+class CameraTelemetry:
+    def __init__(self, camera):
+        self.camera_id = camera.pk
+        self.name = camera.name
+        self.started_at = time.time()
+        self.state = 'connecting'
+        self.error = ''
+        self.backend = None
+        self.captured = deque()
+        self.processed = deque()
+        self.faces = deque()
+        self.latencies = {}
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.reconnects = 0
+        self.last_frame_at = None
+        self._published_at = 0.0
+
+    @staticmethod
+    def _trim(events, now, window):
+        while events and events[0][0] < now - window:
+            events.popleft()
+
+    def connecting(self, attempt):
+        self.state = 'connecting' if attempt == 0 else 'reconnecting'
+        if attempt:
+            self.reconnects += 1
+        self.publish(force=True)
+
+    def connected(self, backend):
+        """The capture is open on ``backend`` (e.g. 'V4L2') and delivered a frame."""
+        self.backend = backend
+        self.publish(force=True)
+
+    def frame_captured(self):
+        now = time.time()
+        self.state = 'running'
+        self.frames_captured += 1
+        self.last_frame_at = now
+        self.captured.append((now, 1))
+        self.publish()
+
+    def frame_dropped(self):
+        """A captured frame that was not run through detection."""
+        self.frames_dropped += 1
+
+    def read_failed(self):
+        self.read_failures += 1
+        self.state = 'disconnected'
+        self.publish(force=True)
+
+    def frame_processed(self, faces, **stage_seconds):
+        """A frame went through detection; ``stage_seconds`` maps stage name to latency."""
+        now = time.time()
+        self.processed.append((now, 1))
+        if faces:
+            self.faces.append((now, faces))
+        for stage, seconds in stage_seconds.items():
+            self.latencies.setdefault(stage, deque()).append((now, seconds))
+        self.publish()
+
+    def stopped(self, error=''):
+        self.state = 'error' if error else 'stopped'
+        self.error = error
+        self.publish(force=True)
+
+    def snapshot(self):
+        now = time.time()
+        for events in (self.captured, self.processed, *self.latencies.values()):
+            self._trim(events, now, WINDOW)
+        self._trim(self.faces, now, FACES_WINDOW)
+        elapsed = max(min(WINDOW, now - self.started_at), 1e-6)
+        return {
+            'camera_id': self.camera_id,
+            'name': self.name,
+            'state': self.state,
+            'error': self.error,
+            'backend': self.backend,
+            'pid': os.getpid(),
+            'fps_in': round(len(self.captured) / elapsed, 1),
+            'fps_out': round(len(self.processed) / elapsed, 1),
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+            'reconnects': self.reconnects,
+            'faces_per_minute': round(sum(count for _, count in self.faces) * 60 / max(min(FACES_WINDOW, now - self.started_at), WINDOW), 1),
+            'latency_ms': {
+                stage: round(1000 * sum(seconds for _, seconds in events) / len(events), 1)
+                for stage, events in self.latencies.items() if events
+            },
+            'last_frame_at': self.last_frame_at,
+            'updated_at': now,
+        }
+
+    def publish(self, force=False):
+        now = time.time()
+        if not force and now - self._published_at < PUBLISH_INTERVAL:
+            return
+        self._published_at = now
+        try:
+            _cache().set(_key(self.camera_id), self.snapshot(), timeout=getattr(settings, 'CAMERA_TELEMETRY_TTL', 60))
+        except Exception as e:
+            print(f"Error publishing telemetry for camera {self.name}: {e}")
+
+
+def camera_statuses(cameras):
+    """Return one dict per camera: its latest snapshot (if any) plus ``status`` and ``last_frame_age``.
+
+    ``status`` is 'offline' (no snapshot within CAMERA_TELEMETRY_TTL), 'stalled' (no frame for
+    CAMERA_STALL_SECONDS), 'slow' (capturing under CAMERA_MIN_FPS), or the pipeline state.
+    """
+    now = time.time()
+    stall_after = getattr(settings, 'CAMERA_STALL_SECONDS', 5)
+    min_fps = getattr(settings, 'CAMERA_MIN_FPS', 5)
+    snapshots = _cache().get_many([_key(camera.pk) for camera in cameras])
+    statuses = []
+    for camera in cameras:
+        stats = snapshots.get(_key(camera.pk))
+        if stats is None:
+            statuses.append({'camera_id': camera.pk, 'name': camera.name, 'status': 'offline'})
+            continue
+        stats = dict(stats, name=camera.name)
+        stats['last_frame_age'] = round(now - stats['last_frame_at'], 1) if stats['last_frame_at'] else None
+        if stats['state'] in ('stopped', 'error'):
+            stats['status'] = stats['state']
+        elif stats['last_frame_age'] is not None and stats['last_frame_age'] > stall_after:
+            # Also covers a camera thread stuck in a read, which stops publishing altogether
+            stats['status'] = 'stalled'
+        elif stats['state'] == 'running' and stats['fps_in'] < min_fps:
+            stats['status'] = 'slow'
+        else:
+            stats['status'] = stats['state']
+        statuses.append(stats)
+    return statuses
@@ -1,3 +1,937 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+import numpy as np
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import face_quality, search
+from .archive import archive_attendance, archived_before, iter_archived
+from .columnar import export_dataset
+from .attendance import record_camera_attendance
+from .edge import CentralClient, EdgeSyncError, merge_events
+from .incidents import refresh_safety_incidents
+from .models import (
+    Attendance, AttendanceEvent, CameraConfiguration, DailyAttendanceSummary, DepartmentAttendanceRollup, Employee,
+    EmployeeAttendanceRollup, SafetyIncident,
+)
+from .photos import generate_derivatives, photo_urls
+from .rollups import COUNTERS, rebuild_rollups
+from .summaries import ATTENDANCE_COUNTS, refresh_daily_summaries
+from .views.recognition import partition_filter, process_group_attendance
+
+
+def make_employee(employee_id, name=None, department='Engineering', **fields):
+    return Employee.objects.create(
+        employee_id=employee_id,
+        name=name or f'Employee {employee_id}',
+        email=f'{employee_id.lower()}@example.com',
+        phone_number='0000000000',
+        designation='Engineer',
+        department=department,
+        is_active=True,
+        **fields,
+    )
+
+
+class EmptyArchiveMixin:
+    """Point the attendance archive at an empty directory, so only the live table is read."""
+
+    def setUp(self):
+        super().setUp()
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        override = override_settings(ATTENDANCE_ARCHIVE_DIR=archive.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class GroupCheckInTests(EmptyArchiveMixin, TestCase):
+    """Every face in a kiosk frame is matched at once and the matched employees share one transaction."""
+
+    def setUp(self):
+        super().setUp()
+        self.employees = [make_employee(f'E{i}') for i in range(3)]
+        self.gallery = np.random.default_rng(0).normal(size=(3, 512)).astype(np.float32)
+        self.gallery /= np.linalg.norm(self.gallery, axis=1, keepdims=True)
+        self.names = [employee.name for employee in self.employees]
+        self.cache = {employee.name: employee for employee in self.employees}
+
+    def check(self, probes, action):
+        return process_group_attendance(probes, self.gallery, self.names, self.cache, action, threshold=0.6)
+
+    def test_checks_in_every_recognized_face_once(self):
+        stranger = -self.gallery[1]
+        probes = [self.gallery[0] + 0.01, self.gallery[2] + 0.01, self.gallery[0] - 0.01, stranger]
+        results = self.check(probes, 'check_in')
+
+        self.assertEqual(sorted(result['name'] for result in results), ['Employee E0', 'Employee E2', 'Not Recognized'])
+        self.assertTrue(all(result['success'] for result in results if result['name'] != 'Not Recognized'))
+        checked_in = Attendance.objects.filter(check_in_time__isnull=False)
+        self.assertEqual(sorted(checked_in.values_list('employee__employee_id', flat=True)), ['E0', 'E2'])
+        self.assertEqual(AttendanceEvent.objects.filter(source='kiosk', status='checked_in').count(), 2)
+
+    def test_repeated_and_out_of_order_actions_change_nothing(self):
+        self.check([self.gallery[0]], 'check_in')
+        again = self.check([self.gallery[0], self.gallery[1]], 'check_in')
+        self.assertEqual({result['name']: result['success'] for result in again}, {'Employee E0': False, 'Employee E1': True})
+        # E2 never checked in, so cannot check out
+        results = self.check([self.gallery[0], self.gallery[2]], 'check_out')
+        self.assertEqual({result['name']: result['success'] for result in results}, {'Employee E0': True, 'Employee E2': False})
+        self.assertEqual(AttendanceEvent.objects.count(), 3)
+        self.assertIsNotNone(Attendance.objects.get(employee=self.employees[0]).check_out_time)
+        self.assertIsNone(Attendance.objects.get(employee=self.employees[2]).check_in_time)
+
+
+class FaceQualityGateTests(TestCase):
+    """Each stage of the gate rejects what it is meant to, in order of cost, with per-camera thresholds."""
+
+    box = (0, 0, 100, 100)
+    frontal = np.array([[30, 40], [70, 40], [50, 60], [35, 80], [65, 80]], dtype=np.float32)
+    turned = np.array([[30, 40], [70, 40], [78, 60], [45, 80], [75, 80]], dtype=np.float32)  # Yaw 0.7
+
+    def setUp(self):
+        self.sharp = np.random.default_rng(0).integers(0, 256, size=(100, 100, 3), dtype=np.uint8)
+        self.flat = np.full((100, 100, 3), 128, dtype=np.uint8)
+
+    def test_first_failing_stage_rejects(self):
+        thresholds = face_quality.default_thresholds()
+        cases = [
+            ((self.sharp, self.box, 0.99, self.frontal), None),
+            ((self.flat, self.box, 0.5, self.turned), 'probability'),
+            ((self.flat, (0, 0, 100, 40), 0.99, self.turned), 'size'),
+            ((self.flat, self.box, 0.99, self.turned), 'pose'),
+            ((self.flat, self.box, 0.99, self.frontal), 'sharpness'),
+        ]
+        for args, stage in cases:
+            with self.subTest(stage=stage):
+                self.assertEqual(face_quality.check_face(*args, thresholds), stage)
+
+    def test_camera_thresholds_apply(self):
+        lenient = CameraConfiguration(name='side door', camera_source='0', max_yaw=0.8, min_face_size=30)
+        self.assertIsNone(face_quality.check_face(self.sharp, (0, 0, 40, 40), 0.99, self.turned, lenient.quality_thresholds()))
+        self.assertEqual(face_quality.check_face(self.sharp, (0, 0, 40, 40), 0.99, self.turned, face_quality.default_thresholds()), 'size')
+
+    @override_settings(FACE_QUALITY_THRESHOLDS={'min_sharpness': 0})
+    def test_settings_override_defaults(self):
+        thresholds = face_quality.default_thresholds()
+        self.assertEqual(thresholds['min_sharpness'], 0)
+        self.assertEqual(thresholds['max_yaw'], face_quality.DEFAULT_THRESHOLDS['max_yaw'])
+        self.assertIsNone(face_quality.check_face(self.flat, self.box, 0.99, self.frontal, thresholds))
+
+
+class TemporaryMediaMixin:
+    """Point MEDIA_ROOT at an empty directory for the test."""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+def jpeg(color, size=(400, 300)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(ATTENDANCE_PAGE_SIZE=4)
+class AttendanceListPaginationTests(EmptyArchiveMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employees = [make_employee(f'E{i}') for i in range(6)]
+        first_day = date(2026, 10, 1)
+        rows = []
+        for offset in range(3):
+            day = first_day - timedelta(days=offset)
+            for i, employee in enumerate(employees):
+                # Every third record has no check-in; the others tie in pairs on the same minute
+                check_in_time = None if i % 3 == 0 else timezone.make_aware(datetime.combine(day, time(8, i // 2)))
+                rows.append(Attendance(employee=employee, date=day, check_in_time=check_in_time))
+        # bulk_create keeps the dates (Attendance.save() stamps today's)
+        Attendance.objects.bulk_create(rows)
+
+    def expected_order(self):
+        """(-date, -check_in_time NULLS LAST, id), computed without the database's ordering."""
+        records = list(Attendance.objects.all())
+        records.sort(key=lambda record: record.pk)
+        records.sort(key=lambda record: record.check_in_time or datetime.min.replace(tzinfo=dt_timezone.utc), reverse=True)
+        records.sort(key=lambda record: record.date, reverse=True)
+        return [record.pk for record in records]
+
+    def walk(self, **params):
+        """Follow the next-page cursors from the first page; returns the record ids in page order."""
+        seen = []
+        cursor = ''
+        for _ in range(100):
+            response = self.client.get(reverse('emp_attendance_list'), dict(params, after=cursor) if cursor else params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(record.pk for record in response.context['attendance_records'])
+            cursor = response.context['next_cursor']
+            if not cursor:
+                return seen
+        self.fail("The cursors never reached a last page.")
+
+    def test_walk_returns_every_record_once_in_order(self):
+        self.assertEqual(self.walk(), self.expected_order())
+
+    def test_records_without_check_in_close_out_each_day(self):
+        order = self.walk()
+        records = Attendance.objects.in_bulk(order)
+        for day in {record.date for record in records.values()}:
+            check_ins = [records[pk].check_in_time for pk in order if records[pk].date == day]
+            self.assertEqual(check_ins[-2:], [None, None])
+            self.assertNotIn(None, check_ins[:-2])
+
+    def test_walk_with_date_filter(self):
+        order = self.walk(attendance_date='2026-09-30')
+        self.assertEqual(order, [pk for pk in self.expected_order() if Attendance.objects.get(pk=pk).date == date(2026, 9, 30)])
+
+    def test_cursor_boundary_on_a_record_without_check_in(self):
+        order = self.expected_order()
+        boundary = Attendance.objects.filter(check_in_time__isnull=True, date=date(2026, 10, 1)).order_by('id').first()
+        cursor = base64.urlsafe_b64encode(json.dumps([boundary.date.isoformat(), None, boundary.pk]).encode()).decode()
+        response = self.client.get(reverse('emp_attendance_list'), {'after': cursor})
+        following = [record.pk for record in response.context['attendance_records']]
+        self.assertEqual(following, order[order.index(boundary.pk) + 1:][:4])
+
+    def test_tampered_cursor_is_rejected(self):
+        first_page = [record.pk for record in self.client.get(reverse('emp_attendance_list')).context['attendance_records']]
+        tampered = [
+            'not a cursor',
+            base64.urlsafe_b64encode(b'{"date": "2026-10-01"}').decode(),
+            base64.urlsafe_b64encode(json.dumps(['2026-13-45', None, 1]).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps(['2026-10-01', 'yesterday', 1]).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps(['2026-10-01', None, 'DROP TABLE']).encode()).decode(),
+            base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+        ]
+        for cursor in tampered:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('emp_attendance_list'), {'after': cursor})
+                self.assertEqual(response.status_code, 200)
+                # Ignored: the list starts over rather than seeking somewhere arbitrary
+                self.assertTrue(response.context['is_first_page'])
+                self.assertEqual([record.pk for record in response.context['attendance_records']], first_page)
+
+    def test_invalid_date_filter_is_ignored(self):
+        for value in ('bogus', '2026-02-30'):
+            with self.subTest(value=value):
+                response = self.client.get(reverse('emp_attendance_list'), {'attendance_date': value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['date_filter'], '')
+
+
+@override_settings(ATTENDANCE_EXPORT_CHUNK_SIZE=2)
+class AttendanceExportTests(EmptyArchiveMixin, TestCase):
+    """CSV and XLSX downloads of the attendance list, read in chunks and streamed in list order."""
+
+    expected = [
+        ['Employee Name', 'Employee ID', 'Attendance Date', 'Check-in Time', 'Check-out Time', 'Stayed Time'],
+        ['Employee E1', 'E1', '2026-10-01', '09:15:00 AM', 'Not Checked Out', 'Not Checked Out'],
+        ['Employee E0', 'E0', '2026-10-01', '08:00:00 AM', '04:30:15 PM', '8h 30m 15s'],
+        ['Employee E2', 'E2', '2026-10-01', 'Not Checked In', 'Not Checked Out', 'Not Checked Out'],
+        ['Employee E0', 'E0', '2026-09-30', '07:45:00 AM', '12:00:00 PM', '4h 15m 0s'],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        first, second, third = (make_employee(f'E{i}') for i in range(3))
+        day, day_before = date(2026, 10, 1), date(2026, 9, 30)
+
+        def at(day, *clock):
+            return datetime.combine(day, time(*clock), tzinfo=dt_timezone.utc)
+
+        Attendance.objects.bulk_create([
+            Attendance(employee=first, date=day, check_in_time=at(day, 8, 0), check_out_time=at(day, 16, 30, 15)),
+            Attendance(employee=second, date=day, check_in_time=at(day, 9, 15)),
+            Attendance(employee=third, date=day),
+            Attendance(employee=first, date=day_before, check_in_time=at(day_before, 7, 45), check_out_time=at(day_before, 12, 0)),
+        ])
+
+    def download(self, report_format, **params):
+        response = self.client.get(reverse('emp_attendance_list'), dict(params, download_report=report_format))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        self.assertEqual(list(csv.reader(io.StringIO(self.download('csv').decode()))), self.expected)
+
+    def test_csv_with_date_filter(self):
+        rows = list(csv.reader(io.StringIO(self.download('csv', attendance_date='2026-09-30').decode())))
+        self.assertEqual(rows, [self.expected[0], self.expected[-1]])
+
+    def test_xlsx_has_the_csv_rows(self):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(io.BytesIO(self.download('xlsx')), read_only=True)
+        rows = [
+            [value.date().isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in workbook['Attendance'].iter_rows(values_only=True)
+        ]
+        self.assertEqual(rows, self.expected)
+
+
+class IncrementalAggregateTests(EmptyArchiveMixin, TestCase):
+    """Summaries and rollups kept current by the Attendance signals must equal a full rebuild."""
+
+    def setUp(self):
+        super().setUp()
+        self.employees = [
+            make_employee(f'E{i}', department='Engineering' if i < 3 else 'Operations') for i in range(5)
+        ]
+        self.today = timezone.localdate()
+        self.morning = timezone.make_aware(datetime.combine(self.today, time(8, 0)))
+
+    def summaries(self):
+        return {
+            summary.department: (summary.headcount, *(getattr(summary, field) for field in ATTENDANCE_COUNTS))
+            for summary in DailyAttendanceSummary.objects.filter(date=self.today)
+        }
+
+    def rollups(self):
+        # Rows whose counters are all zero say nothing a missing row would not
+        employees = {
+            (rollup.employee_id, rollup.period, rollup.period_start): tuple(getattr(rollup, counter) for counter in COUNTERS)
+            for rollup in EmployeeAttendanceRollup.objects.all()
+            if any(getattr(rollup, counter) for counter in COUNTERS)
+        }
+        departments = {
+            (rollup.department, rollup.period, rollup.period_start): (
+                rollup.employees_present, *(getattr(rollup, counter) for counter in COUNTERS)
+            )
+            for rollup in DepartmentAttendanceRollup.objects.all()
+            if rollup.employees_present or any(getattr(rollup, counter) for counter in COUNTERS)
+        }
+        return employees, departments
+
+    def assertMatchesRebuild(self):
+        incremental = self.summaries(), self.rollups()
+        refresh_daily_summaries(self.today)
+        rebuild_rollups()
+        self.assertEqual(incremental, (self.summaries(), self.rollups()))
+
+    def test_check_ins_and_check_outs(self):
+        for i, employee in enumerate(self.employees[:4]):
+            attendance = Attendance.objects.create(employee=employee, date=self.today)
+            attendance.mark_check_in(at=self.morning + timedelta(hours=i))  # Two of them late
+        Attendance.objects.create(employee=self.employees[4], date=self.today)  # No check-in yet
+        for attendance in Attendance.objects.filter(employee__in=self.employees[:2]):
+            attendance.mark_check_out(at=self.morning + timedelta(hours=9))
+        self.assertMatchesRebuild()
+        self.assertEqual(self.summaries()['Engineering'], (3, 3, 0, 1))
+
+    def test_updates(self):
+        attendances = []
+        for employee in self.employees:
+            attendance = Attendance.objects.create(employee=employee, date=self.today)
+            attendance.mark_check_in(at=self.morning)
+            attendances.append(attendance)
+        # Loaded from the database: the signal applies the delta from the stored times
+        loaded = Attendance.objects.get(pk=attendances[0].pk)
+        loaded.check_out_time = self.morning + timedelta(hours=8)
+        loaded.save()
+        loaded.check_out_time = self.morning + timedelta(hours=6)
+        loaded.save()
+        loaded = Attendance.objects.get(pk=attendances[3].pk)
+        loaded.check_in_time = None
+        loaded.save()
+        # Saved without being loaded: the previous state is unknown and the row is recomputed
+        detached = Attendance(pk=attendances[1].pk, employee=self.employees[1], date=self.today,
+                              check_in_time=self.morning + timedelta(hours=3), check_out_time=self.morning + timedelta(hours=10))
+        detached.save()
+        self.assertMatchesRebuild()
+
+    def test_deletes(self):
+        for employee in self.employees:
+            attendance = Attendance.objects.create(employee=employee, date=self.today)
+            attendance.mark_check_in(at=self.morning)
+            if employee.employee_id in ('E0', 'E3'):
+                attendance.mark_check_out(at=self.morning + timedelta(hours=8))
+        Attendance.objects.get(employee=self.employees[0]).delete()
+        Attendance.objects.get(employee=self.employees[4]).delete()
+        Attendance.objects.create(employee=self.employees[4], date=self.today)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.summaries()['Operations'], (2, 1, 1, 0))
+
+    def test_employee_leaving_updates_headcount(self):
+        for employee in self.employees:
+            Attendance.objects.create(employee=employee, date=self.today).mark_check_in(at=self.morning)
+        self.employees[2].delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(self.summaries()['Engineering'][:2], (2, 2))
+
+
+class SafetyIncidentTests(EmptyArchiveMixin, TestCase):
+    """The database refresh flags what the per-record loop on the safety page used to, plus absentees."""
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.employees = {employee.employee_id: employee for employee in (make_employee(f'E{i}') for i in range(6))}
+        Employee.objects.filter(employee_id='E5').update(is_active=False)  # Absent, but no longer employed
+        Attendance.objects.create(employee=self.employees['E0'], date=self.today)  # Never checked in
+        Attendance.objects.create(employee=self.employees['E1'], date=self.today, check_in_time=self.at(7))
+        Attendance.objects.create(employee=self.employees['E2'], date=self.today, check_in_time=self.at(12))
+        Attendance.objects.create(employee=self.employees['E3'], date=self.today, check_in_time=self.at(8), check_out_time=self.at(17))
+        # E4 has no attendance at all
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.today, time(hour, minute)))
+
+    def incidents(self):
+        return set(SafetyIncident.objects.filter(date=self.today).values_list('employee__employee_id', 'kind'))
+
+    def per_record_incidents(self, current_time):
+        """What the safety page's old Python loop over today's attendance reported."""
+        incidents = set()
+        for attendance in Attendance.objects.filter(date=self.today).select_related('employee'):
+            if not attendance.check_in_time:
+                incidents.add((attendance.employee.employee_id, SafetyIncident.MISSING_CHECK_IN))
+            elif not attendance.check_out_time and (current_time - attendance.check_in_time).total_seconds() > 28800:
+                incidents.add((attendance.employee.employee_id, SafetyIncident.MISSING_CHECK_OUT))
+        return incidents
+
+    def test_matches_the_per_record_loop_plus_absentees(self):
+        evening = self.at(18)
+        self.assertEqual(refresh_safety_incidents(self.today, evening), (3, 0))
+        self.assertEqual(self.incidents(), self.per_record_incidents(evening) | {('E4', SafetyIncident.ABSENT)})
+        self.assertEqual(SafetyIncident.objects.get(kind=SafetyIncident.MISSING_CHECK_OUT).since, self.at(7))
+        # Nothing changed, so nothing to do
+        self.assertEqual(refresh_safety_incidents(self.today, evening), (0, 0))
+
+    def test_no_absentees_before_the_cutoff(self):
+        morning = self.at(9)
+        refresh_safety_incidents(self.today, morning)
+        self.assertEqual(self.incidents(), self.per_record_incidents(morning))
+
+    def test_resolves_incidents_that_no_longer_hold(self):
+        refresh_safety_incidents(self.today, self.at(18))
+        Attendance.objects.get(employee=self.employees['E0']).mark_check_in(at=self.at(17))
+        Attendance.objects.get(employee=self.employees['E1']).mark_check_out(at=self.at(17, 30))
+        Attendance.objects.create(employee=self.employees['E4'], date=self.today, check_in_time=self.at(17, 45))
+        self.assertEqual(refresh_safety_incidents(self.today, self.at(18, 30)), (0, 3))
+        self.assertEqual(self.incidents(), set())
+
+
+class EmployeeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.smith = make_employee('E100', name='Jane Smith', department='Engineering')
+        cls.obrien = make_employee('E200', name="Liam O'Brien", department='Operations')
+        cls.renamed = make_employee('E300', name='Old Name', department='Sales')
+        cls.renamed.name = 'Ana Lopez'
+        cls.renamed.save()
+
+    def setUp(self):
+        search._fts_ready.clear()
+        self.addCleanup(search._fts_ready.clear)
+
+    def matches(self, text):
+        return set(Employee.objects.filter(pk__in=search.matching_employee_ids(text)).values_list('employee_id', flat=True))
+
+    def test_uses_fts_index(self):
+        self.assertTrue(search.fts_available())
+        self.assertEqual(self.matches('jane'), {'E100'})
+        self.assertEqual(self.matches('sm ja'), {'E100'})  # Every word is a prefix
+        self.assertEqual(self.matches('operations'), {'E200'})
+        self.assertEqual(self.matches('e300'), {'E300'})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.assertEqual(self.matches('lopez'), {'E300'})
+        self.assertEqual(self.matches('old'), set())
+        self.obrien.delete()
+        self.assertEqual(self.matches('liam'), set())
+
+    def test_special_characters(self):
+        self.assertEqual(search.build_match_query('"o\'br*" AND -x'), '"o"* "br"* "and"* "x"*')
+        self.assertEqual(self.matches("o'brien"), {'E200'})
+        for text in ('"', '*', 'NEAR(', 'a OR', '^', "'; DROP TABLE app1_employee; --"):
+            with self.subTest(text=text):
+                self.matches(text)  # No FTS5 syntax error
+        self.assertEqual(self.matches('*'), set())
+        self.assertEqual(Employee.objects.count(), 3)
+
+    def test_falls_back_to_icontains_without_fts_table(self):
+        with connection.cursor() as cursor:
+            for trigger in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_{trigger}")
+            cursor.execute(f"DROP TABLE {search.FTS_TABLE}")
+        self.assertFalse(search.fts_available())
+        self.assertEqual(self.matches('smi'), {'E100'})
+        self.assertEqual(self.matches("O'Bri"), {'E200'})
+        self.assertEqual(self.matches('SALES'), {'E300'})
+        self.assertEqual(self.matches('nobody'), set())
+
+
+class ConcurrentAttendanceWriteTests(TransactionTestCase):
+    """Camera threads writing at once through the single-writer gate must not lose a check-in or check-out."""
+
+    writers = 50
+    employees_per_writer = 4
+
+    def write(self, employees, barrier, at, check_out_at, errors):
+        try:
+            barrier.wait()
+            for current_time in (at, check_out_at):
+                for employee in employees:
+                    status = record_camera_attendance(employee, current_time, 'stress')
+                    if status not in ('checked_in', 'checked_out'):
+                        errors.append(f'{employee.employee_id}: {status}')
+        except Exception as e:
+            errors.append(repr(e))
+        finally:
+            connections.close_all()
+
+    @override_settings(SQLITE_PRODUCTION_MODE=True)
+    def test_parallel_writers_lose_nothing(self):
+        self.assertFalse(connection.is_in_memory_db())
+        employees = [make_employee(f'S{i:03d}') for i in range(self.writers * self.employees_per_writer)]
+        at = timezone.make_aware(datetime.combine(timezone.localdate(), time(8, 0)))
+        barrier, errors = threading.Barrier(self.writers), []
+        threads = [
+            threading.Thread(target=self.write, args=(employees[i::self.writers], barrier, at, at + timedelta(hours=9), errors))
+            for i in range(self.writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Attendance.objects.filter(check_in_time=at).count(), len(employees))
+        self.assertEqual(Attendance.objects.filter(check_out_time=at + timedelta(hours=9)).count(), len(employees))
+        self.assertEqual(AttendanceEvent.objects.filter(source='stress').count(), 2 * len(employees))
+
+
+class ArchiveTests(EmptyArchiveMixin, TestCase):
+    """Old attendance moves to the Parquet archive intact, and the list and exports read across both."""
+
+    before = date(2026, 3, 1)
+    columns = (
+        'id', 'employee_id', 'employee__name', 'employee__employee_id', 'employee__department',
+        'date', 'check_in_time', 'check_out_time',
+    )
+
+    def setUp(self):
+        super().setUp()
+        employees = [make_employee(f'E{i}', department='Engineering' if i else 'Operations') for i in range(2)]
+        rows = []
+        for day in (date(2026, 1, 30), date(2026, 2, 2), date(2026, 2, 3), date(2026, 10, 1), date(2026, 10, 2)):
+            for i, employee in enumerate(employees):
+                check_in_time = timezone.make_aware(datetime.combine(day, time(8 + i, 0)))
+                rows.append(Attendance(
+                    employee=employee, date=day, check_in_time=check_in_time,
+                    check_out_time=check_in_time + timedelta(hours=8) if i else None,
+                ))
+        Attendance.objects.bulk_create(rows)
+
+    def list_order(self):
+        """Record ids in the attendance list order (-date, -check_in_time, id), read before archiving."""
+        return list(Attendance.objects.order_by('-date', '-check_in_time', 'id').values_list('id', flat=True))
+
+    def test_round_trip(self):
+        old = set(Attendance.objects.filter(date__lt=self.before).values_list(*self.columns))
+        self.assertEqual(archive_attendance(self.before), {'2026-01': 2, '2026-02': 4})
+
+        self.assertEqual(archived_before(), self.before)
+        self.assertFalse(Attendance.objects.filter(date__lt=self.before).exists())
+        self.assertEqual(Attendance.objects.count(), 4)
+        self.assertEqual(set(iter_archived()), old)
+        self.assertEqual(set(iter_archived(date=date(2026, 2, 2))), {row for row in old if row[5] == date(2026, 2, 2)})
+        # Nothing left to archive
+        self.assertEqual(archive_attendance(self.before), {})
+
+    def test_dry_run_changes_nothing(self):
+        self.assertEqual(archive_attendance(self.before, dry_run=True), {'2026-01': 2, '2026-02': 4})
+        self.assertIsNone(archived_before())
+        self.assertEqual(Attendance.objects.count(), 10)
+
+    @override_settings(ATTENDANCE_PAGE_SIZE=3)
+    def test_list_pages_continue_into_the_archive(self):
+        expected = self.list_order()
+        archive_attendance(self.before)
+        seen, cursor = [], ''
+        while True:
+            response = self.client.get(reverse('emp_attendance_list'), {'after': cursor} if cursor else {})
+            seen.extend(record.pk for record in response.context['attendance_records'])
+            cursor = response.context['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(reverse('emp_attendance_list'), {'attendance_date': '2026-02-03'})
+        self.assertEqual([record.employee.employee_id for record in response.context['attendance_records']], ['E1', 'E0'])
+
+    def test_csv_export_includes_archived_days(self):
+        archive_attendance(self.before)
+        response = self.client.get(reverse('emp_attendance_list'), {'download_report': 'csv'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))[1:]
+        self.assertEqual([row[2] for row in rows], ['2026-10-02'] * 2 + ['2026-10-01'] * 2 + ['2026-02-03'] * 2
+                         + ['2026-02-02'] * 2 + ['2026-01-30'] * 2)
+
+
+class ColumnarExportTests(EmptyArchiveMixin, TestCase):
+    """Parquet and Arrow exports hold every record once, typed, whether it is archived or live."""
+
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee('E1')
+        self.check_in = {}
+        rows = []
+        # Two archived days and two live ones; the second of each has a check-out
+        for i, day in enumerate((date(2026, 1, 30), date(2026, 2, 2), date(2026, 10, 1), date(2026, 10, 2))):
+            self.check_in[day] = timezone.make_aware(datetime.combine(day, time(8, 0)))
+            rows.append(Attendance(
+                employee=self.employee, date=day, check_in_time=self.check_in[day],
+                check_out_time=self.check_in[day] + timedelta(hours=8, minutes=30) if i % 2 else None,
+            ))
+        Attendance.objects.bulk_create(rows)
+        archive_attendance(date(2026, 3, 1))
+
+    def export(self, file_format='parquet', **dates):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = io.BytesIO()
+        rows = export_dataset('attendance', sink, file_format, **dates)
+        sink.seek(0)
+        table = pq.read_table(sink) if file_format == 'parquet' else pa.ipc.open_file(sink).read_all()
+        self.assertEqual(table.num_rows, rows)
+        return table.to_pylist()
+
+    def test_archived_and_live_rows_once_each(self):
+        for file_format in ('parquet', 'arrow'):
+            with self.subTest(file_format=file_format):
+                rows = self.export(file_format)
+                self.assertEqual([row['date'] for row in rows], sorted(self.check_in))
+                self.assertEqual([row['check_in_time'] for row in rows], [self.check_in[day] for day in sorted(self.check_in)])
+                self.assertEqual([row['duration_seconds'] for row in rows], [None, 30600, None, 30600])
+                self.assertEqual({row['employee_code'] for row in rows}, {'E1'})
+
+    def test_date_range_spanning_the_watermark(self):
+        rows = self.export(start=date(2026, 2, 1), end=date(2026, 10, 1))
+        self.assertEqual([row['date'] for row in rows], [date(2026, 2, 2), date(2026, 10, 1)])
+
+    def test_endpoint_is_for_superusers(self):
+        from django.contrib.auth import get_user_model
+
+        url = reverse('columnar_export')
+        user = get_user_model().objects.create_user('staff', password='secret')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user.is_superuser = True
+        user.save()
+        response = self.client.get(url, {'format': 'arrow', 'start': '2026-02-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.file')
+        self.assertEqual(self.client.get(url, {'format': 'csv'}).status_code, 400)
+
+
+class PhotoThumbnailTests(TemporaryMediaMixin, TestCase):
+    """Thumbnails are small squares named by their content, so they can be cached forever."""
+
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee('E1')
+        self.employee.profile_picture.save('snapshot.jpg', ContentFile(jpeg('red')))
+
+    def thumbnails(self):
+        self.employee.refresh_from_db()
+        return self.employee.profile_thumbnail.name, self.employee.profile_thumbnail_webp.name
+
+    def test_square_thumbnails_named_by_content(self):
+        from PIL import Image
+
+        self.assertTrue(generate_derivatives(self.employee))
+        jpeg_name, webp_name = self.thumbnails()
+        self.assertRegex(jpeg_name, r'^employees/thumbs/E1-[0-9a-f]{12}\.jpg$')
+        self.assertRegex(webp_name, r'^employees/thumbs/E1-[0-9a-f]{12}\.webp$')
+        for field in (self.employee.profile_thumbnail, self.employee.profile_thumbnail_webp):
+            with Image.open(field.path) as image:
+                self.assertEqual(image.size, (128, 128))
+        self.assertEqual(photo_urls(self.employee), ('/media/' + jpeg_name, '/media/' + webp_name))
+
+        # Same picture, same names: nothing new is written
+        generate_derivatives(self.employee)
+        self.assertEqual(self.thumbnails(), (jpeg_name, webp_name))
+        self.assertEqual(len(self.employee.profile_thumbnail.storage.listdir('employees/thumbs')[1]), 2)
+
+    def test_new_picture_replaces_the_thumbnails(self):
+        generate_derivatives(self.employee)
+        old = self.thumbnails()
+        self.employee.profile_picture.save('snapshot.jpg', ContentFile(jpeg('blue')))
+        generate_derivatives(self.employee)
+        new = self.thumbnails()
+        self.assertNotEqual(new[0], old[0])
+        self.assertEqual(sorted(self.employee.profile_thumbnail.storage.listdir('employees/thumbs')[1]),
+                         sorted(name.rsplit('/', 1)[-1] for name in new))
+
+    def test_thumbnails_are_served_immutable(self):
+        generate_derivatives(self.employee)
+        response = self.client.get(photo_urls(self.employee)[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_employee_without_picture_gets_the_default_photo(self):
+        employee = make_employee('E2')
+        self.assertFalse(generate_derivatives(employee))
+        self.assertEqual(photo_urls(employee), ('/static/default_profile.png', None))
+
+
+class ContentAddressedMediaTests(TemporaryMediaMixin, TestCase):
+    """Identical enrollment images share one file; cleanup_media removes only what nothing references."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = Employee._meta.get_field('profile_picture').storage
+
+    def stored_files(self):
+        return sorted(self.storage.listdir('employees')[1])
+
+    def write_upload(self, name, content):
+        # A file saved under its upload name, as before content addressing
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_same_bytes_stored_once(self):
+        first, second = make_employee('E1'), make_employee('E2')
+        first.profile_picture.save('a.jpg', ContentFile(jpeg('red')))
+        second.profile_picture.save('b.JPG', ContentFile(jpeg('red')))
+        self.assertEqual(first.profile_picture.name, second.profile_picture.name)
+        self.assertRegex(first.profile_picture.name, r'^employees/[0-9a-f]{64}\.jpg$')
+
+        make_employee('E3').profile_picture.save('a.jpg', ContentFile(jpeg('blue')))
+        self.assertEqual(len(self.stored_files()), 2)
+
+    def test_cleanup_reports_then_deletes_orphans(self):
+        employee = make_employee('E1')
+        employee.profile_picture.save('a.jpg', ContentFile(jpeg('red')))
+        orphan = self.write_upload('employees/001_HZjFPA4.jpg', jpeg('green'))
+
+        out = io.StringIO()
+        call_command('cleanup_media', stdout=out)
+        self.assertIn('Orphaned: ' + orphan, out.getvalue())
+        self.assertIn('1 orphaned files', out.getvalue())
+        self.assertTrue(os.path.exists(orphan))
+
+        call_command('cleanup_media', '--delete', stdout=io.StringIO())
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(self.stored_files(), [employee.profile_picture.name.split('/')[-1]])
+
+    def test_rehash_moves_upload_names_and_merges_duplicates(self):
+        content = jpeg('red')
+        employee = make_employee('E1')
+        employee.profile_picture.save('a.jpg', ContentFile(content))
+        legacy = make_employee('E2')
+        self.write_upload('employees/001_HZjFPA4.jpg', content)
+        Employee.objects.filter(pk=legacy.pk).update(profile_picture='employees/001_HZjFPA4.jpg')
+
+        call_command('cleanup_media', '--rehash', '--delete', stdout=io.StringIO())
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.profile_picture.name, employee.profile_picture.name)
+        self.assertEqual(self.stored_files(), [employee.profile_picture.name.split('/')[-1]])
+
+
+@override_settings(EVENT_STREAM_SECONDS=0.05, EVENT_STREAM_POLL_INTERVAL=0.01)
+class AttendanceEventStreamTests(TestCase):
+    """The dashboard stream resumes after the Last-Event-ID a reconnecting browser sends."""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.client.force_login(get_user_model().objects.create_user('staff', password='secret'))
+        employee = make_employee('E1')
+        at = timezone.now()
+        self.events = [
+            AttendanceEvent.objects.create(
+                employee=employee, name=employee.name, status=status, source='gate', occurred_at=at + timedelta(minutes=i),
+            )
+            for i, status in enumerate(['checked_in', 'checked_out', 'checked_in'])
+        ]
+
+    def stream(self, **headers):
+        response = self.client.get(reverse('attendance_events'), **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_resumes_after_last_event_id(self):
+        body = self.stream(HTTP_LAST_EVENT_ID=str(self.events[0].id))
+        self.assertTrue(body.startswith('retry: 30\n\n'))
+        self.assertNotIn(f'id: {self.events[0].id}\n', body)
+        for event in self.events[1:]:
+            self.assertIn(f'id: {event.id}\nevent: attendance\n', body)
+        payloads = [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+        self.assertEqual([payload['status'] for payload in payloads], ['checked_out', 'checked_in'])
+
+    def test_new_stream_starts_after_the_latest_event(self):
+        for headers in ({}, {'HTTP_LAST_EVENT_ID': 'garbage'}):
+            with self.subTest(headers=headers):
+                self.assertNotIn('event: attendance', self.stream(**headers))
+
+
+def edge_event(employee_id, status, at, **fields):
+    return dict({
+        'event_id': uuid.uuid4(), 'employee_id': employee_id, 'name': f'Employee {employee_id}', 'status': status,
+        'source': 'gate', 'distance': 0.3, 'occurred_at': at, 'date': timezone.localdate(at),
+    }, **fields)
+
+
+class MergeEdgeEventsTests(EmptyArchiveMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = make_employee('E1'), make_employee('E2')
+        self.morning = timezone.make_aware(datetime(2026, 10, 5, 8, 0))
+        self.day = timezone.localdate(self.morning)
+
+    def test_same_batch_twice_is_stored_once(self):
+        events = [
+            edge_event('E1', 'checked_in', self.morning + timedelta(minutes=5)),
+            edge_event('E1', 'checked_in', self.morning),  # Earliest check-in wins, whatever the order
+            edge_event('E1', 'checked_out', self.morning + timedelta(hours=8)),
+            edge_event('E1', 'checked_out', self.morning + timedelta(hours=9)),  # Latest check-out wins
+            edge_event('E2', 'checked_in', self.morning + timedelta(hours=1)),
+            edge_event('E9', 'checked_in', self.morning),  # Not known here
+        ]
+        events.append(dict(events[0]))  # Repeated within the batch
+        first = merge_events('site-a', events)
+        self.assertEqual((first['received'], first['stored'], first['duplicates']), (7, 6, 1))
+        self.assertEqual(first['unknown_employees'], ['E9'])
+        self.assertEqual((first['attendance_created'], first['attendance_updated']), (2, 0))
+
+        second = merge_events('site-a', events)
+        self.assertEqual((second['stored'], second['duplicates']), (0, 7))
+        self.assertEqual((second['attendance_created'], second['attendance_updated']), (0, 0))
+
+        self.assertEqual(AttendanceEvent.objects.count(), 6)
+        self.assertEqual(AttendanceEvent.objects.filter(employee__isnull=True, node='site-a').count(), 1)
+        self.assertEqual(Attendance.objects.count(), 2)
+        attendance = Attendance.objects.get(employee=self.first)
+        self.assertEqual((attendance.date, attendance.check_in_time, attendance.check_out_time),
+                         (self.day, self.morning, self.morning + timedelta(hours=9)))
+        self.assertEqual(Attendance.objects.get(employee=self.second).check_out_time, None)
+
+    def test_merges_into_existing_attendance(self):
+        Attendance.objects.bulk_create([Attendance(
+            employee=self.first, date=self.day, check_in_time=self.morning + timedelta(minutes=30),
+            check_out_time=self.morning + timedelta(hours=10),
+        )])
+        result = merge_events('site-a', [
+            edge_event('E1', 'checked_in', self.morning),
+            edge_event('E1', 'checked_out', self.morning + timedelta(hours=9)),
+        ])
+        self.assertEqual((result['attendance_created'], result['attendance_updated']), (0, 1))
+        attendance = Attendance.objects.get(employee=self.first)
+        self.assertEqual((attendance.check_in_time, attendance.check_out_time), (self.morning, self.morning + timedelta(hours=10)))
+
+
+class TestClientCentral(CentralClient):
+    """A CentralClient whose central server is this test's, reached through the Django test client."""
+
+    def __init__(self, client, token):
+        self.client = client
+        self.token = token
+        self.url = 'http://testserver/'
+
+    def request(self, method, path, data=None, headers=None, **kwargs):
+        headers = dict(headers or {})
+        response = self.client.generic(
+            method, path, data or b'', content_type=headers.pop('Content-Type', 'application/json'),
+            HTTP_AUTHORIZATION=f'Bearer {self.token}', HTTP_CONTENT_ENCODING=headers.pop('Content-Encoding', ''),
+        )
+        if response.status_code != 200:
+            raise EdgeSyncError(f"{method} {path} failed with HTTP {response.status_code}")
+        return response
+
+
+@override_settings(EDGE_SYNC_TOKEN='sync-token', EDGE_NODE_ID='site-a')
+class PushEdgeEventsTests(EmptyArchiveMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        employee = make_employee('E1')
+        start = timezone.make_aware(datetime(2026, 10, 5, 8, 0))
+        AttendanceEvent.objects.bulk_create([
+            AttendanceEvent(employee=employee, name=employee.name, status='checked_in', source='gate', occurred_at=start + timedelta(days=day))
+            for day in range(5)
+        ])
+
+    def test_marks_pushed_events_synced(self):
+        client = TestClientCentral(self.client, 'sync-token')
+        totals = client.push_events(batch_size=2)
+        self.assertEqual((totals['batches'], totals['received']), (3, 5))
+        self.assertFalse(AttendanceEvent.objects.filter(synced_at__isnull=True).exists())
+        # Nothing left in the outbox
+        self.assertEqual(client.push_events(batch_size=2)['batches'], 0)
+
+    def test_failed_push_leaves_events_unsynced(self):
+        with self.assertRaises(EdgeSyncError):
+            TestClientCentral(self.client, 'wrong-token').push_events(batch_size=2)
+        self.assertEqual(AttendanceEvent.objects.filter(synced_at__isnull=True).count(), 5)
+
+    def test_events_from_other_nodes_are_not_pushed(self):
+        AttendanceEvent.objects.update(node='site-b')
+        self.assertEqual(TestClientCentral(self.client, 'sync-token').push_events()['batches'], 0)
+
+    def test_ingest_rejects_invalid_distance(self):
+        payload = {'node': 'site-b', 'events': [{
+            'event_id': uuid.uuid4().hex, 'employee_id': 'E1', 'status': 'checked_in',
+            'occurred_at': '2026-10-05T08:00:00+00:00', 'distance': 'close',
+        }]}
+        response = self.client.post(
+            reverse('edge_ingest'), json.dumps(payload), content_type='application/json', HTTP_AUTHORIZATION='Bearer sync-token',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AttendanceEvent.objects.filter(node='site-b').exists())
+
+
+class GalleryPartitionTests(TestCase):
+    """A camera's gallery is the union of its departments, its site and its listed employees."""
+
+    def setUp(self):
+        self.ops = make_employee('E1', department='Ops')
+        self.engineer = make_employee('E2', department='Engineering', site='Plant A')
+        self.listed = make_employee('E3', department='Finance')
+        self.other = make_employee('E4', department='Finance', site='Plant B')
+
+    def test_partition_key_is_normalised(self):
+        camera = CameraConfiguration.objects.create(
+            name='Gate', camera_source='0', gallery_departments=' Ops, Engineering,,Ops ', gallery_site='Plant A',
+        )
+        camera.gallery_employees.add(self.other, self.listed)
+        self.assertEqual(
+            camera.gallery_partition(), (('Engineering', 'Ops'), 'Plant A', tuple(sorted([self.listed.pk, self.other.pk]))),
+        )
+        self.assertIsNone(CameraConfiguration.objects.create(name='Lobby', camera_source='1').gallery_partition())
+
+    def test_partition_filter_selects_the_union(self):
+        cases = [
+            ((('Ops',), '', ()), {'E1'}),
+            (((), 'Plant A', ()), {'E2'}),
+            (((), '', (self.listed.pk,)), {'E3'}),
+            ((('Ops',), 'Plant A', (self.listed.pk,)), {'E1', 'E2', 'E3'}),
+        ]
+        for partition, expected in cases:
+            with self.subTest(partition=partition):
+                employees = Employee.objects.filter(partition_filter(partition))
+                self.assertEqual(set(employees.values_list('employee_id', flat=True)), expected)
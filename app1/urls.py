@@ -1,38 +1,52 @@
 from django.urls import path
-from . import views
+from .views import edge, management, recognition, reporting
 
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('dashboard/', views.dashboard, name='dashboard'),
-    path('safety/', views.safety, name='safety'),
+    path('', management.home, name='home'),
+    path('dashboard/', reporting.dashboard, name='dashboard'),
+    path('dashboard/events/', reporting.attendance_events, name='attendance_events'),
+    path('safety/', reporting.safety, name='safety'),
     
     # Employee Registration
-    path('register/', views.register_employee, name='register_employee'),
-    path('register/success/', views.register_success, name='register_success'),
+    path('register/', management.register_employee, name='register_employee'),
+    path('register/success/', management.register_success, name='register_success'),
     
     # Web-based Attendance
-    path('attendance/mark/', views.mark_attendance_camera, name='mark_attendance_camera'),
-    path('attendance/process/', views.process_attendance, name='process_attendance'),
+    path('attendance/mark/', recognition.mark_attendance_camera, name='mark_attendance_camera'),
+    path('attendance/process/', recognition.process_attendance, name='process_attendance'),
 
     # Attendance List
-    path('attendance/list/', views.emp_attendance_list, name='emp_attendance_list'),
+    path('attendance/list/', reporting.emp_attendance_list, name='emp_attendance_list'),
+    path('attendance/report/', reporting.attendance_report, name='attendance_report'),
+    path('attendance/export/', reporting.columnar_export, name='columnar_export'),
     
     # Employee Management
-    path('employees/', views.employee_list, name='employee_list'),
-    path('employees/<int:pk>/', views.emp_detail, name='emp_detail'),
-    path('employees/<int:pk>/authorize/', views.emp_authorize, name='emp_authorize'),
-    path('employees/<int:pk>/delete/', views.emp_delete, name='emp_delete'),
+    path('employees/', management.employee_list, name='employee_list'),
+    path('employees/<int:pk>/', management.emp_detail, name='emp_detail'),
+    path('employees/<int:pk>/authorize/', management.emp_authorize, name='emp_authorize'),
+    path('employees/<int:pk>/delete/', management.emp_delete, name='emp_delete'),
     
     # Auth
-    path('login/', views.user_login, name='login'),
-    path('logout/', views.user_logout, name='logout'),
+    path('login/', management.user_login, name='login'),
+    path('logout/', management.user_logout, name='logout'),
     
     # Camera Configuration
-    path('cameras/', views.camera_config_list, name='camera_config_list'),
-    path('cameras/create/', views.camera_config_create, name='camera_config_create'),
-    path('cameras/<int:pk>/update/', views.camera_config_update, name='camera_config_update'),
-    path('cameras/<int:pk>/delete/', views.camera_config_delete, name='camera_config_delete'),
+    path('cameras/', management.camera_config_list, name='camera_config_list'),
+    path('cameras/create/', management.camera_config_create, name='camera_config_create'),
+    path('cameras/<int:pk>/update/', management.camera_config_update, name='camera_config_update'),
+    path('cameras/<int:pk>/delete/', management.camera_config_delete, name='camera_config_delete'),
+    path('cameras/status/', management.camera_status, name='camera_status'),
+    path('cameras/status/data/', management.camera_status_data, name='camera_status_data'),
+
+    # Request profiles
+    path('profiles/', management.request_profiles, name='request_profiles'),
+    path('profiles/<str:name>', management.request_profile_download, name='request_profile_download'),
+
+    # Edge-node sync (central server side)
+    path('edge/ingest/', edge.edge_ingest, name='edge_ingest'),
+    path('edge/gallery/', edge.edge_gallery, name='edge_gallery'),
+    path('edge/gallery/<str:name>', edge.edge_gallery_picture, name='edge_gallery_picture'),
     
     # Old OpenCV view (kept for backend processing if needed, but not user-facing)
-    path('capture/', views.capture_and_recognize, name='capture_and_recognize'),
+    path('capture/', recognition.capture_and_recognize, name='capture_and_recognize'),
 ]
@@ -0,0 +1,14 @@
+"""Views, split by what they need loaded.
+
+* ``recognition`` -- the face gallery, detection and matching, the kiosk
+  endpoint and the camera loop. The ML stack is imported on first use.
+* ``management`` -- employee registration and management, cameras, login
+  and other admin pages.
+* ``reporting`` -- the attendance list, reports and exports, the dashboard
+  and the safety page.
+* ``edge`` -- the endpoints edge nodes sync attendance and the gallery
+  through.
+
+Importing any of them, as the URLconf does, must not import torch, OpenCV
+or the other heavy libraries; ``manage.py check_import_budget`` checks it.
+"""
@@ -0,0 +1,56 @@
+"""Central-server endpoints for edge nodes (see app1/edge.py), authenticated by EDGE_SYNC_TOKEN."""
+import hmac
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from ..edge import decompress_batch, gallery_manifest, merge_events, parse_events
+from ..models import Employee
+
+
+def edge_token_required(view):
+    """Require ``Authorization: Bearer <EDGE_SYNC_TOKEN>``; without a configured token the endpoints do not exist."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = getattr(settings, 'EDGE_SYNC_TOKEN', '')
+        if not token:
+            raise Http404
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return JsonResponse({'error': 'Invalid sync token.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@csrf_exempt
+@require_POST
+@edge_token_required
+def edge_ingest(request):
+    """Store a batch of attendance events from an edge node and merge them into attendance."""
+    try:
+        payload = decompress_batch(
+            request.body, request.headers.get('Content-Encoding', ''), getattr(settings, 'EDGE_MAX_BATCH_BYTES', 16 * 1024 * 1024)
+        )
+        node, events = parse_events(payload)
+    except (ValueError, KeyError, TypeError, zlib.error) as e:
+        return JsonResponse({'error': f'Invalid batch: {e}'}, status=400)
+    return JsonResponse(merge_events(node, events))
+
+
+@require_GET
+@edge_token_required
+def edge_gallery(request):
+    return JsonResponse({'employees': gallery_manifest()})
+
+
+@require_GET
+@edge_token_required
+def edge_gallery_picture(request, name):
+    """An employee's profile picture by file name (pictures are named after their content hash)."""
+    employee = Employee.objects.filter(profile_picture=f'employees/{name}').first()
+    if employee is None or '/' in name:
+        raise Http404
+    return FileResponse(employee.profile_picture.open('rb'))
@@ -0,0 +1,392 @@
+"""Employee registration and management, cameras, login and other admin pages."""
+import base64
+import os
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.files.base import ContentFile
+from django.db import IntegrityError
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from .. import face_quality, metrics
+from ..models import Attendance, CameraConfiguration, Employee
+from ..photos import generate_derivatives, photo_urls
+from ..profiling import list_profiles, profile_file
+from ..search import matching_employee_ids
+from ..telemetry import STATUS_BADGES, camera_statuses
+from .recognition import invalidate_face_cache, partition_label
+
+
+# View for registering an employee
+def register_employee(request):
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        employee_id = request.POST.get('employee_id')
+        email = request.POST.get('email')
+        phone_number = request.POST.get('phone_number')
+        designation = request.POST.get('designation')
+        department = request.POST.get('department')
+        site = request.POST.get('site', '')
+        image_data = request.POST.get('image_data')
+
+        # Check for duplicate employee ID
+        if Employee.objects.filter(employee_id=employee_id).exists():
+            messages.error(request, "An employee with this ID already exists.")
+            return render(request, 'register_employee.html')
+
+        # Decode the base64 image data
+        profile_picture = None
+        if image_data:
+            try:
+                header, encoded = image_data.split(',', 1)
+                profile_picture = ContentFile(base64.b64decode(encoded), name=f"{employee_id}.jpg")
+            except Exception as e:
+                messages.error(request, "Error decoding image. Please try again.")
+                print(f"Error decoding image: {e}")
+                return render(request, 'register_employee.html')
+
+        # Create the Employee instance
+        employee = Employee(
+            employee_id=employee_id,
+            name=name,
+            email=email,
+            phone_number=phone_number,
+            designation=designation,
+            department=department,
+            site=site,
+            profile_picture=profile_picture,  # Use profile_picture field
+            is_active=True  # Default to True, or customize as needed
+        )
+
+        # Save the employee and redirect to a success page
+        try:
+            employee.save()
+            if employee.profile_picture:
+                try:
+                    generate_derivatives(employee)
+                except Exception as e:
+                    # The list falls back to the default photo; generate_photo_derivatives can retry
+                    print(f"Error generating thumbnails for {employee_id}: {e}")
+            # Clear cache to force refresh
+            invalidate_face_cache()
+            messages.success(request, "Employee registered successfully.")
+            return redirect('register_success')  # Redirect to a success page (customize as needed)
+        except Exception as e:
+            messages.error(request, "An error occurred while registering the employee. Please try again.")
+            print(f"Error saving employee: {e}")
+            return render(request, 'register_employee.html')
+
+    return render(request, 'register_employee.html')
+
+
+# Success view after capturing student information and image
+def register_success(request):
+    return render(request, 'register_success.html')
+
+
+def home(request):
+    return render(request, 'home.html')
+
+
+# Custom user pass test for admin access
+def is_admin(user):
+    return user.is_superuser
+
+
+@login_required
+@user_passes_test(is_admin)
+def employee_list(request):
+    search_query = request.GET.get('search', '')
+    employees_qs = Employee.objects.all()
+    if search_query:
+        employees_qs = employees_qs.filter(pk__in=matching_employee_ids(search_query))
+    employees = []
+    for emp in employees_qs:
+        photo_url, photo_webp_url = photo_urls(emp)
+        employees.append({
+            'id': emp.pk,  # Use primary key instead of employee_id
+            'employee_id': emp.employee_id,
+            'name': emp.name,
+            'department': emp.department,
+            'email': emp.email,
+            'photo_url': photo_url,
+            'photo_webp_url': photo_webp_url,
+        })
+    return render(request, 'employee_list.html', {'employees': employees, 'search_query': search_query})
+
+
+@login_required
+@user_passes_test(is_admin)
+def emp_detail(request, pk):
+    emp = get_object_or_404(Employee, pk=pk)
+    attendance_qs = Attendance.objects.filter(employee=emp).order_by('-date')[:10]
+    recent_attendance = []
+    for att in attendance_qs:
+        recent_attendance.append({
+            'date': att.date.strftime('%Y-%m-%d'),
+            'check_in_time': att.check_in_time.strftime('%I:%M %p') if att.check_in_time else 'Not Checked In',
+            'check_out_time': att.check_out_time.strftime('%I:%M %p') if att.check_out_time else 'Not Checked Out',
+            'duration': att.calculate_duration() if att.check_in_time and att.check_out_time else 'Not Checked Out',
+        })
+    photo_url, photo_webp_url = photo_urls(emp)
+    return render(request, 'emp_detail.html', {
+        'emp': emp,
+        'recent_attendance': recent_attendance,
+        'photo_url': photo_url,
+        'photo_webp_url': photo_webp_url,
+    })
+
+
+@login_required
+@user_passes_test(is_admin)
+def camera_status(request):
+    """Live per-camera pipeline stats; the page polls camera_status_data."""
+    return render(request, 'camera_status.html', {
+        'cameras': camera_statuses(list(CameraConfiguration.objects.order_by('name'))),
+        'status_badges': STATUS_BADGES,
+    })
+
+
+@login_required
+@user_passes_test(is_admin)
+def camera_status_data(request):
+    return JsonResponse({'cameras': camera_statuses(list(CameraConfiguration.objects.order_by('name')))})
+
+
+# Custom user pass test for staff-only pages
+def is_staff(user):
+    return user.is_staff
+
+
+@login_required
+@user_passes_test(is_staff)
+def request_profiles(request):
+    """Saved request profiles (see app1/profiling.py), newest first."""
+    return render(request, 'request_profiles.html', {
+        'profiles': list_profiles(),
+        'profiling_enabled': bool(getattr(settings, 'PROFILE_SAMPLE_RATE', 0) or getattr(settings, 'PROFILE_PATHS', ())),
+    })
+
+
+@login_required
+@user_passes_test(is_staff)
+def request_profile_download(request, name):
+    path = profile_file(name)
+    if path is None:
+        raise Http404("No such profile.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (all gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set)."""
+    body, content_type = metrics.render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+def employee_thumbnail(request, path):
+    """Serve photo thumbnails with far-future caching: their names change whenever their content does."""
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, 'employees', 'thumbs'))
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'PHOTO_CACHE_MAX_AGE', 31536000), immutable=True)
+    return response
+
+
+@login_required
+@user_passes_test(is_admin)
+def emp_authorize(request, pk):
+    emp = get_object_or_404(Employee, pk=pk)
+    
+    if request.method == 'POST':
+        # Get the 'authorized' checkbox value and update the 'is_active' field
+        authorized = request.POST.get('authorized', False)
+        emp.is_active = bool(authorized)  # Update the 'is_active' field
+        emp.save()
+        # Clear cache to force refresh
+        invalidate_face_cache()
+        return redirect('emp-detail', pk=pk)
+    
+    return render(request, 'emp_authorize.html', {'emp': emp})
+
+
+# This views is for Deleting student
+@login_required
+@user_passes_test(is_admin)
+def emp_delete(request, pk):
+    emp = get_object_or_404(Employee, pk=pk)
+    
+    if request.method == 'POST':
+        emp.delete()
+        # Clear cache to force refresh
+        invalidate_face_cache()
+        messages.success(request, 'Employee deleted successfully.')
+        return redirect('employee_list')  # Redirect to the student list after deletion
+    
+    return render(request, 'emp_delete_confirm.html', {'emp': emp})
+
+
+# View function for user login
+def user_login(request):
+    # Check if the request method is POST, indicating a form submission
+    if request.method == 'POST':
+        # Retrieve username and password from the submitted form data
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+
+        # Authenticate the user using the provided credentials
+        user = authenticate(request, username=username, password=password)
+
+        # Check if the user was successfully authenticated
+        if user is not None:
+            # Log the user in by creating a session
+            login(request, user)
+            # Redirect the user to the student list page after successful login
+            return redirect('home')  # Replace 'student-list' with your desired redirect URL after login
+        else:
+            # If authentication fails, display an error message
+            messages.error(request, 'Invalid username or password.')
+
+    # Render the login template for GET requests or if authentication fails
+    return render(request, 'login.html')
+
+
+# This is for user logout
+def user_logout(request):
+    logout(request)
+    return redirect('login')  # Replace 'login' with your desired redirect URL after logout
+
+
+def gallery_choices():
+    """Departments, sites and active employees to offer when restricting a camera's gallery."""
+    active = Employee.objects.filter(is_active=True)
+    return {
+        'departments': active.exclude(department='').values_list('department', flat=True).distinct().order_by('department'),
+        'sites': active.exclude(site='').values_list('site', flat=True).distinct().order_by('site'),
+        'employees': active.order_by('name').only('pk', 'name', 'employee_id'),
+    }
+
+
+# Function to handle the creation of a new camera configuration
+@login_required
+@user_passes_test(is_admin)
+def camera_config_create(request):
+    # Check if the request method is POST, indicating form submission
+    if request.method == "POST":
+        # Retrieve form data from the request
+        name = request.POST.get('name')
+        camera_source = request.POST.get('camera_source')
+        threshold = request.POST.get('threshold')
+        quality_thresholds = {
+            field: request.POST.get(field) or default
+            for field, default in face_quality.DEFAULT_THRESHOLDS.items()
+        }
+
+        try:
+            # Save the data to the database using the CameraConfiguration model
+            config = CameraConfiguration.objects.create(
+                name=name,
+                camera_source=camera_source,
+                threshold=threshold,
+                gallery_departments=request.POST.get('gallery_departments', ''),
+                gallery_site=request.POST.get('gallery_site', ''),
+                **quality_thresholds,
+            )
+            config.gallery_employees.set(request.POST.getlist('gallery_employees'))
+            # Add success message
+            messages.success(request, 'Camera configuration created successfully.')
+            # Redirect to the list of camera configurations after successful creation
+            return redirect('camera_config_list')
+
+        except IntegrityError:
+            # Handle the case where a configuration with the same name already exists
+            messages.error(request, "A configuration with this name already exists.")
+            # Render the form again to allow user to correct the error
+            return render(request, 'camera_config_form.html', gallery_choices())
+
+    # Render the camera configuration form for GET requests
+    return render(request, 'camera_config_form.html', gallery_choices())
+
+
+# READ: Function to list all camera configurations
+@login_required
+@user_passes_test(is_admin)
+def camera_config_list(request):
+    # Retrieve all CameraConfiguration objects from the database
+    configs = list(CameraConfiguration.objects.all())
+    # Attach this process's face quality gate counters to each configuration
+    quality_counters = face_quality.get_counters()
+    # and the connection state the camera loops last published, rather than probing the devices
+    statuses = {status['camera_id']: status for status in camera_statuses(configs)}
+    for config in configs:
+        config.quality_counters = quality_counters.get(config.name, {})
+        config.health = statuses[config.pk]
+        config.health['badge'] = STATUS_BADGES.get(config.health['status'], 'bg-secondary')
+        config.gallery = partition_label(config.gallery_partition())
+    # Render the list template with the retrieved configurations
+    return render(request, 'camera_config_list.html', {'configs': configs})
+
+
+# UPDATE: Function to edit an existing camera configuration
+@login_required
+@user_passes_test(is_admin)
+def camera_config_update(request, pk):
+    # Retrieve the specific configuration by primary key or return a 404 error if not found
+    config = get_object_or_404(CameraConfiguration, pk=pk)
+
+    # Check if the request method is POST, indicating form submission
+    if request.method == "POST":
+        # Update the configuration fields with data from the form
+        config.name = request.POST.get('name')
+        config.camera_source = request.POST.get('camera_source')
+        config.threshold = request.POST.get('threshold')
+        for field in face_quality.DEFAULT_THRESHOLDS:
+            setattr(config, field, request.POST.get(field) or getattr(config, field))
+        config.gallery_departments = request.POST.get('gallery_departments', '')
+        config.gallery_site = request.POST.get('gallery_site', '')
+        # config.success_sound_path = request.POST.get('success_sound_path')
+
+        # Save the changes to the database
+        config.save()  
+        config.gallery_employees.set(request.POST.getlist('gallery_employees'))
+
+        # Add success message
+        messages.success(request, 'Camera configuration updated successfully.')
+        
+        # Redirect to the list page after successful update
+        return redirect('camera_config_list')  
+    
+    # Clear any old messages for GET requests
+    if request.method == "GET":
+        # Clear any existing messages to prevent showing old ones
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        setattr(request, '_messages', FallbackStorage(request))
+    
+    # Render the configuration form with the current configuration data for GET requests
+    return render(request, 'camera_config_form.html', {
+        'config': config,
+        'selected_employees': set(config.gallery_employees.values_list('pk', flat=True)),
+        **gallery_choices(),
+    })
+
+
+# DELETE: Function to delete a camera configuration
+@login_required
+@user_passes_test(is_admin)
+def camera_config_delete(request, pk):
+    # Retrieve the specific configuration by primary key or return a 404 error if not found
+    config = get_object_or_404(CameraConfiguration, pk=pk)
+
+    # Check if the request method is POST, indicating confirmation of deletion
+    if request.method == "POST":
+        # Delete the record from the database
+        config.delete()  
+        # Add success message
+        messages.success(request, 'Camera configuration deleted successfully.')
+        # Redirect to the list of camera configurations after deletion
+        return redirect('camera_config_list')
+
+    # Render the delete confirmation template with the configuration data
+    return render(request, 'camera_config_delete.html', {'config': config})
@@ -0,0 +1,747 @@
+"""Face recognition: the face gallery, detection and matching, the kiosk endpoint and the camera loop.
+
+The ML stack (torch, facenet_pytorch) and OpenCV are imported when first
+needed rather than with this module, so loading the URLconf for the login
+page, the admin or a management command does not pay for them. The camera
+loop and the kiosk record attendance with its audit row in one transaction
+(``app1/attendance.py``) and then publish to ``app1.events``, whose
+subscribers play the sound and wake the live dashboards.
+"""
+import base64
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.utils.timezone import localdate, now
+
+from .. import events, face_quality, metrics
+from ..attendance import log_attendance, record_camera_attendance
+from ..cameras import open_camera
+from ..db import serialized_write
+from ..models import Attendance, CameraConfiguration, Employee
+from ..telemetry import CameraTelemetry
+
+# Face galleries by partition (CameraConfiguration.gallery_partition(); None for every active employee)
+_galleries = {}
+_cache_validity = 300  # 5 minutes cache validity
+# Face encodings per profile picture; picture names are content hashes, so each image is encoded once
+_image_encodings = {}
+
+_face_models = None
+_face_models_lock = threading.Lock()
+
+
+def face_models():
+    """The MTCNN detector and InceptionResnetV1 embedder, loaded on first use."""
+    global _face_models
+    if _face_models is None:
+        with _face_models_lock:
+            if _face_models is None:
+                from facenet_pytorch import InceptionResnetV1, MTCNN
+
+                mtcnn = MTCNN(keep_all=True, device='cpu', min_face_size=60)  # Optimize for performance
+                resnet = InceptionResnetV1(pretrained='vggface2').eval()
+                _face_models = (mtcnn, resnet)
+    return _face_models
+
+
+def invalidate_face_cache():
+    """Rebuild the galleries on next use, after employees or their pictures change."""
+    _galleries.clear()
+
+
+def partition_filter(partition):
+    """Q for the employees in a gallery partition: any of its departments, its site or its explicit list."""
+    departments, site, employee_pks = partition
+    condition = Q()
+    if departments:
+        condition |= Q(department__in=departments)
+    if site:
+        condition |= Q(site=site)
+    if employee_pks:
+        condition |= Q(pk__in=employee_pks)
+    return condition
+
+
+def get_cached_face_data(partition=None):
+    """Face encodings, names and employees for a gallery partition, rebuilt when older than the cache validity.
+
+    Each partition gets its own matrix, so a camera restricted to one site matches against that
+    site's faces only. Encodings per picture are shared between partitions.
+    """
+    import cv2
+
+    current_time = time.time()
+    gallery = _galleries.get(partition)
+    if gallery is not None and current_time - gallery['built_at'] <= _cache_validity:
+        return gallery['encodings'], gallery['names'], gallery['employees']
+
+    # Fetch only authorized employees
+    employees = Employee.objects.filter(is_active=True)
+    if partition is not None:
+        employees = employees.filter(partition_filter(partition))
+
+    known_face_encodings = []
+    known_face_names = []
+    employee_cache = {}
+    for employee in employees:
+        try:
+            image_name = str(employee.profile_picture.name)
+            if image_name not in _image_encodings:
+                encodings = None
+                image_path = os.path.join(settings.MEDIA_ROOT, image_name)
+                if os.path.exists(image_path):
+                    known_image = cv2.imread(image_path)
+                    if known_image is not None:
+                        known_image_rgb = cv2.cvtColor(known_image, cv2.COLOR_BGR2RGB)
+                        encodings = detect_and_encode(known_image_rgb)
+                _image_encodings[image_name] = encodings
+            encodings = _image_encodings[image_name]
+            if encodings:
+                known_face_encodings.extend(encodings)
+                known_face_names.append(employee.name)
+                employee_cache[employee.name] = employee
+        except Exception as e:
+            print(f"Error processing employee {employee.name}: {e}")
+            continue
+    # Forget pictures no active employee uses any more, whichever partition they were in
+    active_images = {str(name) for name in Employee.objects.filter(is_active=True).values_list('profile_picture', flat=True)}
+    for image_name in set(_image_encodings) - active_images:
+        del _image_encodings[image_name]
+
+    encodings = np.array(known_face_encodings) if known_face_encodings else np.array([])
+    _galleries[partition] = {
+        'encodings': encodings,
+        'squared_norms': np.einsum('ij,ij->i', encodings, encodings) if known_face_encodings else np.array([]),
+        'names': known_face_names,
+        'employees': employee_cache,
+        'built_at': current_time,
+    }
+    # Drop expired galleries of partitions no camera asks for any more
+    for key in [key for key, other in _galleries.items() if current_time - other['built_at'] > _cache_validity]:
+        del _galleries[key]
+    metrics.set_gallery(partition_label(partition), len(known_face_encodings), current_time)
+    gallery = _galleries[partition]
+    return gallery['encodings'], gallery['names'], gallery['employees']
+
+
+def partition_label(partition):
+    """A short description of a gallery partition, for metrics and the camera list."""
+    if partition is None:
+        return 'all'
+    departments, site, employee_pks = partition
+    parts = [', '.join(departments), f'site {site}' if site else '', f'{len(employee_pks)} listed' if employee_pks else '']
+    return '; '.join(part for part in parts if part)
+
+
+def detect_faces(image, thresholds=None, source='default'):
+    """Detect faces and crop them, dropping low-quality faces when thresholds are given."""
+    import cv2
+    import torch
+
+    mtcnn, _ = face_models()
+    detected = []
+    try:
+        with torch.no_grad(), metrics.stage('detect'):
+            boxes, probs, landmarks = mtcnn.detect(image, landmarks=True)
+        if boxes is None or len(boxes) == 0:
+            return detected
+        for i, box in enumerate(boxes):
+            try:
+                x1, y1, x2, y2 = map(int, box)
+
+                # Validate coordinates
+                if x1 < 0 or y1 < 0 or x2 > image.shape[1] or y2 > image.shape[0]:
+                    continue
+
+                face = image[y1:y2, x1:x2]
+                if face.size == 0:
+                    continue
+
+                if thresholds is not None:
+                    face_quality.record(source, 'detected')
+                    rejected_by = face_quality.check_face(
+                        face,
+                        (x1, y1, x2, y2),
+                        probs[i] if probs is not None else None,
+                        landmarks[i] if landmarks is not None else None,
+                        thresholds,
+                    )
+                    if rejected_by:
+                        face_quality.record(source, rejected_by)
+                        continue
+                    face_quality.record(source, 'accepted')
+
+                detected.append(((x1, y1, x2, y2), cv2.resize(face, (160, 160))))
+            except Exception as e:
+                print(f"Error processing face box: {e}")
+                continue
+    except Exception as e:
+        print(f"Error in detect_faces: {e}")
+    return detected
+
+
+# Function to detect and encode faces
+def detect_and_encode(image, thresholds=None, source='default'):
+    try:
+        return embed_faces([face for _, face in detect_faces(image, thresholds, source)])
+    except Exception as e:
+        print(f"Error in detect_and_encode: {e}")
+    return []
+
+
+# Function to embed a list of 160x160 RGB face crops in a single forward pass
+def embed_faces(faces):
+    import torch
+
+    if not faces:
+        return []
+    _, resnet = face_models()
+    batch = np.stack(faces).transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+    with torch.no_grad(), metrics.stage('embed'):
+        encodings = resnet(torch.from_numpy(batch)).numpy()
+    return list(encodings)
+
+
+# Function to encode uploaded images
+def encode_uploaded_images():
+    known_face_encodings, known_face_names, _ = get_cached_face_data()
+    return known_face_encodings, known_face_names
+
+
+def squared_norms(known_encodings):
+    """Squared norms of a gallery's encodings, precomputed when it is one of the cached galleries."""
+    for gallery in list(_galleries.values()):
+        if gallery['encodings'] is known_encodings:
+            return gallery['squared_norms']
+    return np.einsum('ij,ij->i', known_encodings, known_encodings)
+
+
+# Function to match every test encoding against the known encodings at once
+def match_encodings(known_encodings, test_encodings, threshold=0.6, known_norms=None):
+    """Return a (best_index or None, distance) pair for each test encoding.
+
+    ``known_norms`` are the gallery's squared norms; by default they are looked up with ``squared_norms``.
+    """
+    if len(known_encodings) == 0 or len(test_encodings) == 0:
+        return [(None, float('inf')) for _ in test_encodings]
+    with metrics.stage('match'):
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab: one (probes x gallery) matrix product instead of
+        # a (probes x gallery x 512) difference array
+        test_encodings = np.asarray(test_encodings, dtype=known_encodings.dtype)
+        squared = (
+            np.einsum('ij,ij->i', test_encodings, test_encodings)[:, None]
+            + (squared_norms(known_encodings) if known_norms is None else known_norms)[None, :]
+            - 2 * test_encodings @ known_encodings.T
+        )
+        best = np.argmin(squared, axis=1)
+        distances = np.sqrt(np.maximum(squared[np.arange(len(best)), best], 0))
+    return [
+        (int(idx) if distance < threshold else None, float(distance))
+        for idx, distance in zip(best, distances)
+    ]
+
+
+# Function to recognize faces
+def recognize_faces(known_encodings, known_names, test_encodings, threshold=0.6):
+    recognized_names = []
+    for idx, _ in match_encodings(known_encodings, test_encodings, threshold):
+        recognized_names.append(known_names[idx] if idx is not None else 'Not Recognized')
+    return recognized_names
+
+
+@login_required
+def mark_attendance_camera(request):
+    """Renders the camera page for marking attendance."""
+    return render(request, 'mark_attendance.html')
+
+
+KIOSK_STATUSES = {'check_in': 'checked_in', 'check_out': 'checked_out'}
+
+
+def apply_attendance_action(attendance, name, action):
+    """Apply a check-in/check-out action to an attendance record and return (changed, message)."""
+    if action == 'check_in':
+        if not attendance.check_in_time:
+            attendance.mark_check_in()
+            return True, f"Welcome, {name}! You have been checked in."
+        return False, f"Hi, {name}. You have already checked in today."
+    elif action == 'check_out':
+        if attendance.check_in_time and not attendance.check_out_time:
+            attendance.mark_check_out()
+            return True, f"Goodbye, {name}! You have been checked out."
+        elif not attendance.check_in_time:
+            return False, f"Hi, {name}. You need to check in first before checking out."
+        return False, f"Hi, {name}. You have already checked out today."
+    return False, "Invalid action."
+
+
+def process_group_attendance(test_encodings, known_face_encodings, known_face_names, employee_cache, action, threshold=0.6):
+    """Recognize every face in the frame and apply the action for all matched employees in one transaction."""
+    results = []
+    matched = {}
+    for idx, distance in match_encodings(known_face_encodings, test_encodings, threshold):
+        if idx is None:
+            results.append({'name': 'Not Recognized', 'success': False, 'message': 'Face not recognized.'})
+            continue
+        name = known_face_names[idx]
+        employee = employee_cache.get(name)
+        if employee is None:
+            results.append({'name': name, 'success': False, 'message': 'Recognized face does not correspond to a valid employee.'})
+        elif employee.pk in matched:
+            continue  # The same person matched twice in one frame
+        else:
+            matched[employee.pk] = (name, employee)
+
+    if matched:
+        current_time = now()
+        today = localdate(current_time)
+        changed_employees = []
+        with metrics.stage('db_write'), serialized_write():
+            existing = {
+                attendance.employee_id: attendance
+                for attendance in Attendance.objects.filter(employee_id__in=matched.keys(), date=today)
+            }
+            for employee_pk, (name, employee) in matched.items():
+                attendance = existing.get(employee_pk)
+                if attendance is None:
+                    attendance = Attendance.objects.create(employee=employee, date=today)
+                changed, message = apply_attendance_action(attendance, name, action)
+                if changed:
+                    log_attendance(employee, KIOSK_STATUSES[action], 'kiosk', current_time)
+                    changed_employees.append((name, employee))
+                results.append({
+                    'name': name,
+                    'employee_id': employee.employee_id,
+                    'success': changed,
+                    'message': message,
+                })
+        for name, employee in changed_employees:
+            events.publish('attendance', source='kiosk', name=name, employee=employee, status=KIOSK_STATUSES[action], at=current_time)
+    return results
+
+
+@login_required
+def process_attendance(request):
+    """Processes the captured image to mark attendance."""
+    import cv2
+
+    if request.method == 'POST':
+        try:
+            if request.content_type.startswith('image/'):
+                # Raw JPEG/PNG body, options in the query string: skips the base64 round trip
+                image_bytes = request.body
+                action = request.GET.get('action')
+                group = request.GET.get('group', '').lower() in ('1', 'true', 'yes')
+                if not image_bytes:
+                    return JsonResponse({'success': False, 'message': 'No image data received.'})
+            else:
+                data = json.loads(request.body)
+                image_data = data.get('image_data')
+                action = data.get('action')
+                group = bool(data.get('group', False))
+
+                if not image_data:
+                    return JsonResponse({'success': False, 'message': 'No image data received.'})
+
+                # Decode the base64 image
+                with metrics.stage('decode'):
+                    header, encoded = image_data.split(',', 1)
+                    image_bytes = base64.b64decode(encoded)
+            with metrics.stage('imdecode'):
+                nparr = np.frombuffer(image_bytes, np.uint8)
+                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            
+            if frame is None:
+                 return JsonResponse({'success': False, 'message': 'Could not decode image.'})
+
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+            # Get known faces
+            known_face_encodings, known_face_names, employee_cache = get_cached_face_data()
+
+            if len(known_face_encodings) == 0:
+                return JsonResponse({'success': False, 'message': 'No authorized employees found in the database.'})
+
+            # Detect and encode faces in the captured frame
+            test_encodings = detect_and_encode(frame_rgb, face_quality.default_thresholds(), source='kiosk')
+
+            if not test_encodings:
+                metrics.outcome('no_face', 'kiosk')
+                return JsonResponse({'success': False, 'message': 'No face detected. Please try again.'})
+
+            threshold = 0.6 
+
+            if group:
+                # Recognize every face in the frame in one batched pass
+                results = process_group_attendance(
+                    test_encodings, known_face_encodings, known_face_names, employee_cache, action, threshold
+                )
+                recognized = [result for result in results if result['name'] != 'Not Recognized']
+                metrics.outcome('recognized', 'kiosk', len(recognized))
+                metrics.outcome('unrecognized', 'kiosk', len(results) - len(recognized))
+                if not recognized:
+                    return JsonResponse({'success': False, 'message': 'Face not recognized. Please try again.', 'results': results})
+                message = ' '.join(result['message'] for result in recognized)
+                return JsonResponse({'success': True, 'message': message, 'results': results})
+
+            # Process the first detected face
+            test_encoding = test_encodings[0]
+            
+            # Recognize face
+            (min_distance_idx, _), = match_encodings(known_face_encodings, [test_encoding], threshold)
+            
+            metrics.outcome('recognized' if min_distance_idx is not None else 'unrecognized', 'kiosk')
+            if min_distance_idx is not None:
+                name = known_face_names[min_distance_idx]
+                
+                # Process attendance
+                if name in employee_cache:
+                    employee = employee_cache[name]
+                    current_django_time = now()
+                    today = localdate(current_django_time)
+
+                    with metrics.stage('db_write'), serialized_write():
+                        attendance, created = Attendance.objects.get_or_create(
+                            employee=employee, 
+                            date=today
+                        )
+                        changed, message = apply_attendance_action(attendance, name, action)
+                        if changed:
+                            log_attendance(employee, KIOSK_STATUSES[action], 'kiosk', current_django_time)
+                    if changed:
+                        events.publish(
+                            'attendance', source='kiosk', name=name, employee=employee,
+                            status=KIOSK_STATUSES[action], at=current_django_time,
+                        )
+                    return JsonResponse({'success': True, 'message': message})
+                else:
+                    return JsonResponse({'success': False, 'message': 'Recognized face does not correspond to a valid employee.'})
+            else:
+                return JsonResponse({'success': False, 'message': 'Face not recognized. Please try again.'})
+
+        except Exception as e:
+            print(f"Error processing attendance: {e}")
+            return JsonResponse({'success': False, 'message': 'An error occurred during processing.'})
+
+    return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+
+
+def recognize_camera_frame(frame_rgb, cam_config, known_face_encodings, known_face_names, employee_cache,
+                           last_recognition_time, current_time, cooldown=5):
+    """Detect, embed and match the faces in one camera frame, recording attendance for each known employee.
+
+    Returns (faces, stage_seconds). Each face is a dict with its ``box``, the matched ``name`` and
+    ``distance`` (None when unknown or there is no gallery), the published ``face.recognized``
+    ``event`` and the ``attendance`` outcome (both None unless the face was recorded). A person is
+    recorded at most once per ``cooldown`` seconds of ``current_time``, tracked in
+    ``last_recognition_time``; the outcome is also published as an ``attendance`` event caused by it.
+    """
+    stage_started = time.perf_counter()
+    detections = detect_faces(frame_rgb, cam_config.quality_thresholds(), source=cam_config.name)
+    detected_at = time.perf_counter()
+    encodings = embed_faces([face for _, face in detections])
+    embedded_at = time.perf_counter()
+    if not detections:
+        metrics.outcome('no_face', cam_config.name)
+
+    faces = []
+    if len(known_face_encodings) == 0 or len(known_face_names) == 0:
+        matches = [(None, None)] * len(detections)
+    else:
+        # Every face in the frame in one product against the gallery (and its cached norms), like the kiosk
+        matches = match_encodings(known_face_encodings, encodings, cam_config.threshold)
+    for (box, _), (min_distance_idx, distance) in zip(detections, matches):
+        face = {'box': box, 'name': None, 'distance': distance, 'event': None, 'attendance': None}
+        faces.append(face)
+        if distance is None:
+            continue
+        if min_distance_idx is None or min_distance_idx >= len(known_face_names):
+            metrics.outcome('unrecognized', cam_config.name)
+            continue
+        metrics.outcome('recognized', cam_config.name)
+        name = face['name'] = known_face_names[min_distance_idx]
+        try:
+            # Check cooldown for this person
+            last_seen = last_recognition_time.get(name)
+            if last_seen is None or (current_time - last_seen).total_seconds() > cooldown:
+                last_recognition_time[name] = current_time
+                if name in employee_cache:
+                    employee = employee_cache[name]
+                    face['event'] = events.publish(
+                        'face.recognized', source=cam_config.name, name=name, employee=employee,
+                        distance=face['distance'], at=current_time,
+                    )
+                    # Written here, not by a subscriber: the bus may drop events, attendance must not be
+                    status = face['attendance'] = record_camera_attendance(
+                        employee, current_time, cam_config.name, face['distance']
+                    )
+                    events.publish(
+                        'attendance', source=cam_config.name, name=name, employee=employee, status=status,
+                        distance=face['distance'], at=current_time, cause=face['event']['id'],
+                    )
+        except Exception as e:
+            print(f"Error in face recognition: {e}")
+            face['error'] = str(e)
+
+    stage_seconds = {
+        'detect': detected_at - stage_started,
+        'embed': embedded_at - detected_at,
+        'recognize': time.perf_counter() - embedded_at,
+    }
+    return faces, stage_seconds
+
+
+def capture_and_recognize(request):
+    import cv2
+
+    stop_events = []  # List to store stop events for each thread
+    camera_threads = []  # List to store threads for each camera
+    camera_windows = []  # List to store window names
+    error_messages = []  # List to capture errors from threads
+
+    def process_frame(cam_config, stop_event):
+        """Thread function to capture and process frames for each camera."""
+        window_created = False  # Flag to track if the window was created
+        last_recognition_time = {}  # Track last recognition time per person
+        recognition_cooldown = 5  # 5 seconds cooldown between recognitions
+        frame_skip = 0  # Frame counter for processing optimization
+        frame_process_interval = 5  # Process every 5th frame for better performance
+        last_face_detection_time = 0
+        face_detection_interval = 0.5  # Detect faces every 0.5 seconds
+        telemetry = CameraTelemetry(cam_config)  # Rolling stats for the camera status page
+        banner = {}  # This camera's latest attendance decision, from the event bus
+
+        def show_attendance(event):
+            if event['source'] == cam_config.name:
+                banner.update(
+                    text=f"{event['name']}, {event['status'].replace('_', ' ')}.",
+                    color=(0, 255, 0) if event['status'] in ('checked_in', 'checked_out') else (0, 0, 255),
+                    until=time.time() + 3,
+                )
+
+        def draw_banner(frame):
+            if banner and time.time() < banner['until']:
+                # Draw background rectangle for better text visibility
+                cv2.rectangle(frame, (40, 30), (400, 80), (0, 0, 0), -1)
+                cv2.putText(frame, banner['text'], (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, banner['color'], 2, cv2.LINE_AA)
+
+        def load_gallery():
+            """Re-read this camera's thresholds and gallery partition, then its gallery.
+
+            Called again whenever the gallery cache expires, so edits on the camera config page reach a
+            running camera; the name and source only change when the camera is restarted.
+            """
+            cam_config.refresh_from_db(fields=[
+                'threshold', 'min_detection_prob', 'min_face_size', 'max_yaw', 'min_sharpness',
+                'gallery_departments', 'gallery_site',
+            ])
+            partition = cam_config.gallery_partition()
+            return partition, get_cached_face_data(partition)
+
+        events.subscribe('attendance')(show_attendance)
+        try:
+            # One capture handle for the whole loop; read failures reconnect with backoff
+            with open_camera(cam_config, telemetry, stop_event) as connection:
+                window_name = f'Face Recognition - {cam_config.name}'
+                camera_windows.append(window_name)  # Track the window name
+
+                # Pre-load face data for the employees this camera serves
+                try:
+                    partition, (known_face_encodings, known_face_names, employee_cache) = load_gallery()
+                    print(f"Loaded {len(known_face_names)} known faces ({partition_label(partition)}) for camera {cam_config.name}")
+                except Exception as e:
+                    print(f"Error loading face data for camera {cam_config.name}: {e}")
+                    partition = None
+                    known_face_encodings = []
+                    known_face_names = []
+                    employee_cache = {}
+                gallery_loaded_at = time.time()
+
+                for frame in connection.frames():
+                    telemetry.frame_captured()
+
+                    if time.time() - gallery_loaded_at > _cache_validity:
+                        gallery_loaded_at = time.time()
+                        try:
+                            previous = partition
+                            partition, (known_face_encodings, known_face_names, employee_cache) = load_gallery()
+                            if partition != previous:
+                                print(f"Loaded {len(known_face_names)} known faces ({partition_label(partition)}) for camera {cam_config.name}")
+                        except Exception as e:
+                            # Keep matching against the gallery already loaded
+                            print(f"Error reloading face data for camera {cam_config.name}: {e}")
+
+                    # Skip frames for better performance
+                    frame_skip += 1
+                    if frame_skip % frame_process_interval != 0:
+                        telemetry.frame_dropped()
+                        # Display frame without processing
+                        draw_banner(frame)
+                        if not window_created:
+                            cv2.namedWindow(window_name)
+                            window_created = True
+                        cv2.imshow(window_name, frame)
+                        if cv2.waitKey(1) & 0xFF == ord('q'):
+                            stop_event.set()
+                            break
+                        continue
+
+                    # Convert BGR to RGB
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                
+                    # Optimize face detection - only detect faces periodically
+                    current_time = time.time()
+                    if current_time - last_face_detection_time > face_detection_interval:
+                        last_face_detection_time = current_time
+                    
+                        try:
+                            # Detect faces that pass this camera's quality gate, embed them in one batch,
+                            # match them and record attendance
+                            faces, stage_seconds = recognize_camera_frame(
+                                frame_rgb, cam_config, known_face_encodings, known_face_names, employee_cache,
+                                last_recognition_time, now(), recognition_cooldown,
+                            )
+
+                            # Draw each detected face
+                            for face in faces:
+                                x1, y1, x2, y2 = face['box']
+                                name = face['name']
+                                if 'error' in face:
+                                    # Draw red border for error
+                                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+                                    cv2.rectangle(frame, (x1, y1 - 30), (x1 + 100, y1), (0, 0, 0), -1)
+                                    cv2.putText(frame, "Error", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2, cv2.LINE_AA)
+                                elif face['distance'] is None:
+                                    # No known faces loaded - draw yellow border
+                                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
+                                    cv2.rectangle(frame, (x1, y1 - 30), (x1 + 150, y1), (0, 0, 0), -1)
+                                    cv2.putText(frame, "No Data", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA)
+                                elif name is None:
+                                    # Unknown face - draw red border
+                                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+                                    # Draw background for "Unknown" text
+                                    cv2.rectangle(frame, (x1, y1 - 30), (x1 + 100, y1), (0, 0, 0), -1)
+                                    cv2.putText(frame, "Unknown", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2, cv2.LINE_AA)
+                                else:
+                                    # Draw recognition box with green border and name
+                                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                                    # Draw background for name text
+                                    cv2.rectangle(frame, (x1, y1 - 30), (x1 + len(name) * 15, y1), (0, 0, 0), -1)
+                                    cv2.putText(frame, name, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2, cv2.LINE_AA)
+                            telemetry.frame_processed(len(faces), **stage_seconds)
+                        except Exception as e:
+                            print(f"Error in face detection: {e}")
+                            # Continue without crashing
+                            pass
+                    else:
+                        telemetry.frame_dropped()
+
+                    # Display frame in separate window for each camera
+                    if not window_created:
+                        cv2.namedWindow(window_name)  # Only create window once
+                        window_created = True  # Mark window as created
+
+                    draw_banner(frame)
+                    # Add instructions to the frame
+                    cv2.putText(frame, "Press 'Q' or 'ESC' to close", (10, frame.shape[0] - 20), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2, cv2.LINE_AA)
+                
+                    # Add performance indicator
+                    if current_time - last_face_detection_time < face_detection_interval:
+                        cv2.putText(frame, "Face Detection Active", (10, 30), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2, cv2.LINE_AA)
+                    else:
+                        cv2.putText(frame, "Waiting for faces...", (10, 30), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2, cv2.LINE_AA)
+                
+                    # Add current time in IST
+                    from datetime import datetime
+                    ist_time = datetime.now().strftime("%H:%M:%S IST")
+                    cv2.putText(frame, f"Time: {ist_time}", (10, frame.shape[0] - 50), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2, cv2.LINE_AA)
+
+                    cv2.imshow(window_name, frame)
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q') or key == 27:  # 'q' or ESC key
+                        print(f"Closing camera window: {window_name}")
+                        stop_event.set()  # Signal the thread to stop when 'q' is pressed
+                        break
+
+        except Exception as e:
+            print(f"Error in thread for {cam_config.name}: {e}")
+            error_messages.append(str(e))  # Capture error message
+            telemetry.stopped(str(e))
+        finally:
+            events.unsubscribe(show_attendance)
+            if telemetry.state != 'error':
+                telemetry.stopped()
+            if window_created:
+                try:
+                    cv2.destroyWindow(window_name)  # Only destroy if window was created
+                    cv2.destroyAllWindows()  # Ensure all windows are closed
+                    cv2.waitKey(1)  # Process any pending events
+                except Exception as e:
+                    print(f"Error closing window {window_name}: {e}")
+                    pass  # Ignore any errors during window cleanup
+
+    try:
+        # Get all camera configurations
+        cam_configs = CameraConfiguration.objects.all()
+        if not cam_configs.exists():
+            raise Exception("No camera configurations found. Please configure them in the admin panel.")
+
+        # Check if there are any authorized employees
+        authorized_employees = Employee.objects.filter(is_active=True)
+        if not authorized_employees.exists():
+            raise Exception("No authorized employees found. Please authorize at least one employee for face recognition.")
+
+        print(f"Found {authorized_employees.count()} authorized employees for face recognition")
+
+        # Create threads for each camera configuration
+        for cam_config in cam_configs:
+            stop_event = threading.Event()
+            stop_events.append(stop_event)
+
+            camera_thread = threading.Thread(target=process_frame, args=(cam_config, stop_event))
+            camera_threads.append(camera_thread)
+            camera_thread.start()
+
+        # Keep the main thread running while cameras are being processed
+        while any(thread.is_alive() for thread in camera_threads):
+            time.sleep(1)  # Non-blocking wait, allowing for UI responsiveness
+
+    except Exception as e:
+        error_messages.append(str(e))  # Capture the error message
+    finally:
+        # Ensure all threads are signaled to stop
+        for stop_event in stop_events:
+            stop_event.set()
+
+        # Wait a moment for threads to finish
+        time.sleep(2)
+
+        # Ensure all windows are closed in the main thread
+        try:
+            for window in camera_windows:
+                cv2.destroyWindow(window)
+            cv2.destroyAllWindows()
+            cv2.waitKey(1)  # Process any pending events
+            print("All camera windows closed successfully")
+        except Exception as e:
+            print(f"Error closing windows: {e}")
+
+    # Check if there are any error messages
+    if error_messages:
+        # Join all error messages into a single string
+        full_error_message = "\n".join(error_messages)
+        return render(request, 'error.html', {'error_message': full_error_message})  # Render the error page with message
+
+    return redirect('emp_attendance_list')
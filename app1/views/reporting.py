@@ -0,0 +1,395 @@
+"""Attendance list, reports and exports, the dashboard and the safety page.
+
+openpyxl and pyarrow are imported by the export that needs them.
+"""
+import base64
+import csv
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Q
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from ..archive import archived_attendance, archived_before, iter_archived
+from ..events import wait_for_events
+from ..incidents import refresh_if_stale
+from ..models import (
+    Attendance, AttendanceEvent, DailyAttendanceSummary, DepartmentAttendanceRollup, Employee, EmployeeAttendanceRollup,
+    SafetyIncident, format_duration,
+)
+from ..rollups import PERIODS, period_bounds
+from ..search import matching_employee_ids
+from ..summaries import refresh_daily_summaries
+from .management import is_admin
+
+
+def encode_attendance_cursor(record):
+    """Encode the (date, check_in_time, id) sort key of a record as an opaque page cursor."""
+    key = [
+        record.date.isoformat(),
+        record.check_in_time.isoformat() if record.check_in_time else None,
+        record.pk,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_attendance_cursor(cursor):
+    """Decode a page cursor back into (date, check_in_time, id); returns None if it is malformed."""
+    try:
+        date_str, check_in_str, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        check_in_time = datetime.fromisoformat(check_in_str) if check_in_str else None
+        return datetime.strptime(date_str, '%Y-%m-%d').date(), check_in_time, int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def attendance_after(cursor):
+    """Seek predicate for the rows that follow the cursor in (-date, -check_in_time, id) order.
+
+    Check-in times sort NULLS LAST, so records without a check-in close out each day. The
+    leading date bound lets the database start from the cursor in attendance_list_seek_idx
+    instead of scanning from the newest row.
+    """
+    date, check_in_time, pk = cursor
+    if check_in_time is None:
+        same_day = Q(date=date, check_in_time__isnull=True, id__gt=pk)
+    else:
+        same_day = (
+            Q(date=date, check_in_time__lt=check_in_time)
+            | Q(date=date, check_in_time__isnull=True)
+            | Q(date=date, check_in_time=check_in_time, id__gt=pk)
+        )
+    return Q(date__lte=date) & (Q(date__lt=date) | same_day)
+
+
+def emp_attendance_list(request):
+    search_query = request.GET.get('search', '')
+    date_filter = request.GET.get('attendance_date', '')
+    cursor = request.GET.get('after', '')
+
+    # Get all attendance records
+    attendance_records = Attendance.objects.select_related('employee').all()
+
+    # Days before the archive watermark are read from the archive files, not the live table
+    watermark = archived_before()
+    if watermark:
+        attendance_records = attendance_records.filter(date__gte=watermark)
+    archived_filters = {}
+
+    if search_query:
+        attendance_records = attendance_records.filter(employee_id__in=matching_employee_ids(search_query))
+        archived_filters['employee_ids'] = set(
+            Employee.objects.filter(pk__in=matching_employee_ids(search_query)).values_list('pk', flat=True)
+        )
+
+    try:
+        filter_date = parse_date(date_filter) if date_filter else None
+    except ValueError:  # Well formed but not a real day, e.g. 2026-02-30
+        filter_date = None
+    if filter_date is None:
+        date_filter = ''  # Not a date: list every day rather than fail
+    else:
+        attendance_records = attendance_records.filter(date=filter_date)
+        archived_filters['date'] = filter_date
+    read_archive = watermark is not None and archived_filters.get('date', watermark - timedelta(days=1)) < watermark
+
+    # Order by date (most recent first), matching attendance_list_seek_idx
+    attendance_records = attendance_records.order_by(
+        '-date', F('check_in_time').desc(nulls_last=True), 'id'
+    )
+
+    if 'download_report' in request.GET:
+        # Generate and download CSV or Excel report
+        archived_rows = iter_archived(**archived_filters) if read_archive else ()
+        return generate_attendance_report(attendance_records, request.GET.get('download_report'), archived_rows)
+
+    # Keyset pagination: seek past the last row of the previous page and fetch one extra row
+    # to know whether another page follows, so the cost does not grow with history size
+    page_size = getattr(settings, 'ATTENDANCE_PAGE_SIZE', 50)
+    decoded_cursor = decode_attendance_cursor(cursor) if cursor else None
+    if decoded_cursor:
+        attendance_records = attendance_records.filter(attendance_after(decoded_cursor))
+    page = list(attendance_records[:page_size + 1])
+    if len(page) <= page_size and read_archive:
+        # Archived days are all older than live ones, so the list simply continues into the archive
+        archive_cursor = decoded_cursor if decoded_cursor and decoded_cursor[0] < watermark else None
+        for record in archived_attendance(after=archive_cursor, **archived_filters):
+            page.append(record)
+            if len(page) > page_size:
+                break
+    has_next = len(page) > page_size
+    page = page[:page_size]
+
+    context = {
+        'attendance_records': page,
+        'search_query': search_query,
+        'date_filter': date_filter,
+        'next_cursor': encode_attendance_cursor(page[-1]) if has_next else '',
+        'is_first_page': decoded_cursor is None,
+    }
+
+    return render(request, 'emp_attendance_list.html', context)
+
+
+REPORT_HEADER = ['Employee Name', 'Employee ID', 'Attendance Date', 'Check-in Time', 'Check-out Time', 'Stayed Time']
+
+
+class Echo:
+    """Pseudo-buffer whose write() hands the formatted line back for streaming."""
+    def write(self, value):
+        return value
+
+
+def format_report_row(name, employee_id, date, check_in, check_out):
+    return [
+        name,
+        employee_id,
+        date,
+        check_in.strftime("%I:%M:%S %p") if check_in else 'Not Checked In',
+        check_out.strftime("%I:%M:%S %p") if check_out else 'Not Checked Out',
+        format_duration(check_in, check_out) if check_in and check_out else 'Not Checked Out',
+    ]
+
+
+def attendance_report_rows(attendance_records, archived_rows=()):
+    """Yield formatted report rows straight from the database in chunks, without model instances,
+    followed by any (older) rows read from the attendance archive."""
+    chunk_size = getattr(settings, 'ATTENDANCE_EXPORT_CHUNK_SIZE', 2000)
+    rows = attendance_records.values_list(
+        'employee__name', 'employee__employee_id', 'date', 'check_in_time', 'check_out_time'
+    ).iterator(chunk_size=chunk_size)
+    for name, employee_id, date, check_in, check_out in rows:
+        yield format_report_row(name, employee_id, date, check_in, check_out)
+    for _, _, name, employee_id, _, date, check_in, check_out in archived_rows:
+        yield format_report_row(name, employee_id, date, check_in, check_out)
+
+
+def generate_attendance_report(attendance_records, report_format='csv', archived_rows=()):
+    if report_format == 'xlsx':
+        return generate_attendance_xlsx(attendance_records, archived_rows)
+
+    # Stream the CSV report row by row so memory stays flat however large the export is
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(REPORT_HEADER)
+        for row in attendance_report_rows(attendance_records, archived_rows):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="attendance_report.csv"'
+    return response
+
+
+def generate_attendance_xlsx(attendance_records, archived_rows=()):
+    # openpyxl's write-only mode spools rows to disk as they are appended
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Attendance')
+    sheet.append(REPORT_HEADER)
+    for row in attendance_report_rows(attendance_records, archived_rows):
+        sheet.append(row)
+
+    report_file = tempfile.TemporaryFile()
+    workbook.save(report_file)
+    report_file.seek(0)
+    return FileResponse(
+        report_file,
+        as_attachment=True,
+        filename='attendance_report.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+@login_required
+def attendance_report(request):
+    """Daily, weekly or monthly attendance report, read only from the rollup tables."""
+    period = request.GET.get('period', 'day')
+    if period not in PERIODS:
+        period = 'day'
+    try:
+        report_date = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        report_date = timezone.localdate()
+    department = request.GET.get('department', '')
+    period_start, period_end = period_bounds(period, report_date)
+
+    department_rollups = DepartmentAttendanceRollup.objects.filter(
+        period=period, period_start=period_start
+    ).order_by('department')
+    employee_rollups = EmployeeAttendanceRollup.objects.filter(
+        period=period, period_start=period_start, days_present__gt=0
+    ).select_related('employee').order_by('employee__name')
+    if department:
+        employee_rollups = employee_rollups.filter(employee__department=department)
+
+    context = {
+        'period': period,
+        'report_date': report_date,
+        'period_start': period_start,
+        'period_end': period_end,
+        'department': department,
+        'department_rollups': department_rollups,
+        'employee_rollups': employee_rollups[:getattr(settings, 'ATTENDANCE_PAGE_SIZE', 50)] if not department else employee_rollups,
+    }
+    return render(request, 'attendance_report.html', context)
+
+
+@login_required
+@user_passes_test(is_admin)
+def columnar_export(request):
+    """Attendance (for an optional start/end date range) or employees as Parquet or Arrow IPC, for BI jobs."""
+    from ..columnar import FORMATS as COLUMNAR_FORMATS, export_dataset
+
+    dataset = request.GET.get('dataset', 'attendance')
+    file_format = request.GET.get('format', 'parquet')
+    if dataset not in ('attendance', 'employees') or file_format not in COLUMNAR_FORMATS:
+        return JsonResponse({'error': 'dataset must be attendance or employees, format parquet or arrow'}, status=400)
+    try:
+        start, end = (
+            datetime.strptime(request.GET[key], '%Y-%m-%d').date() if request.GET.get(key) else None
+            for key in ('start', 'end')
+        )
+    except ValueError:
+        return JsonResponse({'error': 'start and end must be dates in YYYY-MM-DD format'}, status=400)
+
+    export_file = tempfile.TemporaryFile()
+    export_dataset(dataset, export_file, file_format, start, end)
+    export_file.seek(0)
+    extension, content_type = COLUMNAR_FORMATS[file_format]
+    return FileResponse(export_file, as_attachment=True, filename=f'{dataset}.{extension}', content_type=content_type)
+
+
+def get_dashboard_summary(today):
+    """Today's per-department summary rows plus totals, read with one query and cached briefly."""
+    cache_key = f'dashboard_summary:{today.isoformat()}'
+    summary = cache.get(cache_key)
+    if summary is None:
+        departments = list(
+            DailyAttendanceSummary.objects.filter(date=today).order_by('department').values(
+                'department', 'headcount', 'present', 'missing_check_in', 'missing_check_out'
+            )
+        )
+        if not departments and Employee.objects.exists():
+            # First view of the day before any check-in: seed today's rows once
+            refresh_daily_summaries(today)
+            return get_dashboard_summary(today)
+        summary = {
+            'departments': departments,
+            'total_employees': sum(row['headcount'] for row in departments),
+            'present': sum(row['present'] for row in departments),
+            'missing_check_in': sum(row['missing_check_in'] for row in departments),
+            'missing_check_out': sum(row['missing_check_out'] for row in departments),
+        }
+        cache.set(cache_key, summary, getattr(settings, 'DASHBOARD_CACHE_TTL', 15))
+    return summary
+
+
+@login_required
+def dashboard(request):
+    today = timezone.localdate()
+    summary = get_dashboard_summary(today)
+    recent_attendance_qs = Attendance.objects.order_by('-date', F('check_in_time').desc(nulls_last=True)).values_list(
+        'employee__name', 'check_in_time'
+    )[:5]
+    recent_attendance = [
+        {'employee_name': name, 'time': check_in_time.strftime('%I:%M %p') if check_in_time else 'N/A'}
+        for name, check_in_time in recent_attendance_qs
+    ]
+    # Safety alerts: attendance records missing check-in or check-out today, per department
+    recent_safety_alerts = []
+    for row in summary['departments']:
+        if row['missing_check_in']:
+            recent_safety_alerts.append({'message': f"Missing check-in: {row['missing_check_in']} ({row['department']})", 'time': today.strftime('%Y-%m-%d')})
+        if row['missing_check_out']:
+            recent_safety_alerts.append({'message': f"Missing check-out: {row['missing_check_out']} ({row['department']})", 'time': today.strftime('%Y-%m-%d')})
+    context = {
+        'total_employees': summary['total_employees'],
+        'todays_attendance': summary['present'],
+        'safety_alerts': summary['missing_check_in'] + summary['missing_check_out'],
+        'recent_attendance': recent_attendance,
+        'recent_safety_alerts': recent_safety_alerts,
+        'department_summary': summary['departments'],
+    }
+    return render(request, 'dashboard.html', context)
+
+
+def stream_attendance_events(last_id, duration, poll_interval, heartbeat=15):
+    """Yield Server-Sent Events for audit log entries after ``last_id``, for ``duration`` seconds.
+
+    Subscribers in this process wake the stream as soon as an event is logged; events logged by other
+    worker processes are picked up within ``poll_interval`` seconds.
+    """
+    yield f'retry: {int(poll_interval * 3000)}\n\n'
+    deadline = time.monotonic() + duration
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        new_events = list(AttendanceEvent.objects.filter(id__gt=last_id).order_by('id')[:100])
+        for event in new_events:
+            last_id = event.id
+            data = {
+                'name': event.name,
+                'status': event.status,
+                'source': event.source,
+                'node': event.node,
+                'occurred_at': event.occurred_at.isoformat(),
+                'time': timezone.localtime(event.occurred_at).strftime('%I:%M %p'),
+            }
+            yield f'id: {event.id}\nevent: attendance\ndata: {json.dumps(data)}\n\n'
+        if new_events:
+            last_sent = time.monotonic()
+            continue
+        if time.monotonic() - last_sent >= heartbeat:
+            # A comment line keeps proxies from closing an idle connection
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+        wait_for_events(poll_interval)
+
+
+@login_required
+def attendance_events(request):
+    """Live check-ins and check-outs as a Server-Sent Events stream, for the dashboard.
+
+    A reconnecting browser resumes after the ``Last-Event-ID`` it received; a new stream starts with
+    the next event. Each stream ends after EVENT_STREAM_SECONDS and the browser reconnects, so a
+    worker thread is not held by one dashboard indefinitely.
+    """
+    last_id = request.headers.get('Last-Event-ID', '')
+    if not last_id.isdigit():
+        last_id = AttendanceEvent.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    events = stream_attendance_events(
+        int(last_id),
+        getattr(settings, 'EVENT_STREAM_SECONDS', 300),
+        getattr(settings, 'EVENT_STREAM_POLL_INTERVAL', 1.0),
+    )
+    return StreamingHttpResponse(
+        events, content_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def safety(request):
+    # Show today's safety incidents from the incident table, refreshed periodically in the database
+    today = timezone.localdate()
+    refresh_if_stale(today)
+    incidents_qs = SafetyIncident.objects.filter(date=today)
+    counts = dict(incidents_qs.values_list('kind').annotate(count=Count('id')).values_list('kind', 'count').order_by())
+    incidents = []
+    for incident in incidents_qs.select_related('employee').order_by('kind', 'since', 'employee__name')[:getattr(settings, 'SAFETY_INCIDENT_LIMIT', 200)]:
+        incidents.append({
+            'type': incident.get_kind_display(),
+            'employee_name': incident.employee.name,
+            'time': incident.since.strftime('%H:%M') if incident.since else 'Start of day',
+        })
+    incident_counts = [
+        {'type': label, 'count': counts.get(kind, 0)} for kind, label in SafetyIncident.KIND_CHOICES
+    ]
+    return render(request, 'safety.html', {'incidents': incidents, 'incident_counts': incident_counts})
@@ -0,0 +1,28 @@
+"""gunicorn settings: ``gunicorn Project101.wsgi -c gunicorn.conf.py``.
+
+Workers write their Prometheus metrics to PROMETHEUS_MULTIPROC_DIR so that
+/metrics reports all of them (see app1/metrics.py). The directory is
+emptied when gunicorn starts.
+"""
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = 120  # First requests load the face models
+
+# Must be set before prometheus_client is imported anywhere
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'loknetra-metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)